@@ -0,0 +1,288 @@
+"""
+Run the fire/smoke detector over archived video files, headless and in parallel.
+
+The batch counterpart of testing_code.py: every video is split into chunks of
+--chunk-seconds, each chunk is seeked to and analysed by one of --workers
+worker processes (each loading the model once), and every detection is
+written to a JSONL or CSV file. Use it to backfill or audit incidents from
+recorded footage.
+
+Usage:
+    # Every video under recordings/, four worker processes, detections as JSONL
+    python backend/Ml_Model/analyse_videos.py recordings/ --workers 4 --output detections.jsonl
+
+    # Two files, every frame analysed, detections as CSV and the throughput report as JSON
+    python backend/Ml_Model/analyse_videos.py cam1.mp4 cam2.mp4 --frame-skip 1 --output detections.csv --report report.json
+
+Each detection row has the video, frame index, time in seconds from the
+start of the video, type, confidence and box (x1, y1, x2, y2).
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+
+# Add the project root to sys.path to make backend imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.inference_worker import MODEL_FILES, filter_detections, get_model_path, init_worker, predict_frames
+
+# File extensions picked up when a directory is given
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.m4v', '.ts', '.webm')
+
+# Columns of the CSV output, and keys of each JSONL row
+OUTPUT_FIELDS = ['video', 'frame', 'time_seconds', 'type', 'confidence', 'x1', 'y1', 'x2', 'y2']
+
+
+def find_videos(inputs):
+    """Expand files and directories (searched recursively) into a sorted list of video files"""
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos.extend(
+                    os.path.join(root, name) for name in files
+                    if name.lower().endswith(VIDEO_EXTENSIONS)
+                )
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return sorted(set(videos))
+
+
+def probe_video(video_path):
+    """Get (frame count, fps) of a video; the count is 0 when the container doesn't say"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    frame_count = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    cap.release()
+    return frame_count, fps
+
+
+def plan_chunks(frame_count, fps, chunk_seconds):
+    """
+    Split a video into (start_frame, end_frame) chunks of about chunk_seconds.
+    A video of unknown length or frame rate is one chunk read to the end (end_frame None).
+    """
+    if frame_count <= 0 or fps <= 0 or chunk_seconds <= 0:
+        return [(0, None)]
+    chunk_frames = max(1, int(round(chunk_seconds * fps)))
+    return [(start, min(start + chunk_frames, frame_count)) for start in range(0, frame_count, chunk_frames)]
+
+
+def analyse_chunk(video_path, start_frame, end_frame, fps, frame_skip, batch_size):
+    """
+    Analyse one chunk of a video in a worker process: seek to start_frame and
+    run every frame_skip-th frame (counted from the start of the video) through
+    the model, batch_size frames at a time. Returns (detection rows, frames read,
+    frames analysed, seconds spent).
+    """
+    started = time.perf_counter()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    rows = []
+    batch = []
+    frames_read = 0
+    frames_analysed = 0
+
+    def flush():
+        _, detections, _ = predict_frames([frame for _, frame in batch])
+        for (index, _), frame_detections in zip(batch, detections):
+            for detection in filter_detections(frame_detections):
+                x1, y1, x2, y2 = detection['box']
+                rows.append({
+                    'video': video_path,
+                    'frame': index,
+                    'time_seconds': round(index / fps, 3) if fps else None,
+                    'type': detection['type'],
+                    'confidence': round(detection['confidence'], 4),
+                    'x1': round(x1, 1), 'y1': round(y1, 1), 'x2': round(x2, 1), 'y2': round(y2, 1)
+                })
+        batch.clear()
+
+    index = start_frame
+    try:
+        while end_frame is None or index < end_frame:
+            # Frames that won't be analysed are only grabbed, not decoded
+            if index % frame_skip:
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                batch.append((index, frame))
+                frames_analysed += 1
+                if len(batch) >= batch_size:
+                    flush()
+            frames_read += 1
+            index += 1
+        if batch:
+            flush()
+    finally:
+        cap.release()
+
+    return rows, frames_read, frames_analysed, time.perf_counter() - started
+
+
+class DetectionOutput:
+    """Write detection rows to a .jsonl or .csv file as chunks finish"""
+
+    def __init__(self, path, output_format=None):
+        self.format = output_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        self._file = open(path, 'w', newline='')
+        self._csv = None
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS)
+            self._csv.writeheader()
+        self.rows = 0
+
+    def write(self, rows):
+        for row in sorted(rows, key=lambda row: row['frame']):
+            if self._csv:
+                self._csv.writerow(row)
+            else:
+                self._file.write(json.dumps(row) + '\n')
+        self.rows += len(rows)
+
+    def close(self):
+        self._file.close()
+
+
+def analyse_videos(videos, output, model_path, workers, chunk_seconds, frame_skip, batch_size):
+    """Analyse every video in parallel, writing detections to output. Returns the throughput report."""
+    started = time.perf_counter()
+    files = {}
+    tasks = []
+    for video_path in videos:
+        try:
+            frame_count, fps = probe_video(video_path)
+        except IOError as e:
+            print(f"Skipping {video_path}: {e}")
+            continue
+        chunks = plan_chunks(frame_count, fps, chunk_seconds)
+        files[video_path] = {
+            'frames': 0, 'frames_analysed': 0, 'detections': 0, 'chunks': len(chunks),
+            'worker_seconds': 0.0, 'finished_at': None, 'errors': 0
+        }
+        tasks.extend((video_path, start, end, fps) for start, end in chunks)
+
+    print(f"Analysing {len(files)} video(s) in {len(tasks)} chunk(s) with {workers} worker process(es)...")
+
+    # Spawn rather than fork, as the web server's process backend does
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker, initargs=(model_path,)) as executor:
+        futures = {
+            executor.submit(analyse_chunk, video_path, start, end, fps, frame_skip, batch_size): video_path
+            for video_path, start, end, fps in tasks
+        }
+        for future in as_completed(futures):
+            video_path = futures[future]
+            summary = files[video_path]
+            try:
+                rows, frames_read, frames_analysed, seconds = future.result()
+            except Exception as e:
+                print(f"Error analysing a chunk of {video_path}: {e}")
+                summary['errors'] += 1
+                continue
+            output.write(rows)
+            summary['frames'] += frames_read
+            summary['frames_analysed'] += frames_analysed
+            summary['detections'] += len(rows)
+            summary['worker_seconds'] += seconds
+            summary['finished_at'] = time.perf_counter() - started
+
+    wall_seconds = time.perf_counter() - started
+    total_frames = sum(summary['frames'] for summary in files.values())
+    total_analysed = sum(summary['frames_analysed'] for summary in files.values())
+
+    for summary in files.values():
+        busy = summary.pop('worker_seconds')
+        summary['worker_seconds'] = round(busy, 2)
+        # Frames per second of worker time, i.e. what one worker gets through on this file
+        summary['frames_per_second'] = round(summary['frames'] / busy, 1) if busy else None
+        summary['wall_seconds'] = round(summary.pop('finished_at') or 0.0, 2)
+
+    return {
+        'videos': len(files),
+        'workers': workers,
+        'frame_skip': frame_skip,
+        'frames': total_frames,
+        'frames_analysed': total_analysed,
+        'detections': output.rows,
+        'wall_seconds': round(wall_seconds, 2),
+        'frames_per_second': round(total_frames / wall_seconds, 1) if wall_seconds else None,
+        'analysed_frames_per_second': round(total_analysed / wall_seconds, 1) if wall_seconds else None,
+        'files': files
+    }
+
+
+def print_report(report):
+    print(f"\n{'video':<40}{'frames':>9}{'analysed':>10}{'boxes':>8}{'frames/s':>10}{'wall s':>9}")
+    for video_path, summary in report['files'].items():
+        name = video_path if len(video_path) <= 38 else '...' + video_path[-35:]
+        fps = summary['frames_per_second'] if summary['frames_per_second'] is not None else '-'
+        print(f"{name:<40}{summary['frames']:>9}{summary['frames_analysed']:>10}{summary['detections']:>8}"
+              f"{fps:>10}{summary['wall_seconds']:>9}")
+    print(
+        f"\n{report['frames']} frames ({report['frames_analysed']} analysed) from {report['videos']} video(s) "
+        f"in {report['wall_seconds']}s: {report['frames_per_second']} frames/s, "
+        f"{report['analysed_frames_per_second']} analysed frames/s, {report['detections']} detections"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fire/smoke detection over video files in parallel")
+    parser.add_argument('inputs', nargs='+', help="Video files, or directories searched for videos")
+    parser.add_argument('--output', required=True, help="File to write detections to (.jsonl or .csv)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Output format (default: from the file extension)")
+    parser.add_argument('--report', help="Also write the throughput report as JSON to this file")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Worker processes, each loading the model once (default: half the CPUs)")
+    parser.add_argument('--chunk-seconds', type=float, default=60,
+                        help="Length of the pieces videos are split into across workers")
+    parser.add_argument('--frame-skip', type=int, default=4, help="Analyse every Nth frame (1 for all)")
+    parser.add_argument('--batch-size', type=int, default=8, help="Frames per model call")
+    parser.add_argument('--model-format', choices=list(MODEL_FILES), default=os.getenv('MODEL_FORMAT', 'pytorch'),
+                        help="Model artifact to run, as MODEL_FORMAT for the server")
+    args = parser.parse_args()
+
+    if args.frame_skip < 1 or args.batch_size < 1 or args.workers < 1:
+        parser.error("--frame-skip, --batch-size and --workers must be at least 1")
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        print("No video files found")
+        return 1
+
+    output = DetectionOutput(args.output, args.format)
+    try:
+        report = analyse_videos(
+            videos, output, get_model_path(args.model_format), args.workers,
+            args.chunk_seconds, args.frame_skip, args.batch_size
+        )
+    finally:
+        output.close()
+
+    print_report(report)
+    print(f"Detections written to {args.output}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Report written to {args.report}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Export best.pt to ONNX / OpenVINO for CPU inference, and compare the exported
+models against the PyTorch one.
+
+Usage:
+    # Write best.onnx (and best_int8.onnx with --int8) next to best.pt
+    python backend/Ml_Model/export_model.py export --format onnx --int8
+
+    # Write best_openvino_model/ (best_int8_openvino_model/ with --int8)
+    python backend/Ml_Model/export_model.py export --format openvino --int8 --data data.yaml
+
+    # Compare fps, latency and detections of each format on a local video
+    python backend/Ml_Model/export_model.py compare --video 1.mp4 --formats pytorch onnx onnx-int8
+
+Select the format the server runs with MODEL_FORMAT (see backend/README.md).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+# Add the project root to sys.path to make backend imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.inference_worker import (
+    extract_detections, filter_detections, get_model_path, load_model
+)
+
+# Detections of two models match when they share a class and overlap this much
+MATCH_IOU = 0.5
+
+
+def export(model_format, int8=False, data=None):
+    """Export best.pt to the given format, returning the paths written"""
+    from ultralytics import YOLO
+
+    model = YOLO(get_model_path('pytorch'))
+    written = []
+
+    if model_format == 'onnx':
+        # Dynamic axes so the batching scheduler can send several frames at once
+        written.append(model.export(format='onnx', dynamic=True, simplify=True))
+        if int8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(get_model_path('onnx'), get_model_path('onnx-int8'), weight_type=QuantType.QUInt8)
+            written.append(get_model_path('onnx-int8'))
+    elif model_format == 'openvino':
+        written.append(model.export(format='openvino', dynamic=True))
+        if int8:
+            # OpenVINO INT8 export calibrates on the dataset described by data
+            written.append(model.export(format='openvino', dynamic=True, int8=True, data=data))
+    else:
+        raise ValueError(f"Cannot export to '{model_format}'")
+
+    return written
+
+
+def read_video_frames(video_path, max_frames):
+    """Read up to max_frames frames of a local video into memory"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_format(model_format, frames, warmup=3):
+    """Run every frame through one model format, returning latencies and detections"""
+    model = load_model(get_model_path(model_format))
+
+    # Let the backend allocate and compile before timing
+    for frame in frames[:warmup]:
+        model.predict(source=frame, save=False, verbose=False)
+
+    latencies = []
+    detections = []
+    started = time.perf_counter()
+    for frame in frames:
+        frame_started = time.perf_counter()
+        result = model.predict(source=frame, save=False, verbose=False)[0]
+        latencies.append(time.perf_counter() - frame_started)
+        detections.append(filter_detections(extract_detections(result, model.names)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'fps': round(len(frames) / elapsed, 2),
+        'latency_ms': {
+            'mean': round(float(np.mean(latencies)) * 1000, 1),
+            'p50': round(float(np.percentile(latencies, 50)) * 1000, 1),
+            'p95': round(float(np.percentile(latencies, 95)) * 1000, 1)
+        },
+        'detections': sum(len(frame_detections) for frame_detections in detections)
+    }, detections
+
+
+def iou(box_a, box_b):
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    x1, y1 = max(box_a[0], box_b[0]), max(box_a[1], box_b[1])
+    x2, y2 = min(box_a[2], box_b[2]), min(box_a[3], box_b[3])
+    intersection = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    area_a = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+    area_b = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
+    union = area_a + area_b - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def agreement(reference, candidate):
+    """
+    Compare per-frame detections of two models. Boxes are matched greedily by
+    class and IoU; agreement is the F1 score of the matches, 1.0 meaning identical.
+    """
+    matched = 0
+    confidence_deltas = []
+    for reference_frame, candidate_frame in zip(reference, candidate):
+        unmatched = list(candidate_frame)
+        for detection in reference_frame:
+            best, best_iou = None, MATCH_IOU
+            for other in unmatched:
+                overlap = iou(detection['box'], other['box'])
+                if other['type'] == detection['type'] and overlap >= best_iou:
+                    best, best_iou = other, overlap
+            if best is not None:
+                unmatched.remove(best)
+                matched += 1
+                confidence_deltas.append(abs(best['confidence'] - detection['confidence']))
+
+    total_reference = sum(len(frame) for frame in reference)
+    total_candidate = sum(len(frame) for frame in candidate)
+    if total_reference + total_candidate == 0:
+        score = 1.0
+    else:
+        score = 2 * matched / (total_reference + total_candidate)
+
+    return {
+        'agreement': round(score, 3),
+        'matched': matched,
+        'mean_confidence_delta': round(float(np.mean(confidence_deltas)), 4) if confidence_deltas else None
+    }
+
+
+def compare(video_path, formats, max_frames):
+    """Build a report of fps, latency and agreement with PyTorch for each format"""
+    frames = read_video_frames(video_path, max_frames)
+    report = {'video': video_path, 'frames': len(frames), 'formats': {}}
+
+    reference = None
+    for model_format in ['pytorch'] + [f for f in formats if f != 'pytorch']:
+        print(f"Running {model_format} on {len(frames)} frames...")
+        summary, detections = run_format(model_format, frames)
+        if reference is None:
+            reference = detections
+        else:
+            summary.update(agreement(reference, detections))
+        report['formats'][model_format] = summary
+
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['frames']} frames of {report['video']}\n")
+    print(f"{'format':<15}{'fps':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'boxes':>8}{'agreement':>11}")
+    for model_format, summary in report['formats'].items():
+        latency = summary['latency_ms']
+        print(
+            f"{model_format:<15}{summary['fps']:>8}{latency['mean']:>10}{latency['p50']:>10}"
+            f"{latency['p95']:>10}{summary['detections']:>8}{summary.get('agreement', 1.0):>11}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and compare CPU builds of the fire/smoke model")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Export best.pt")
+    export_parser.add_argument('--format', choices=['onnx', 'openvino'], default='onnx')
+    export_parser.add_argument('--int8', action='store_true', help="Also write an INT8-quantized model")
+    export_parser.add_argument('--data', help="Dataset YAML used to calibrate OpenVINO INT8 export")
+
+    compare_parser = subparsers.add_parser('compare', help="Compare formats on a local video")
+    compare_parser.add_argument('--video', required=True)
+    compare_parser.add_argument('--formats', nargs='+', default=['pytorch', 'onnx'])
+    compare_parser.add_argument('--frames', type=int, default=300, help="Maximum frames to run")
+    compare_parser.add_argument('--output', help="Also write the report as JSON to this file")
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        for path in export(args.format, int8=args.int8, data=args.data):
+            print(f"Wrote {path}")
+        return 0
+
+    report = compare(args.video, args.formats, args.frames)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,27 +1,28 @@
+"""
+Watch the detector run on one video or YouTube URL in a window.
+
+Usage:
+    python backend/Ml_Model/testing_code.py [video path or YouTube URL]
+
+For running it headless over many recorded videos at once, see analyse_videos.py.
+"""
+import os
+import sys
 import cv2
 from ultralytics import YOLO
-import yt_dlp
-
-def is_youtube_url(url):
-    return "youtube.com" in url or "youtu.be" in url
 
-def get_youtube_stream_url(youtube_url):
-    ydl_opts = {
-        "quiet": True,
-        "skip_download": True,
-        "format": "best[ext=mp4]/best",
-    }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(youtube_url, download=False)
-        return info["url"]
+# Add the project root to sys.path to make backend imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.stream_resolver import is_youtube_url, resolve_stream_url
+from backend.inference_worker import CONF_THRESHOLDS
 
 # Input: local video path or YouTube URL
-video_input ="1.mp4"  # Replace as needed
+video_input = sys.argv[1] if len(sys.argv) > 1 else "1.mp4"
 
 # Use streaming URL for YouTube
 if is_youtube_url(video_input):
     print("Getting streamable YouTube URL...")
-    video_path = get_youtube_stream_url(video_input)
+    video_path = resolve_stream_url(video_input)
     print(f"Streaming from: {video_path}")
 else:
     video_path = video_input
@@ -36,7 +37,6 @@ if not cap.isOpened():
     exit()
 
 # Configs
-CONF_THRESHOLDS = {"fire": 0.2, "smoke": 0.2}
 frame_skip = 4
 frame_count = 0
 
@@ -0,0 +1,224 @@
+"""
+Background delivery of alert emails
+
+Alerts are queued by the detection pipeline and sent from one thread over a
+long-lived SMTP session, so a slow mail server never holds up a camera.
+Alerts arriving within ALERT_DIGEST_SECONDS of each other can be sent as one
+digest email.
+"""
+import os
+import queue
+import smtplib
+import threading
+import time
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Mail server used for alert emails
+SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+# Set to 0 for servers without STARTTLS, such as a local test server
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '1') == '1'
+# Seconds to wait for the mail server on each command
+SMTP_TIMEOUT_SECONDS = float(os.getenv('SMTP_TIMEOUT_SECONDS', '30'))
+# Seconds an unused session stays open before it is closed instead of kept alive
+SMTP_IDLE_SECONDS = float(os.getenv('SMTP_IDLE_SECONDS', '120'))
+
+# Seconds to keep collecting alerts into one digest email (0 sends each alert on its own)
+ALERT_DIGEST_SECONDS = float(os.getenv('ALERT_DIGEST_SECONDS', '0'))
+# Most alerts put in one digest email
+ALERT_DIGEST_MAX = int(os.getenv('ALERT_DIGEST_MAX', '20'))
+# Alerts that may wait to be sent; further alerts are dropped and counted
+ALERT_QUEUE_SIZE = int(os.getenv('ALERT_QUEUE_SIZE', '1000'))
+
+# Weight of the newest sample in the running latency averages
+LATENCY_ALPHA = 0.2
+
+
+class SMTPSession:
+    """An SMTP connection that is opened on first use, kept open and reopened when it drops"""
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, username=None, password=None,
+                 starttls=SMTP_STARTTLS, timeout=SMTP_TIMEOUT_SECONDS, idle_timeout=SMTP_IDLE_SECONDS):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+
+        self.connects = 0
+        self._server = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self._server = server
+        self.connects += 1
+        logger.info(f"Connected to mail server {self.host}:{self.port}")
+
+    def send(self, sender, recipients, message):
+        """Send a message, reconnecting and retrying once if the session was dropped"""
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            # Servers close idle sessions; start a fresh one rather than fail the first send
+            self.close()
+
+        for attempt in range(2):
+            try:
+                if self._server is None:
+                    self._connect()
+                self._server.sendmail(sender, recipients, message)
+                self._last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError) as e:
+                logger.warning(f"Mail server session failed, reconnecting: {str(e)}")
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+class AlertDispatcher:
+    """
+    Queue alerts and deliver them on a background thread. build_message turns
+    a list of alerts into (subject, body) and send delivers one email; alerts
+    are whatever the caller queues, e.g. dicts describing a detection.
+    """
+
+    def __init__(self, build_message, send, digest_seconds=ALERT_DIGEST_SECONDS,
+                 digest_max=ALERT_DIGEST_MAX, max_queue=ALERT_QUEUE_SIZE):
+        self.build_message = build_message
+        self.send = send
+        self.digest_seconds = digest_seconds
+        self.digest_max = digest_max if digest_seconds > 0 else 1
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+
+        self._stats_lock = threading.Lock()
+        self._alerts_queued = 0
+        self._alerts_dropped = 0
+        self._alerts_sent = 0
+        self._alerts_failed = 0
+        self._emails_sent = 0
+        self._last_queue_lag = None
+        self._avg_queue_lag = None
+        self._max_queue_lag = 0.0
+        self._last_send_latency = None
+        self._avg_send_latency = None
+
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, alert):
+        """Queue an alert for delivery. Returns False if the queue was full."""
+        try:
+            self._queue.put_nowait((alert, time.monotonic()))
+        except queue.Full:
+            logger.error(f"Alert queue full, dropping alert: {alert}")
+            with self._stats_lock:
+                self._alerts_dropped += 1
+            return False
+        with self._stats_lock:
+            self._alerts_queued += 1
+        return True
+
+    def _collect(self):
+        # Wait for an alert, then keep collecting into a digest until the window closes.
+        # A None item is put by close() to wake the thread up.
+        item = self._queue.get()
+        if item is None:
+            return []
+        batch = [item]
+        deadline = item[1] + self.digest_seconds
+        while len(batch) < self.digest_max:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop_event.is_set():
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set() or not self._queue.empty():
+            batch = self._collect()
+            if batch:
+                self._deliver(batch)
+
+    def _deliver(self, batch):
+        alerts = [alert for alert, _ in batch]
+        try:
+            subject, body = self.build_message(alerts)
+            started = time.monotonic()
+            self.send(subject, body)
+        except Exception as e:
+            logger.error(f"Error sending alert email for {len(alerts)} alert(s): {str(e)}")
+            with self._stats_lock:
+                self._alerts_failed += len(alerts)
+            return
+
+        finished = time.monotonic()
+        logger.info(f"Alert email sent for {len(alerts)} alert(s)")
+        with self._stats_lock:
+            self._alerts_sent += len(alerts)
+            self._emails_sent += 1
+            # Queue lag is from an alert being raised to its email going out
+            for _, queued_at in batch:
+                lag = finished - queued_at
+                self._last_queue_lag = lag
+                self._avg_queue_lag = lag if self._avg_queue_lag is None else (
+                    self._avg_queue_lag + LATENCY_ALPHA * (lag - self._avg_queue_lag))
+                self._max_queue_lag = max(self._max_queue_lag, lag)
+            latency = finished - started
+            self._last_send_latency = latency
+            self._avg_send_latency = latency if self._avg_send_latency is None else (
+                self._avg_send_latency + LATENCY_ALPHA * (latency - self._avg_send_latency))
+
+    def close(self, timeout=10):
+        """Send what is still queued, then stop"""
+        self._stop_event.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def get_stats(self):
+        """Get queue depth, queue lag and send latency figures"""
+        def ms(seconds):
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'digest_seconds': self.digest_seconds,
+                'alerts_queued': self._alerts_queued,
+                'alerts_dropped': self._alerts_dropped,
+                'alerts_sent': self._alerts_sent,
+                'alerts_failed': self._alerts_failed,
+                'emails_sent': self._emails_sent,
+                'last_queue_lag_ms': ms(self._last_queue_lag),
+                'avg_queue_lag_ms': ms(self._avg_queue_lag),
+                'max_queue_lag_ms': ms(self._max_queue_lag),
+                'last_send_latency_ms': ms(self._last_send_latency),
+                'avg_send_latency_ms': ms(self._avg_send_latency)
+            }
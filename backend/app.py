@@ -1,6 +1,7 @@
 from flask import Flask
 from flask_cors import CORS
 import os
+import threading
 import logging
 from dotenv import load_dotenv
 
@@ -9,9 +10,13 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
-def create_app():
+def create_app(api_only=None):
     """
     Application factory function
+
+    With api_only (default: the API_ONLY environment variable) the video
+    streaming and pipeline routes are left out, so the process never imports
+    the video pipeline or loads the model.
     """
     # Create Flask app
     app = Flask(__name__)
@@ -22,6 +27,10 @@ def create_app():
     # Load environment variables
     load_dotenv()
     
+    if api_only is None:
+        api_only = os.getenv('API_ONLY', '0') == '1'
+    app.config['API_ONLY'] = api_only
+    
     # Increase timeout for streaming responses
     app.config['TIMEOUT'] = 300  # 5 minutes timeout for streaming
     
@@ -59,6 +68,15 @@ def create_app():
     app.register_blueprint(areas_bp)
     app.register_blueprint(dashboard_bp)
     
+    if not api_only:
+        from backend.blueprints.dashboard.stream_routes import stream_bp
+        app.register_blueprint(stream_bp)
+        
+        # Load the model in the background now instead of on the first viewer's first frame
+        if os.getenv('MODEL_WARMUP_ON_START', '0') == '1':
+            from backend.blueprints.dashboard.testing_script import warm_up_model
+            threading.Thread(target=warm_up_model, name="model-warmup", daemon=True).start()
+    
     return app
 
 if __name__ == '__main__':
@@ -0,0 +1,489 @@
+"""
+Benchmark the live video pipeline end to end
+
+Drives the same capture -> inference -> encode path as /video_feed, with
+local video files standing in for cameras. Files are played at their own
+frame rate, as a live camera would deliver them, and one viewer per camera
+consumes the stream. Every combination of camera count and per-camera
+inference rate is run for --duration seconds after a --warmup, and each run
+reports per-camera delivered fps, capture-to-delivery latency percentiles,
+process CPU and RSS. Results are written as JSON so two releases can be
+compared with --compare.
+
+Without --videos a deterministic synthetic clip is generated once and
+reused, so runs on different machines and releases see the same input.
+Detections are counted but never written to the database.
+
+Usage:
+    python backend/benchmark_pipeline.py --output results.json
+    python backend/benchmark_pipeline.py --videos 1.mp4 2.mp4 --cameras 1 4 8 --inference-fps 1 5 10 --output results.json
+    python backend/benchmark_pipeline.py --output new.json --compare old.json --tolerance 0.1
+"""
+import os
+import sys
+
+# Workers should stop as soon as a run's viewers disconnect, not linger into the next run
+os.environ.setdefault('STREAM_IDLE_GRACE_SECONDS', '0')
+
+import json
+import time
+import hashlib
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+import cv2
+import numpy as np
+
+# Add the project root to sys.path to make backend imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend.detection_writer import DetectionWriter
+from backend.blueprints.dashboard import camera_worker, testing_script
+from backend.blueprints.dashboard.pipeline_stats import get_camera_stats
+from backend.blueprints.dashboard.rate_control import rate_controller
+from backend.blueprints.dashboard.stream_profile import StreamProfile
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    # Windows has no resource module
+    resource = None
+
+# Camera ids used by benchmark runs start here, well clear of real cameras
+CAMERA_ID_BASE = 900000
+
+# Settings recorded with the results, since they change what a run measures (unset means the default)
+RECORDED_SETTINGS = (
+    'CAPTURE_MODE', 'INFERENCE_BACKEND', 'INFERENCE_WORKERS', 'INFERENCE_BATCH_SIZE', 'INFERENCE_BUDGET',
+    'MODEL_FORMAT', 'STREAM_REUSE_BOXES', 'STREAM_DISPLAY_FPS', 'MOTION_GATE', 'DETECTION_TRACKING'
+)
+
+# Seconds between CPU and memory samples
+SAMPLE_INTERVAL = 0.5
+
+
+class NullConnection:
+    """Database connection stand-in that accepts detection writes and discards them"""
+
+    def cursor(self, *args, **kwargs):
+        return self
+
+    def executemany(self, query, rows):
+        pass
+
+    def commit(self):
+        pass
+
+    def ping(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_fixture(path, seconds=30, fps=25, width=1280, height=720, seed=0):
+    """
+    Write a synthetic clip: a noisy background with moving blocks, so decoding,
+    motion and encoding cost roughly what real footage does. The same arguments
+    always produce the same frames.
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    blocks = [
+        (rng.integers(0, width), rng.integers(0, height), rng.integers(-12, 12), rng.integers(-8, 8),
+         tuple(int(c) for c in rng.integers(0, 255, 3)))
+        for _ in range(6)
+    ]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"Could not write fixture: {path}")
+    try:
+        for index in range(int(seconds * fps)):
+            frame = background.copy()
+            for x, y, dx, dy, color in blocks:
+                cx = int(x + dx * index) % width
+                cy = int(y + dy * index) % height
+                cv2.rectangle(frame, (cx, cy), (cx + width // 8, cy + height // 8), color, -1)
+            cv2.putText(frame, str(index), (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def describe_video(path):
+    """Get the file's checksum and its frame count, fps and size, recorded with the results"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {path}")
+        return {
+            'path': path,
+            'sha256': digest.hexdigest(),
+            'frames': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            'fps': round(cap.get(cv2.CAP_PROP_FPS), 2),
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        }
+    finally:
+        cap.release()
+
+
+def summarise_latencies(samples):
+    """p50/p95/p99/max/mean of latency samples in seconds, as milliseconds"""
+    if not samples:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None, 'mean_ms': None}
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 1),
+        'p95_ms': round(float(p95), 1),
+        'p99_ms': round(float(p99), 1),
+        'max_ms': round(float(values.max()), 1),
+        'mean_ms': round(float(values.mean()), 1)
+    }
+
+
+def read_rss_mb():
+    """
+    Current resident memory of this process, from /proc or psutil; falls back
+    to the peak from resource, and None when none of them is available.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+
+def read_cpu_seconds():
+    """CPU time used by this process, plus its live child processes (e.g. inference workers) when psutil is installed"""
+    times = os.times()
+    seconds = times.user + times.system
+    if psutil is not None:
+        for child in psutil.Process().children(recursive=True):
+            try:
+                child_times = child.cpu_times()
+                seconds += child_times.user + child_times.system
+            except psutil.Error:
+                pass
+    return seconds
+
+
+class ResourceSampler:
+    """Sample RSS in the background between start() and stop(), and CPU use over the same span"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._rss = []
+
+    def start(self):
+        self._started = time.monotonic()
+        self._cpu_started = read_cpu_seconds()
+        self._rss = [read_rss_mb()]
+        self._thread = threading.Thread(target=self._run, name='benchmark-sampler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._rss.append(read_rss_mb())
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+        elapsed = time.monotonic() - self._started
+        self._rss.append(read_rss_mb())
+        rss = [value for value in self._rss if value is not None]
+        return {
+            # 100 means one core fully busy
+            'cpu_percent': round((read_cpu_seconds() - self._cpu_started) / elapsed * 100, 1) if elapsed else None,
+            'rss_mb_avg': round(sum(rss) / len(rss), 1) if rss else None,
+            'rss_mb_peak': round(max(rss), 1) if rss else None
+        }
+
+
+class CameraViewer:
+    """
+    One viewer of one stand-in camera, consuming its stream on a thread and
+    timing every chunk it receives. A file that ends before the run does is
+    subscribed to again from the start.
+    """
+
+    def __init__(self, camera_id, video_path, inference_fps, profile):
+        self.camera_id = camera_id
+        self.video_path = video_path
+        self.inference_fps = inference_fps
+        self.profile = profile
+
+        self.measuring = threading.Event()
+        self._stop_event = threading.Event()
+        self._subscription = None
+        self._thread = threading.Thread(target=self._run, name=f"benchmark-viewer-{camera_id}", daemon=True)
+        self.latencies = []
+        self.chunks = 0
+        self.bytes = 0
+        self.restarts = 0
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._subscription = camera_worker.subscribe(
+                self.camera_id, self.video_path, self.inference_fps, self.profile
+            )
+            for chunk in self._subscription:
+                if self.measuring.is_set():
+                    self.latencies.append(time.monotonic() - self._subscription.last_captured_at)
+                    self.chunks += 1
+                    self.bytes += len(chunk)
+                if self._stop_event.is_set():
+                    break
+            self._subscription.close()
+            if not self._stop_event.is_set():
+                self.restarts += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=10)
+
+
+def wait_for_workers(camera_ids, timeout=15):
+    """Wait for the cameras' workers to stop, so one run's work doesn't spill into the next"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(camera_worker.get_worker(camera_id) is None for camera_id in camera_ids):
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def run_benchmark(run_index, videos, cameras, inference_fps, duration, warmup, profile):
+    """Stream `cameras` stand-in cameras at `inference_fps` and measure them for `duration` seconds"""
+    viewers = [
+        CameraViewer(CAMERA_ID_BASE + run_index * 1000 + index, videos[index % len(videos)], inference_fps, profile)
+        for index in range(cameras)
+    ]
+    for viewer in viewers:
+        viewer.start()
+    time.sleep(warmup)
+
+    sampler = ResourceSampler()
+    before = {viewer.camera_id: get_camera_stats(viewer.camera_id).snapshot() for viewer in viewers}
+    sampler.start()
+    started = time.monotonic()
+    for viewer in viewers:
+        viewer.measuring.set()
+    time.sleep(duration)
+    for viewer in viewers:
+        viewer.measuring.clear()
+    elapsed = time.monotonic() - started
+    resources = sampler.stop()
+    # Taken before the viewers leave, while the cameras are still registered
+    rates = rate_controller.get_stats()
+
+    for viewer in viewers:
+        viewer.stop()
+    stopped = wait_for_workers([viewer.camera_id for viewer in viewers])
+
+    camera_results = []
+    for viewer in viewers:
+        after = get_camera_stats(viewer.camera_id).snapshot()
+        # Counters over the measured span; latency figures as they stood at the end
+        counters = {
+            name: value - before[viewer.camera_id].get(name, 0) if not name.endswith('_ms') else value
+            for name, value in after.items()
+            if isinstance(value, (int, float))
+        }
+        camera_results.append({
+            'camera_id': viewer.camera_id,
+            'video': viewer.video_path,
+            'chunks': viewer.chunks,
+            'fps': round(viewer.chunks / elapsed, 2),
+            'kbytes_per_second': round(viewer.bytes / elapsed / 1024, 1),
+            'latency': summarise_latencies(viewer.latencies),
+            'restarts': viewer.restarts,
+            'inference': rates.get(viewer.camera_id),
+            'stats': counters
+        })
+
+    all_latencies = [latency for viewer in viewers for latency in viewer.latencies]
+    camera_fps = [camera['fps'] for camera in camera_results]
+    return {
+        'cameras': cameras,
+        'inference_fps': inference_fps,
+        'duration_seconds': round(elapsed, 2),
+        'fps_total': round(sum(camera_fps), 2),
+        'fps_min_camera': min(camera_fps),
+        'latency': summarise_latencies(all_latencies),
+        **resources,
+        'workers_stopped': stopped,
+        'camera_results': camera_results
+    }
+
+
+def get_git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5
+        )
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare_results(baseline, current, tolerance):
+    """
+    List the runs of current that are worse than the same run (camera count and
+    inference fps) in baseline by more than tolerance: lower total or minimum
+    fps, or higher p95 latency, CPU or peak RSS.
+    """
+    baseline_runs = {(run['cameras'], run['inference_fps']): run for run in baseline['runs']}
+    # (figure, getter, True when higher is better)
+    figures = [
+        ('fps_total', lambda run: run['fps_total'], True),
+        ('fps_min_camera', lambda run: run['fps_min_camera'], True),
+        ('p95_ms', lambda run: run['latency']['p95_ms'], False),
+        ('cpu_percent', lambda run: run['cpu_percent'], False),
+        ('rss_mb_peak', lambda run: run['rss_mb_peak'], False)
+    ]
+    regressions = []
+    for run in current['runs']:
+        old = baseline_runs.get((run['cameras'], run['inference_fps']))
+        if old is None:
+            continue
+        for name, get, higher_is_better in figures:
+            before, after = get(old), get(run)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(
+                    f"{run['cameras']} camera(s) at {run['inference_fps']} inference fps: "
+                    f"{name} {before} -> {after} ({change:+.0%})"
+                )
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'cameras':>8}{'inf fps':>9}{'fps total':>11}{'fps min':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'CPU %':>8}{'RSS MB':>9}")
+    for run in results['runs']:
+        latency = run['latency']
+        print(f"{run['cameras']:>8}{run['inference_fps']:>9}{run['fps_total']:>11}{run['fps_min_camera']:>9}"
+              f"{str(latency['p50_ms']):>9}{str(latency['p95_ms']):>9}{str(latency['p99_ms']):>9}"
+              f"{str(run['cpu_percent']):>8}{str(run['rss_mb_peak']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the live capture, inference and encode pipeline")
+    parser.add_argument('--videos', nargs='+', help="Video files standing in for cameras, used in turn "
+                                                     "(default: a generated synthetic clip)")
+    parser.add_argument('--fixture-dir', default=os.path.join(tempfile.gettempdir(), 'asadel-benchmark'),
+                        help="Where the synthetic clip is generated and kept between runs")
+    parser.add_argument('--cameras', nargs='+', type=int, default=[1, 2, 4], help="Camera counts to run")
+    parser.add_argument('--inference-fps', nargs='+', type=float, default=[1, 5],
+                        help="Per-camera inference rates to run, as a camera's inference_fps setting")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds measured per run")
+    parser.add_argument('--warmup', type=float, default=5, help="Seconds each run streams before measuring")
+    parser.add_argument('--width', type=int, default=480, help="Stream width viewers ask for, 0 for full size")
+    parser.add_argument('--quality', type=int, default=70, help="JPEG quality viewers ask for")
+    parser.add_argument('--fps', type=float, default=0, help="Frame rate viewers ask for, 0 for every frame")
+    parser.add_argument('--output', required=True, help="File to write the results to as JSON")
+    parser.add_argument('--compare', help="Results file of an earlier run to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="Relative change counted as a regression by --compare")
+    args = parser.parse_args()
+
+    # Keep the per-worker start/stop messages out of the report
+    logging.getLogger('backend').setLevel(logging.WARNING)
+
+    videos = args.videos
+    if not videos:
+        os.makedirs(args.fixture_dir, exist_ok=True)
+        fixture = os.path.join(args.fixture_dir, 'synthetic-720p-25fps.avi')
+        if not os.path.isfile(fixture):
+            print(f"Generating synthetic clip {fixture}...")
+            make_fixture(fixture)
+        videos = [fixture]
+    videos = [os.path.abspath(video) for video in videos]
+
+    # Detections are run and tracked as usual but never reach the database
+    testing_script._writer = DetectionWriter(connect=NullConnection)
+    model_available = testing_script.warm_up_model()
+    if not model_available:
+        print("No model available, so frames are streamed without inference")
+
+    results = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': get_git_commit(),
+        'host': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'opencv': cv2.__version__
+        },
+        'settings': {name: os.environ.get(name) for name in RECORDED_SETTINGS},
+        'model_available': model_available,
+        'profile': {'width': args.width or None, 'quality': args.quality, 'fps': args.fps or None},
+        'videos': [describe_video(video) for video in videos],
+        'duration_seconds': args.duration,
+        'warmup_seconds': args.warmup,
+        'runs': []
+    }
+
+    profile = StreamProfile(args.width or None, args.quality, args.fps or None)
+    run_index = 0
+    for cameras in args.cameras:
+        for inference_fps in args.inference_fps:
+            print(f"Running {cameras} camera(s) at {inference_fps} inference fps...")
+            results['runs'].append(
+                run_benchmark(run_index, videos, cameras, inference_fps, args.duration, args.warmup, profile)
+            )
+            run_index += 1
+    results['detection_writer'] = testing_script._writer.get_stats()
+    testing_script._writer.close()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print_results(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_results(json.load(f), results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
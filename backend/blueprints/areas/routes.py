@@ -3,7 +3,9 @@ import json
 import logging
 from datetime import datetime
 from mysql.connector import Error
-from backend.utils import get_db_connection, token_required
+from backend.utils import token_required
+from backend.camera_registry import camera_registry
+from backend.db_session import get_db, register_blueprint_session
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -11,12 +13,15 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 areas_bp = Blueprint('areas', __name__, url_prefix='/api')
 
+# Release each request's database session when the request ends
+areas_bp.record_once(register_blueprint_session)
+
 @areas_bp.route('/regions', methods=['GET'])
 @token_required
 def get_regions(current_user):
     """Get a list of all regions with their sub-regions"""
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         # Get all regions
@@ -69,18 +74,13 @@ def get_regions(current_user):
     except Exception as e:
         logger.error(f"Unexpected error while fetching regions: {e}")
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @areas_bp.route('/regions/<int:region_id>', methods=['GET'])
 @token_required
 def get_region(current_user, region_id):
     """Get details of a specific region with its sub-regions"""
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         # Get region details
@@ -132,11 +132,6 @@ def get_region(current_user, region_id):
     except Exception as e:
         logger.error(f"Unexpected error while fetching region: {e}")
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @areas_bp.route('/regions', methods=['POST'])
 @token_required
@@ -149,7 +144,7 @@ def create_region(current_user):
         if not region_name:
             return jsonify({'success': False, 'error': 'Region name is required'}), 400
         
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if region name already exists
@@ -161,6 +156,7 @@ def create_region(current_user):
         cursor.execute('INSERT INTO regions (name) VALUES (%s)', (region_name,))
         region_id = cursor.lastrowid
         conn.commit()
+        conn.on_commit(camera_registry.invalidate)
         
         return jsonify({
             'success': True,
@@ -177,11 +173,6 @@ def create_region(current_user):
     except Exception as e:
         logger.error(f"Unexpected error while creating region: {e}")
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @areas_bp.route('/regions/<int:region_id>', methods=['PUT'])
 @token_required
@@ -194,7 +185,7 @@ def update_region(current_user, region_id):
         if not region_name:
             return jsonify({'success': False, 'error': 'Region name is required'}), 400
         
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if region exists
@@ -210,6 +201,7 @@ def update_region(current_user, region_id):
         # Update region
         cursor.execute('UPDATE regions SET name = %s WHERE id = %s', (region_name, region_id))
         conn.commit()
+        conn.on_commit(camera_registry.invalidate)
         
         return jsonify({
             'success': True,
@@ -222,18 +214,13 @@ def update_region(current_user, region_id):
     except Exception as e:
         logger.error(f"Unexpected error while updating region: {e}")
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @areas_bp.route('/regions/<int:region_id>', methods=['DELETE'])
 @token_required
 def delete_region(current_user, region_id):
     """Delete a region and all its sub-regions"""
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
         
         # Check if region exists
@@ -262,6 +249,7 @@ def delete_region(current_user, region_id):
         # Delete region (will cascade delete sub-regions due to FK constraint)
         cursor.execute('DELETE FROM regions WHERE id = %s', (region_id,))
         conn.commit()
+        conn.on_commit(camera_registry.invalidate)
         
         return jsonify({
             'success': True,
@@ -276,11 +264,6 @@ def delete_region(current_user, region_id):
         conn.rollback()
         logger.error(f"Unexpected error while deleting region: {e}")
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @areas_bp.route('/sub-regions', methods=['POST'])
 @token_required
@@ -297,7 +280,7 @@ def create_sub_region(current_user):
         if not region_id:
             return jsonify({'success': False, 'error': 'Region ID is required'}), 400
         
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if region exists
@@ -314,6 +297,7 @@ def create_sub_region(current_user):
         cursor.execute('INSERT INTO sub_regions (name, region_id) VALUES (%s, %s)', (sub_region_name, region_id))
         sub_region_id = cursor.lastrowid
         conn.commit()
+        conn.on_commit(camera_registry.invalidate)
         
         return jsonify({
             'success': True,
@@ -331,11 +315,6 @@ def create_sub_region(current_user):
     except Exception as e:
         logger.error(f"Unexpected error while creating sub-region: {e}")
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @areas_bp.route('/sub-regions/<int:sub_region_id>', methods=['PUT'])
 @token_required
@@ -348,7 +327,7 @@ def update_sub_region(current_user, sub_region_id):
         if not sub_region_name:
             return jsonify({'success': False, 'error': 'Sub-region name is required'}), 400
         
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
         
         # Check if sub-region exists and get its region_id
@@ -370,6 +349,7 @@ def update_sub_region(current_user, sub_region_id):
         # Update sub-region
         cursor.execute('UPDATE sub_regions SET name = %s WHERE id = %s', (sub_region_name, sub_region_id))
         conn.commit()
+        conn.on_commit(camera_registry.invalidate)
         
         return jsonify({
             'success': True,
@@ -382,18 +362,13 @@ def update_sub_region(current_user, sub_region_id):
     except Exception as e:
         logger.error(f"Unexpected error while updating sub-region: {e}")
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @areas_bp.route('/sub-regions/<int:sub_region_id>', methods=['DELETE'])
 @token_required
 def delete_sub_region(current_user, sub_region_id):
     """Delete a sub-region"""
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
         
         # Check if sub-region exists
@@ -417,6 +392,7 @@ def delete_sub_region(current_user, sub_region_id):
         # Delete sub-region
         cursor.execute('DELETE FROM sub_regions WHERE id = %s', (sub_region_id,))
         conn.commit()
+        conn.on_commit(camera_registry.invalidate)
         
         return jsonify({
             'success': True,
@@ -431,18 +407,13 @@ def delete_sub_region(current_user, sub_region_id):
         conn.rollback()
         logger.error(f"Unexpected error while deleting sub-region: {e}")
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @areas_bp.route('/regions-list', methods=['GET'])
 @token_required
 def get_regions_list(current_user):
     """Get a simple list of all regions and their sub-regions for dropdown selection"""
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         # Get all regions
@@ -475,9 +446,4 @@ def get_regions_list(current_user):
         return jsonify({'success': False, 'error': f'Database error: {str(e)}'}), 500
     except Exception as e:
         logger.error(f"Unexpected error while fetching regions list: {e}")
-        return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close() 
\ No newline at end of file
+        return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500 
\ No newline at end of file
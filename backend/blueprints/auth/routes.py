@@ -3,8 +3,8 @@ import jwt
 import bcrypt
 from datetime import datetime, timedelta
 import logging
-from backend.utils import get_db_connection
 from mysql.connector import Error
+from backend.db_session import get_db, register_blueprint_session
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 auth_bp = Blueprint('auth', __name__, url_prefix='/api')
 
+# Release each request's database session when the request ends
+auth_bp.record_once(register_blueprint_session)
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
@@ -21,11 +24,9 @@ def login():
     if not email or not password:
         return jsonify({'error': 'Email and password are required'}), 400
 
-    conn = None
-    cursor = None
     try:
         # Attempt to connect to the database
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True, buffered=True)
         
         # Query user from database
@@ -79,8 +80,3 @@ def login():
     except Exception as e:
         logger.error(f"Unexpected error during login: {e}")
         return jsonify({'error': 'An unexpected error occurred'}), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close() 
\ No newline at end of file
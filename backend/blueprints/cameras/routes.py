@@ -1,10 +1,15 @@
 from flask import Blueprint, request, jsonify, current_app
 import json
 import logging
+import math
 from datetime import datetime
 from mysql.connector import Error
-from backend.utils import get_db_connection, token_required
-import cv2
+from backend.utils import token_required
+from backend.camera_registry import camera_registry
+from backend.db_session import get_db, register_blueprint_session
+from backend.pagination import (
+    decode_cursor, keyset_page, list_counts, list_total, parse_count_mode, parse_page_size, total_pages
+)
 import time
 
 # Configure logging
@@ -13,17 +18,59 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 cameras_bp = Blueprint('cameras', __name__, url_prefix='/api')
 
+# Release each request's database session when the request ends
+cameras_bp.record_once(register_blueprint_session)
+
+# Cameras per page when the request doesn't ask for a size
+CAMERAS_PAGE_SIZE = 10
+
+# Cameras are listed newest first by (created_at, id); page tokens hold that pair
+CAMERA_CURSOR_TYPES = (datetime.fromisoformat, int)
+
+
+def parse_inference_fps(value):
+    """
+    Turn a requested inference rate into a float, or None for the default
+    rate when it is null or empty. Raises ValueError unless it is a finite
+    number above 0.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid inference_fps: {value}")
+    try:
+        fps = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid inference_fps: {value}")
+    if not math.isfinite(fps) or fps <= 0:
+        raise ValueError(f"Invalid inference_fps: {value} (expected a number above 0, or null for the default)")
+    return fps
+
+
+def invalidate_camera_caches():
+    """Drop the camera registry and camera list counts once a camera write commits"""
+    camera_registry.invalidate()
+    list_counts.invalidate('cameras')
+
 @cameras_bp.route('/cameras', methods=['GET'])
 @token_required
 def get_cameras(current_user):
-    """Get a list of cameras with pagination"""
+    """
+    Get a page of cameras, newest first. The response's next token (None on
+    the last page) is passed back as cursor for the page after it.
+    """
     try:
-        page = int(request.args.get('page', 1))
-        per_page = 10
-        offset = (page - 1) * per_page
         status_filter = request.args.get('status', None)  # Optional status filter
-
-        conn = get_db_connection()
+        try:
+            page_size = parse_page_size(request.args, default=CAMERAS_PAGE_SIZE)
+            count_mode = parse_count_mode(request.args)
+            cursor_token = request.args.get('cursor')
+            if cursor_token:
+                after = decode_cursor(cursor_token, CAMERA_CURSOR_TYPES)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         # Build the base query and the WHERE clause
@@ -39,33 +86,43 @@ def get_cameras(current_user):
                 c.description, 
                 c.access_level,
                 c.status,
+                c.inference_fps,
                 c.created_at
             FROM cameras c
             LEFT JOIN regions r ON c.region = r.id
             LEFT JOIN sub_regions sr ON c.sub_region = sr.id
         '''
         
-        where_clause = ''
+        where_clauses = []
         params = []
         
         if status_filter:
-            where_clause = 'WHERE c.status = %s'
+            where_clauses.append('c.status = %s')
             params.append(status_filter)
         
-        # Get total count of cameras (with filter if applied)
-        count_query = f'SELECT COUNT(*) as total FROM cameras c {where_clause}'
-        cursor.execute(count_query, params)
-        result = cursor.fetchone()
-        total_cameras = result['total'] if result else 0
-        total_pages = (total_cameras + per_page - 1) // per_page if total_cameras > 0 else 1
-
-        # Get paginated cameras with region and sub-region names (with filter if applied)
-        query = f'{base_query} {where_clause} ORDER BY c.created_at DESC LIMIT %s OFFSET %s'
-        params.extend([per_page, offset])
+        # Total number of cameras (with filter if applied), counted once per LIST_COUNT_CACHE_SECONDS
+        where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ''
+        filters = (('status', status_filter),) if status_filter else ()
+        total_cameras = list_total(
+            cursor, count_mode, 'cameras', filters,
+            f'SELECT COUNT(*) as total FROM cameras c {where_clause}', list(params)
+        )
+
+        if cursor_token:
+            # Cameras after the previous page's last one, read from the created_at indexes
+            where_clauses.append('(c.created_at < %s OR (c.created_at = %s AND c.id < %s))')
+            params.extend([after[0], after[0], after[1]])
+            where_clause = f"WHERE {' AND '.join(where_clauses)}"
+
+        # Get a page of cameras with region and sub-region names, and one more to tell whether there is another page
+        query = f'{base_query} {where_clause} ORDER BY c.created_at DESC, c.id DESC LIMIT %s'
+        params.append(page_size + 1)
         
         cursor.execute(query, params)
         
-        cameras = cursor.fetchall()
+        cameras, next_token = keyset_page(
+            cursor.fetchall(), page_size, lambda camera: (camera['created_at'], camera['id'])
+        )
 
         # Format the response
         for camera in cameras:
@@ -74,8 +131,9 @@ def get_cameras(current_user):
 
         return jsonify({
             'cameras': cameras,
-            'total_pages': total_pages,
-            'current_page': page
+            'next': next_token,
+            'total': total_cameras,
+            'total_pages': total_pages(total_cameras, page_size)
         })
 
     except Error as e:
@@ -84,18 +142,13 @@ def get_cameras(current_user):
     except Exception as e:
         logger.error(f"Unexpected error while fetching cameras: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @cameras_bp.route('/cameras/<int:camera_id>', methods=['GET'])
 @token_required
 def get_camera(current_user, camera_id):
     """Get details of a specific camera"""
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute('''
@@ -110,6 +163,7 @@ def get_camera(current_user, camera_id):
                 c.description, 
                 c.access_level,
                 c.status,
+                c.inference_fps,
                 c.created_at
             FROM cameras c
             LEFT JOIN regions r ON c.region = r.id
@@ -134,11 +188,6 @@ def get_camera(current_user, camera_id):
     except Exception as e:
         logger.error(f"Unexpected error while fetching camera: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @cameras_bp.route('/cameras', methods=['POST'])
 @token_required
@@ -168,10 +217,14 @@ def create_camera(current_user):
         description = data.get('description')
         access_level = data.get('access_level')
         status = data.get('status', 'Active')  # Default to Active
+        try:
+            inference_fps = parse_inference_fps(data.get('inference_fps'))  # None uses the default inference rate
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         logger.debug(f"Processed camera data: name={name}, region={region}, status={status}")
 
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
 
         # Insert new camera
@@ -184,9 +237,10 @@ def create_camera(current_user):
                 description, 
                 access_level, 
                 status, 
+                inference_fps,
                 created_at
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         '''
         values = (
             name,
@@ -196,6 +250,7 @@ def create_camera(current_user):
             description,
             access_level,
             status,
+            inference_fps,
             datetime.now()
         )
         
@@ -207,6 +262,7 @@ def create_camera(current_user):
         logger.debug(f"New camera created with ID: {new_camera_id}")
         
         conn.commit()
+        conn.on_commit(invalidate_camera_caches)
         logger.info(f"Camera added successfully: ID={new_camera_id}, Name={name}")
 
         return jsonify({
@@ -223,11 +279,6 @@ def create_camera(current_user):
         import traceback
         logger.error(traceback.format_exc())
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @cameras_bp.route('/cameras/<int:camera_id>', methods=['PUT'])
 @token_required
@@ -240,7 +291,13 @@ def update_camera(current_user, camera_id):
         if not data:
             return jsonify({'error': 'No update data provided'}), 400
 
-        conn = get_db_connection()
+        if 'inference_fps' in data:
+            try:
+                data['inference_fps'] = parse_inference_fps(data['inference_fps'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         # Check if camera exists
@@ -260,7 +317,8 @@ def update_camera(current_user, camera_id):
             'sub_region': 'sub_region',
             'description': 'description',
             'access_level': 'access_level',
-            'status': 'status'
+            'status': 'status',
+            'inference_fps': 'inference_fps'
         }
 
         for client_field, db_field in updatable_fields.items():
@@ -282,6 +340,7 @@ def update_camera(current_user, camera_id):
         ''', tuple(values))
 
         conn.commit()
+        conn.on_commit(invalidate_camera_caches)
 
         return jsonify({'message': 'Camera updated successfully'})
 
@@ -291,18 +350,13 @@ def update_camera(current_user, camera_id):
     except Exception as e:
         logger.error(f"Unexpected error while updating camera: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @cameras_bp.route('/cameras/<int:camera_id>', methods=['DELETE'])
 @token_required
 def delete_camera(current_user, camera_id):
     """Delete a camera"""
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
         
         # Check if camera exists
@@ -313,6 +367,7 @@ def delete_camera(current_user, camera_id):
         # Delete the camera
         cursor.execute('DELETE FROM cameras WHERE id = %s', (camera_id,))
         conn.commit()
+        conn.on_commit(invalidate_camera_caches)
         
         return jsonify({'message': 'Camera deleted successfully'})
         
@@ -322,11 +377,6 @@ def delete_camera(current_user, camera_id):
     except Exception as e:
         logger.error(f"Unexpected error while deleting camera: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @cameras_bp.route('/cameras/<int:camera_id>/status', methods=['PUT'])
 @token_required
@@ -344,7 +394,7 @@ def update_camera_status(current_user, camera_id):
         if status not in ['Active', 'Inactive']:
             return jsonify({'error': 'Status must be either Active or Inactive'}), 400
 
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         # Check if camera exists
@@ -360,6 +410,7 @@ def update_camera_status(current_user, camera_id):
         ''', (status, camera_id))
 
         conn.commit()
+        conn.on_commit(invalidate_camera_caches)
 
         return jsonify({'message': f'Camera status updated to {status}'})
 
@@ -369,11 +420,6 @@ def update_camera_status(current_user, camera_id):
     except Exception as e:
         logger.error(f"Unexpected error while updating camera status: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @cameras_bp.route('/AddCamera', methods=['POST'])
 @token_required
@@ -395,6 +441,9 @@ def validate_camera_url(current_user):
         url = data['url']
         logger.info(f"Validating camera URL: {url}")
         
+        # Imported here so API-only processes don't load OpenCV
+        import cv2
+        
         # Try to open the video capture
         cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
         
@@ -0,0 +1,247 @@
+import logging
+import os
+import threading
+import time
+
+from . import testing_script
+from .detection_overlay import DisplayPacer
+from .pipeline_stats import get_camera_stats
+from .rate_control import rate_controller
+from .stream_profile import DEFAULT_PROFILE, encode_frame, multipart_chunk
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds a worker keeps running after its last viewer disconnects
+IDLE_GRACE_SECONDS = float(os.getenv('STREAM_IDLE_GRACE_SECONDS', '10'))
+
+# Set to 0 when detection_service.py runs the inference, so web workers only stream
+STREAM_INFERENCE = os.getenv('STREAM_INFERENCE', '1') == '1'
+
+# Seconds a viewer waits for a new frame before checking the worker again
+FRAME_WAIT_TIMEOUT = 1.0
+
+# Running workers keyed by camera id
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+class CameraWorker:
+    """
+    Decode and run inference for one camera once, and fan the frames out to
+    every viewer subscribed to it. Each frame is encoded at most once per
+    distinct width/quality that viewers asked for.
+    """
+
+    def __init__(self, camera_id, video_path, inference_fps=None, idle_grace=None):
+        self.camera_id = camera_id
+        self.video_path = video_path
+        self.inference_fps = inference_fps
+        self.idle_grace = IDLE_GRACE_SECONDS if idle_grace is None else idle_grace
+
+        self.stats = get_camera_stats(camera_id)
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._subscribers = 0
+        # Viewer count and latest encoded chunk for each (width, quality)
+        self._profile_subscribers = {}
+        self._encoded = {}
+        self._encode_locks = {}
+        self._idle_since = time.monotonic()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"camera-worker-{camera_id}",
+            daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    @property
+    def stopped(self):
+        with self._cond:
+            return self._stopped
+
+    @property
+    def subscriber_count(self):
+        with self._cond:
+            return self._subscribers
+
+    def add_subscriber(self, profile=DEFAULT_PROFILE):
+        with self._cond:
+            self._subscribers += 1
+            key = (profile.width, profile.quality)
+            self._profile_subscribers[key] = self._profile_subscribers.get(key, 0) + 1
+
+    def remove_subscriber(self, profile=DEFAULT_PROFILE):
+        with self._cond:
+            self._subscribers -= 1
+            if self._subscribers == 0:
+                self._idle_since = time.monotonic()
+            key = (profile.width, profile.quality)
+            self._profile_subscribers[key] -= 1
+            if self._profile_subscribers[key] == 0:
+                # Nobody watches this encoding any more, so don't keep its last chunk around
+                del self._profile_subscribers[key]
+                self._encoded.pop(key, None)
+
+    def wait_for_frame(self, last_seq):
+        """
+        Block until a frame newer than last_seq is published.
+        Returns (frame, captured_at, seq), or (None, None, last_seq) once the worker has stopped.
+        """
+        with self._cond:
+            while self._seq == last_seq:
+                if self._stopped:
+                    return None, None, last_seq
+                self._cond.wait(timeout=FRAME_WAIT_TIMEOUT)
+            frame, captured_at = self._frame
+            return frame, captured_at, self._seq
+
+    def latest_frame(self):
+        """Get the newest published (frame, captured_at, seq) without waiting, or None before the first frame"""
+        with self._cond:
+            if self._frame is None:
+                return None
+            frame, captured_at = self._frame
+            return frame, captured_at, self._seq
+
+    def get_chunk(self, seq, frame, captured_at, profile=DEFAULT_PROFILE):
+        """
+        Get the multipart chunk of a frame for a profile, encoding it only if no
+        viewer has yet. Returns (seq, chunk); seq is newer than asked for when
+        another viewer has already encoded a later frame.
+        """
+        key = (profile.width, profile.quality)
+        with self._cond:
+            encode_lock = self._encode_locks.setdefault(key, threading.Lock())
+
+        # Viewers of the same profile wait for one encode instead of each doing their own
+        with encode_lock:
+            encoded = self._encoded.get(key)
+            if encoded is not None and encoded[0] >= seq:
+                self.stats.increment('encode_cache_hits')
+                return encoded
+
+            chunk = multipart_chunk(encode_frame(frame, profile.width, profile.quality))
+            self.stats.increment('frames_encoded')
+            self.stats.observe('capture_to_display', time.monotonic() - captured_at)
+
+            with self._cond:
+                if key in self._profile_subscribers:
+                    self._encoded[key] = (seq, chunk)
+            return seq, chunk
+
+    def _publish(self, frame, captured_at):
+        with self._cond:
+            self._frame = (frame, captured_at)
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _is_idle(self):
+        with self._cond:
+            return self._subscribers == 0 and time.monotonic() - self._idle_since > self.idle_grace
+
+    def _run(self):
+        logger.info(f"Starting worker for camera {self.camera_id}")
+        frames = None
+        try:
+            frames = testing_script.process_video(
+                self.video_path,
+                self.camera_id,
+                run_inference=STREAM_INFERENCE,
+                inference_fps=self.inference_fps
+            )
+            for frame, captured_at in frames:
+                self._publish(frame, captured_at)
+                if self._is_idle() and _retire(self):
+                    logger.info(f"No viewers for camera {self.camera_id} after {self.idle_grace}s, stopping worker")
+                    break
+        except Exception as e:
+            logger.error(f"Error in worker for camera {self.camera_id}: {str(e)}")
+        finally:
+            if frames is not None:
+                frames.close()
+            _retire(self, force=True)
+            with self._cond:
+                self._stopped = True
+                self._cond.notify_all()
+            logger.info(f"Worker for camera {self.camera_id} stopped")
+
+
+class Subscription:
+    """Iterator over one worker's multipart chunks, held by a single viewer"""
+
+    def __init__(self, worker, profile=DEFAULT_PROFILE):
+        self._worker = worker
+        self._profile = profile
+        self._pacer = DisplayPacer(profile.fps) if profile.fps else None
+        self._last_seq = 0
+        self._closed = False
+        # Capture time (time.monotonic()) of the frame in the last returned chunk
+        self.last_captured_at = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self._closed:
+            frame, captured_at, self._last_seq = self._worker.wait_for_frame(self._last_seq)
+            if frame is None:
+                self.close()
+                break
+            # Viewers asking for fewer frames per second skip the ones in between
+            if self._pacer and not self._pacer.is_due():
+                continue
+            self._last_seq, chunk = self._worker.get_chunk(self._last_seq, frame, captured_at, self._profile)
+            self.last_captured_at = captured_at
+            return chunk
+        raise StopIteration
+
+    def close(self):
+        """Called by the WSGI server when the viewer disconnects"""
+        if not self._closed:
+            self._closed = True
+            self._worker.remove_subscriber(self._profile)
+
+
+def _retire(worker, force=False):
+    """
+    Remove a worker from the registry. Unless forced, this only happens while
+    it still has no subscribers, so a viewer joining concurrently keeps it alive.
+    """
+    with _workers_lock:
+        if not force and not worker._is_idle():
+            return False
+        if _workers.get(worker.camera_id) is worker:
+            del _workers[worker.camera_id]
+        return True
+
+
+def get_worker(camera_id):
+    """Get the camera's running worker without starting one, or None"""
+    with _workers_lock:
+        worker = _workers.get(camera_id)
+    return worker if worker is not None and not worker.stopped else None
+
+
+def subscribe(camera_id, video_path, inference_fps=None, profile=DEFAULT_PROFILE):
+    """Attach a viewer to the camera's shared worker, starting it if needed"""
+    with _workers_lock:
+        worker = _workers.get(camera_id)
+        if worker is not None and (worker.stopped or worker.video_path != video_path):
+            worker = None
+        if worker is None:
+            worker = CameraWorker(camera_id, video_path, inference_fps=inference_fps)
+            _workers[camera_id] = worker
+            worker.start()
+        elif worker.inference_fps != inference_fps:
+            worker.inference_fps = inference_fps
+            rate_controller.set_target(camera_id, inference_fps)
+        # Count the viewer before releasing the lock so an idle worker cannot retire under it
+        worker.add_subscriber(profile)
+    return Subscription(worker, profile)
+
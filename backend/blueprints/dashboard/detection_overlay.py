@@ -0,0 +1,93 @@
+import logging
+import os
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Set to 0 to stream only the frames that went through the model, as before
+STREAM_REUSE_BOXES = os.getenv('STREAM_REUSE_BOXES', '1') == '1'
+
+# Frames per second sent to viewers when reusing boxes (0 sends every decoded frame)
+STREAM_DISPLAY_FPS = float(os.getenv('STREAM_DISPLAY_FPS', '15'))
+
+
+class DetectionOverlay:
+    """
+    Run inference for one camera on a background thread and keep its latest
+    detections, so the stream can draw them on every frame while the model
+    only sees the frames the rate controller lets through
+    """
+
+    def __init__(self, analyse, camera_id):
+        # analyse takes (frame, camera_id) and returns the detections to draw
+        self.analyse = analyse
+        self.camera_id = camera_id
+
+        self._lock = threading.Lock()
+        self._detections = []
+        self._updated_at = None
+        self._busy = False
+
+    @property
+    def busy(self):
+        """Whether a frame is still being analysed"""
+        with self._lock:
+            return self._busy
+
+    def submit(self, frame):
+        """
+        Start analysing a frame unless the previous one is still running.
+        Returns whether the frame was accepted.
+        """
+        with self._lock:
+            if self._busy:
+                return False
+            self._busy = True
+        threading.Thread(
+            target=self._analyse,
+            args=(frame,),
+            name=f"detection-overlay-{self.camera_id}",
+            daemon=True
+        ).start()
+        return True
+
+    def _analyse(self, frame):
+        detections = None
+        try:
+            detections = self.analyse(frame, self.camera_id)
+        except Exception as e:
+            logger.error(f"Error analysing frame for camera {self.camera_id}: {str(e)}")
+        finally:
+            with self._lock:
+                if detections is not None:
+                    self._detections = detections
+                    self._updated_at = time.monotonic()
+                self._busy = False
+
+    def latest(self):
+        """Get the most recent detections and when they were produced (monotonic time)"""
+        with self._lock:
+            return list(self._detections), self._updated_at
+
+
+class DisplayPacer:
+    """Let frames through to viewers at no more than fps per second (0 lets every frame through)"""
+
+    def __init__(self, fps=STREAM_DISPLAY_FPS):
+        self.interval = 1.0 / fps if fps > 0 else 0
+        self._next_due = 0.0
+
+    def is_due(self, now=None):
+        if not self.interval:
+            return True
+        now = time.monotonic() if now is None else now
+        if now < self._next_due:
+            return False
+        # Hold the rate from the previous slot, unless we have fallen a whole interval behind
+        if now - self._next_due < self.interval:
+            self._next_due += self.interval
+        else:
+            self._next_due = now + self.interval
+        return True
@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds a consumer waits for a new frame before checking the reader again
+FRAME_WAIT_TIMEOUT = 1.0
+
+
+class FrameGrabber:
+    """
+    Drain a frame source on a dedicated thread and keep only the newest frame,
+    so a slow consumer always sees the current scene instead of a backlog
+    """
+
+    def __init__(self, frames, camera_id, stats=None, frame_interval=0):
+        # frames yields (frame, captured_at) tuples, e.g. testing_script.read_frames
+        self.frames = frames
+        self.camera_id = camera_id
+        self.stats = stats
+        # Local files are read at their own frame rate instead of as fast as they decode
+        self.frame_interval = frame_interval
+
+        self._cond = threading.Condition()
+        self._latest = None
+        self._seq = 0
+        self._consumed_seq = 0
+        self._ended = False
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"frame-grabber-{camera_id}",
+            daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Ask the reader to finish; it releases the capture on its own thread"""
+        self._stop_event.set()
+
+    def _run(self):
+        next_read = time.monotonic()
+        try:
+            for item in self.frames:
+                with self._cond:
+                    # The previous frame was never picked up, so it is dropped
+                    if self._seq > self._consumed_seq and self.stats:
+                        self.stats.increment('frames_dropped')
+                    self._latest = item
+                    self._seq += 1
+                    self._cond.notify_all()
+
+                if self._stop_event.is_set():
+                    break
+
+                if self.frame_interval:
+                    next_read += self.frame_interval
+                    delay = next_read - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_read = time.monotonic()
+        except Exception as e:
+            logger.error(f"Error reading frames for camera {self.camera_id}: {str(e)}")
+        finally:
+            self.frames.close()
+            with self._cond:
+                self._ended = True
+                self._cond.notify_all()
+
+    def read(self):
+        """
+        Block until a frame newer than the last one read is available.
+        Returns (frame, captured_at), or None once the source has ended.
+        """
+        with self._cond:
+            while self._seq == self._consumed_seq:
+                if self._ended or self._stop_event.is_set():
+                    return None
+                self._cond.wait(timeout=FRAME_WAIT_TIMEOUT)
+            self._consumed_seq = self._seq
+            return self._latest
+
+
+def grab_latest_frames(frames, camera_id, stats=None, frame_interval=0):
+    """Yield only the newest (frame, captured_at) from frames, dropping any backlog"""
+    grabber = FrameGrabber(frames, camera_id, stats=stats, frame_interval=frame_interval)
+    grabber.start()
+    try:
+        while True:
+            item = grabber.read()
+            if item is None:
+                break
+            yield item
+    finally:
+        grabber.stop()
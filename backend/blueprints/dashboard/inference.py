@@ -0,0 +1,241 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import cv2
+from backend.inference_worker import extract_detections, init_worker, predict_frames
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Frames are shrunk to this longest side before being sent to worker processes;
+# the model resizes to its 640px input anyway, so this only saves copying
+WORKER_FRAME_SIZE = int(os.getenv('INFERENCE_WORKER_FRAME_SIZE', '640'))
+
+# Seconds warm_up() waits for every worker process to load its model
+WORKER_START_TIMEOUT_SECONDS = float(os.getenv('INFERENCE_WORKER_START_TIMEOUT_SECONDS', '120'))
+# Seconds a batch may take in a worker process before it counts as failed
+WORKER_BATCH_TIMEOUT_SECONDS = float(os.getenv('INFERENCE_WORKER_BATCH_TIMEOUT_SECONDS', '30'))
+
+
+class LocalBackend:
+    """Run the model inside this process"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_batch(self, frames):
+        """Run the model on a list of frames and return the detections for each"""
+        results = self.model.predict(source=frames, save=False)
+        return [extract_detections(result, self.model.names) for result in results]
+
+    def get_stats(self):
+        return {'backend': 'local'}
+
+
+class ProcessPoolBackend:
+    """
+    Run the model in a pool of worker processes, each loading it once, so
+    pre/post-processing of different cameras does not contend for the GIL.
+    Every worker is started with the pool and loads and warms up its model
+    in the pool's initializer, so no batch lands on a cold worker.
+    """
+
+    def __init__(self, model_path, workers):
+        self.workers = workers
+        # Spawn rather than fork, so workers don't inherit the web server's threads
+        context = multiprocessing.get_context('spawn')
+        # Each worker reports (pid, error or None) here once its initializer is done
+        self._ready = context.Queue()
+        self._pool = context.Pool(
+            processes=workers,
+            initializer=init_worker,
+            initargs=(model_path, self._ready)
+        )
+        self._stats_lock = threading.Lock()
+        self._worker_stats = {}
+        self._timeouts = 0
+
+    def predict_batch(self, frames):
+        """
+        Run the model on a list of frames in one worker and return the detections for each.
+        Raises TimeoutError when the worker takes longer than WORKER_BATCH_TIMEOUT_SECONDS.
+        """
+        shrunk = [self._shrink(frame) for frame in frames]
+        result = self._pool.apply_async(predict_frames, ([frame for frame, _ in shrunk],))
+        try:
+            pid, detections, elapsed = result.get(timeout=WORKER_BATCH_TIMEOUT_SECONDS)
+        except multiprocessing.TimeoutError:
+            # The worker hung or died; give up on this batch rather than block the cameras waiting on it
+            with self._stats_lock:
+                self._timeouts += 1
+            raise TimeoutError(f"Inference worker gave no result within {WORKER_BATCH_TIMEOUT_SECONDS}s")
+
+        # Map boxes back onto the full-size frames
+        for frame_detections, (_, scale) in zip(detections, shrunk):
+            if scale != 1.0:
+                for detection in frame_detections:
+                    detection['box'] = [value / scale for value in detection['box']]
+
+        self._record(pid, len(frames), elapsed)
+        return detections
+
+    def warm_up(self, timeout=WORKER_START_TIMEOUT_SECONDS):
+        """
+        Wait until every worker process has loaded and warmed up its model.
+        Returns how many workers are ready.
+        """
+        deadline = time.monotonic() + timeout
+        ready = 0
+        for _ in range(self.workers):
+            try:
+                pid, error = self._ready.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                logger.warning(f"Inference workers still loading after {timeout}s")
+                break
+            if error is None:
+                ready += 1
+            else:
+                logger.error(f"Inference worker {pid} failed to load the model: {error}")
+        logger.info(f"Warmed up {ready} of {self.workers} inference worker process(es)")
+        return ready
+
+    def close(self):
+        """Stop the worker processes"""
+        self._pool.terminate()
+
+    @staticmethod
+    def _shrink(frame):
+        height, width = frame.shape[:2]
+        scale = min(1.0, WORKER_FRAME_SIZE / max(height, width))
+        if scale < 1.0:
+            frame = cv2.resize(frame, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+        return frame, scale
+
+    def _record(self, pid, frames, elapsed):
+        with self._stats_lock:
+            stats = self._worker_stats.setdefault(pid, {'calls': 0, 'frames': 0, 'busy_seconds': 0.0})
+            stats['calls'] += 1
+            stats['frames'] += frames
+            stats['busy_seconds'] += elapsed
+
+    def get_stats(self):
+        """Get the throughput of each worker process"""
+        with self._stats_lock:
+            per_worker = {
+                pid: {
+                    'calls': stats['calls'],
+                    'frames': stats['frames'],
+                    'avg_latency_ms': round(stats['busy_seconds'] / stats['calls'] * 1000, 1),
+                    'throughput_fps': round(stats['frames'] / stats['busy_seconds'], 2) if stats['busy_seconds'] else None
+                }
+                for pid, stats in self._worker_stats.items()
+            }
+            timeouts = self._timeouts
+        return {'backend': 'process', 'workers': self.workers, 'timeouts': timeouts, 'per_worker': per_worker}
+
+
+class InferenceScheduler:
+    """
+    Collect frames submitted by many cameras and run them through the model as
+    one batch, once the batch is full or the oldest frame has waited max_wait seconds
+    """
+
+    def __init__(self, predict_batch, max_batch_size=8, max_wait=0.05):
+        # predict_batch takes a list of frames and returns one result per frame
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._frames = 0
+        self._last_batch_size = 0
+        self._max_batch_size_seen = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._batch_latency_total = 0.0
+        self._last_batch_latency = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, camera_id, frame):
+        """Queue a frame for the next batch and return a Future for its result"""
+        future = Future()
+        self._queue.put((camera_id, frame, future, time.monotonic()))
+        return future
+
+    def predict(self, camera_id, frame):
+        """Run a single frame through the next batch and wait for its result"""
+        return self.submit(camera_id, frame).result()
+
+    def _collect_batch(self):
+        # Block until there is work, then fill the batch until it is full or the deadline passes
+        batch = [self._queue.get()]
+        deadline = batch[0][3] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.monotonic()
+            frames = [frame for _, frame, _, _ in batch]
+
+            try:
+                results = self.predict_batch(frames)
+            except Exception as e:
+                logger.error(f"Batched inference failed for {len(batch)} frame(s): {str(e)}")
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            finished = time.monotonic()
+            for (_, _, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+            self._record_batch(batch, started, finished)
+
+    def _record_batch(self, batch, started, finished):
+        waits = [started - enqueued for _, _, _, enqueued in batch]
+        with self._stats_lock:
+            self._batches += 1
+            self._frames += len(batch)
+            self._last_batch_size = len(batch)
+            self._max_batch_size_seen = max(self._max_batch_size_seen, len(batch))
+            self._queue_wait_total += sum(waits)
+            self._queue_wait_max = max(self._queue_wait_max, max(waits))
+            self._batch_latency_total += finished - started
+            self._last_batch_latency = finished - started
+
+    def get_stats(self):
+        """Get batch size, queue wait and per-batch latency figures"""
+        with self._stats_lock:
+            batches = self._batches or 1
+            frames = self._frames or 1
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': round(self.max_wait * 1000, 1),
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'frames': self._frames,
+                'avg_batch_size': round(self._frames / batches, 2),
+                'last_batch_size': self._last_batch_size,
+                'largest_batch_size': self._max_batch_size_seen,
+                'avg_queue_wait_ms': round(self._queue_wait_total / frames * 1000, 1),
+                'max_queue_wait_ms': round(self._queue_wait_max * 1000, 1),
+                'avg_batch_latency_ms': round(self._batch_latency_total / batches * 1000, 1),
+                'last_batch_latency_ms': round(self._last_batch_latency * 1000, 1)
+            }
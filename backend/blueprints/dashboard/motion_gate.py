@@ -0,0 +1,73 @@
+import os
+import time
+import cv2
+import numpy as np
+
+# Set to 1 to skip inference on frames where nothing has changed
+MOTION_GATE = os.getenv('MOTION_GATE', '0') == '1'
+
+# Fraction of pixels that must change for a frame to count as motion
+MOTION_THRESHOLD = float(os.getenv('MOTION_THRESHOLD', '0.01'))
+
+# Grey-level difference for a single pixel to count as changed
+MOTION_PIXEL_DELTA = int(os.getenv('MOTION_PIXEL_DELTA', '15'))
+
+# Seconds after which inference is forced even without motion, so slow-growing smoke is still caught
+MOTION_FORCE_INTERVAL_SECONDS = float(os.getenv('MOTION_FORCE_INTERVAL_SECONDS', '30'))
+
+# Size frames are shrunk to before comparing them
+MOTION_FRAME_SIZE = (80, 60)
+
+
+class MotionGate:
+    """
+    Cheap pre-filter in front of the model: compare a small blurred greyscale
+    copy of each frame with the one from the last inference, and only let the
+    frame through when enough of it has changed
+    """
+
+    def __init__(self, stats=None, threshold=MOTION_THRESHOLD, pixel_delta=MOTION_PIXEL_DELTA,
+                 force_interval=MOTION_FORCE_INTERVAL_SECONDS):
+        self.stats = stats
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.force_interval = force_interval
+
+        self._reference = None
+        self._last_inference = 0.0
+        self._checks = 0
+        self._skipped = 0
+
+    def should_infer(self, frame, now=None):
+        """Check whether the frame differs enough from the last analysed one to run the model"""
+        now = time.monotonic() if now is None else now
+        small = cv2.resize(frame, MOTION_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        if self._reference is None or now - self._last_inference >= self.force_interval:
+            infer = True
+        else:
+            changed = np.count_nonzero(cv2.absdiff(small, self._reference) > self.pixel_delta)
+            infer = changed / small.size >= self.threshold
+
+        self._checks += 1
+        if infer:
+            # Compare later frames with this one, so gradual change still adds up
+            self._reference = small
+            self._last_inference = now
+        else:
+            self._skipped += 1
+
+        if self.stats:
+            self.stats.set('motion_checks', self._checks)
+            self.stats.set('motion_skipped', self._skipped)
+            self.stats.set('motion_skip_ratio', round(self._skipped / self._checks, 3))
+
+        return infer
+
+
+def create_motion_gate(stats=None):
+    """Get a motion gate for one camera's loop, or None when gating is disabled"""
+    return MotionGate(stats=stats) if MOTION_GATE else None
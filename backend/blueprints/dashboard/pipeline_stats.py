@@ -0,0 +1,62 @@
+import threading
+
+# Weight of the newest sample in the running latency averages
+EWMA_ALPHA = 0.1
+
+
+class CameraStats:
+    """Thread-safe counters, gauges and latency figures for one camera"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._latencies = {}
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def set(self, name, value):
+        with self._lock:
+            self._values[name] = value
+
+    def observe(self, name, seconds):
+        """Record a latency sample, keeping the last, running average and maximum"""
+        with self._lock:
+            latency = self._latencies.get(name)
+            if latency is None:
+                self._latencies[name] = {'last': seconds, 'avg': seconds, 'max': seconds}
+            else:
+                latency['last'] = seconds
+                latency['avg'] += EWMA_ALPHA * (seconds - latency['avg'])
+                latency['max'] = max(latency['max'], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            result = dict(self._values)
+            for name, latency in self._latencies.items():
+                for key, seconds in latency.items():
+                    result[f"{name}_{key}_ms"] = round(seconds * 1000, 1)
+            return result
+
+
+# Stats keyed by camera id
+_camera_stats = {}
+_camera_stats_lock = threading.Lock()
+
+
+def get_camera_stats(camera_id):
+    """Get the stats object for a camera, creating it on first use"""
+    with _camera_stats_lock:
+        stats = _camera_stats.get(camera_id)
+        if stats is None:
+            stats = CameraStats()
+            _camera_stats[camera_id] = stats
+        return stats
+
+
+def snapshot_camera_stats():
+    """Get a plain dict of every camera's stats"""
+    with _camera_stats_lock:
+        cameras = dict(_camera_stats)
+    return {camera_id: stats.snapshot() for camera_id, stats in cameras.items()}
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+# Inference rate for cameras without their own inference_fps setting
+DEFAULT_INFERENCE_FPS = float(os.getenv('INFERENCE_DEFAULT_FPS', '5'))
+
+# Floor for every camera's rate, so no camera is starved when the budget is tight
+MIN_INFERENCE_FPS = float(os.getenv('INFERENCE_MIN_FPS', '0.5'))
+
+# Seconds of model time per second this process may spend across all cameras
+# (1.0 keeps one inference in flight on average)
+INFERENCE_BUDGET = float(os.getenv('INFERENCE_BUDGET', '1.0'))
+
+# Weight of the newest sample in the running latency average
+LATENCY_ALPHA = 0.2
+
+
+class InferenceRateController:
+    """
+    Decide when each camera may run inference. Every camera asks for a target
+    rate in Hz; when the measured model latency says the targets together would
+    need more model time than the budget, all rates are scaled down evenly.
+    """
+
+    def __init__(self, budget=INFERENCE_BUDGET, default_fps=DEFAULT_INFERENCE_FPS, min_fps=MIN_INFERENCE_FPS):
+        self.budget = budget
+        self.default_fps = default_fps
+        self.min_fps = min_fps
+
+        self._lock = threading.Lock()
+        self._cameras = {}
+        self._scale = 1.0
+
+    def register(self, camera_id, target_fps=None):
+        """Start pacing a camera, or update its target rate"""
+        with self._lock:
+            camera = self._cameras.setdefault(camera_id, {'latency': None, 'next_due': 0.0, 'users': 0})
+            camera['target_fps'] = float(target_fps) if target_fps else self.default_fps
+            camera['users'] += 1
+            self._update_scale()
+
+    def set_target(self, camera_id, target_fps):
+        """Change the target rate of a camera that is already being paced"""
+        with self._lock:
+            camera = self._cameras.get(camera_id)
+            if camera is not None:
+                camera['target_fps'] = float(target_fps) if target_fps else self.default_fps
+                self._update_scale()
+
+    def unregister(self, camera_id):
+        with self._lock:
+            camera = self._cameras.get(camera_id)
+            if camera is None:
+                return
+            camera['users'] -= 1
+            if camera['users'] <= 0:
+                del self._cameras[camera_id]
+                self._update_scale()
+
+    def record_latency(self, camera_id, seconds):
+        """Feed back how long one inference took for the camera"""
+        with self._lock:
+            camera = self._cameras.get(camera_id)
+            if camera is None:
+                return
+            if camera['latency'] is None:
+                camera['latency'] = seconds
+            else:
+                camera['latency'] += LATENCY_ALPHA * (seconds - camera['latency'])
+            self._update_scale()
+
+    def _update_scale(self):
+        # Model time per second the targets would need, from measured latencies
+        demand = sum(
+            camera['target_fps'] * camera['latency']
+            for camera in self._cameras.values()
+            if camera['latency']
+        )
+        self._scale = min(1.0, self.budget / demand) if demand > 0 else 1.0
+
+    def _rate(self, camera):
+        return max(self.min_fps, camera['target_fps'] * self._scale)
+
+    def is_due(self, camera_id, now=None):
+        """Check whether the camera should run inference on the current frame"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            camera = self._cameras.get(camera_id)
+            if camera is None:
+                return True
+            if now < camera['next_due']:
+                return False
+            camera['next_due'] = now + 1.0 / self._rate(camera)
+            return True
+
+    def get_stats(self):
+        """Get each camera's target and effective rate and its measured latency"""
+        with self._lock:
+            return {
+                camera_id: {
+                    'target_fps': camera['target_fps'],
+                    'effective_fps': round(self._rate(camera), 2),
+                    'avg_latency_ms': round(camera['latency'] * 1000, 1) if camera['latency'] else None
+                }
+                for camera_id, camera in self._cameras.items()
+            }
+
+
+# Shared controller for every camera in this process
+rate_controller = InferenceRateController()
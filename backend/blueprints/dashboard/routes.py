@@ -1,19 +1,94 @@
-from flask import Blueprint, Response, jsonify, request
+from flask import Blueprint, jsonify, request
 from flask_cors import cross_origin
 import logging
-from . import testing_script
+from datetime import datetime, timedelta
 from backend.utils import get_db_connection
+from backend.camera_registry import get_camera_feeds
+from backend.pagination import decode_cursor, keyset_page, parse_page_size
 
 # Configure logging
 logger = logging.getLogger(__name__)
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Formats the detections list and PDF have always shown times and dates in
+DETECTION_TIME_FORMAT = '%H:%M:%S'
+DETECTION_DATE_FORMAT = '%d/%m/%y'
+
+# Formats accepted for the date filter: the list's own date format, or ISO
+DATE_FILTER_FORMATS = (DETECTION_DATE_FORMAT, '%Y-%m-%d')
+
+# Detections are listed newest first by (detected_at, id); page tokens hold that pair
+DETECTION_CURSOR_TYPES = (datetime.fromisoformat, int)
+
+
+def parse_date_filter(value):
+    """Turn a date filter into the [start, end) range of detected_at it covers"""
+    for date_format in DATE_FILTER_FORMATS:
+        try:
+            start = datetime.strptime(value, date_format)
+            return start, start + timedelta(days=1)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {value} (expected dd/mm/yy or yyyy-mm-dd)")
+
+
+def build_detection_filters(args):
+    """
+    Build the WHERE clauses and parameters for the detection filters in the
+    query string. Dates become a range on detected_at, so the detected_at
+    indexes can be used. Raises ValueError for an invalid date.
+    """
+    # Rows migrate_detections.py hasn't backfilled yet have no detected_at to list or page them by
+    where_clauses = ["d.detected_at IS NOT NULL"]
+    params = []
+
+    if args.get('region'):
+        where_clauses.append("r.name = %s")
+        params.append(args['region'])
+
+    if args.get('sub_region'):
+        where_clauses.append("sr.name = %s")
+        params.append(args['sub_region'])
+
+    if args.get('camera'):
+        where_clauses.append("c.name = %s")
+        params.append(args['camera'])
+
+    if args.get('alert_type'):
+        where_clauses.append("d.alert_type = %s")
+        params.append(args['alert_type'])
+
+    if args.get('date'):
+        start, end = parse_date_filter(args['date'])
+        where_clauses.append("d.detected_at >= %s AND d.detected_at < %s")
+        params.extend([start, end])
+
+    return where_clauses, params
+
+
+def format_detection_time(detection):
+    """
+    Copy a detection row with the time_stamp and date_created strings the
+    dashboard shows, and detected_at as ISO 8601. The fetched row is left
+    as it is. A row without detected_at gets None for all three.
+    """
+    detected_at = detection['detected_at']
+    if detected_at is None:
+        return dict(detection, time_stamp=None, date_created=None, detected_at=None)
+    return dict(
+        detection,
+        time_stamp=detected_at.strftime(DETECTION_TIME_FORMAT),
+        date_created=detected_at.strftime(DETECTION_DATE_FORMAT),
+        detected_at=detected_at.isoformat(timespec='milliseconds')
+    )
+
+
 @dashboard_bp.route("/api/cameras")
 @cross_origin()
 def cameras():
     """API endpoint to get all active cameras"""
     try:
-        feeds = testing_script.get_camera_feeds()
+        feeds = get_camera_feeds()
         logger.info(f"Returning {len(feeds)} camera feeds")
         return jsonify(feeds)
     except Exception as e:
@@ -22,40 +97,29 @@ def cameras():
             'error': str(e)
         }), 500
 
-@dashboard_bp.route("/video_feed/<int:camera_id>")
-@cross_origin()
-def video_feed(camera_id):
-    """Stream video feed from a specific camera"""
-    try:
-        camera = testing_script.get_camera_by_id(camera_id)
-        
-        if not camera:
-            return "Camera not found", 404
-            
-        # Get the RTSP URL from the camera
-        video_url = camera['rtsp_url']
-        logger.info(f"Streaming from camera {camera_id} with URL: {video_url}")
-        
-        # Process and stream the video feed with camera_id
-        return Response(
-            testing_script.process_video(video_url, camera_id),
-            mimetype='multipart/x-mixed-replace; boundary=frame'
-        )
-    except Exception as e:
-        logger.error(f"Error in video_feed endpoint: {str(e)}")
-        return str(e), 500
-
 @dashboard_bp.route("/api/detections")
 @cross_origin()
 def get_detections():
-    """Get recent detections from the database with optional filters"""
+    """
+    Get a page of detections, newest first, with optional filters. The
+    response's next token (None on the last page) is passed back as cursor
+    to get the page after it.
+    """
     try:
         # Get filter parameters from query string
-        region = request.args.get('region')
-        sub_region = request.args.get('sub_region')
-        camera = request.args.get('camera')
-        alert_type = request.args.get('alert_type')
-        date = request.args.get('date')
+        try:
+            where_clauses, params = build_detection_filters(request.args)
+            page_size = parse_page_size(request.args)
+            cursor_token = request.args.get('cursor')
+            if cursor_token:
+                after = decode_cursor(cursor_token, DETECTION_CURSOR_TYPES)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if cursor_token:
+            # Rows after the previous page's last one; (detected_at, id) is the order of the detected_at indexes
+            where_clauses.append("(d.detected_at < %s OR (d.detected_at = %s AND d.id < %s))")
+            params.extend([after[0], after[0], after[1]])
         
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
@@ -70,52 +134,31 @@ def get_detections():
                 sr.name as sub_region_name,
                 d.alert_type,
                 d.confidence,
-                d.time_stamp,
-                d.date_created
+                d.detected_at
             FROM detections d
             JOIN cameras c ON d.camera_id = c.id
             JOIN regions r ON c.region = r.id
             JOIN sub_regions sr ON c.sub_region = sr.id
         """
         
-        # Build WHERE clause based on filters
-        where_clauses = []
-        params = []
-        
-        if region:
-            where_clauses.append("r.name = %s")
-            params.append(region)
-            
-        if sub_region:
-            where_clauses.append("sr.name = %s")
-            params.append(sub_region)
-            
-        if camera:
-            where_clauses.append("c.name = %s")
-            params.append(camera)
-            
-        if alert_type:
-            where_clauses.append("d.alert_type = %s")
-            params.append(alert_type)
-            
-        if date:
-            where_clauses.append("d.date_created = %s")
-            params.append(date)
-        
-        # Add WHERE clause if any filters are applied
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
+        query += " WHERE " + " AND ".join(where_clauses)
             
-        # Add ordering and limit
-        query += " ORDER BY d.date_created DESC, d.time_stamp DESC LIMIT 100"
+        # One row past the page says whether there is another page
+        query += " ORDER BY d.detected_at DESC, d.id DESC LIMIT %s"
+        params.append(page_size + 1)
         
         cursor.execute(query, params)
-        detections = cursor.fetchall()
+        detections, next_token = keyset_page(
+            cursor.fetchall(), page_size, lambda detection: (detection['detected_at'], detection['id'])
+        )
         
         cursor.close()
         conn.close()
         
-        return jsonify(detections)
+        return jsonify({
+            'detections': [format_detection_time(detection) for detection in detections],
+            'next': next_token
+        })
     except Exception as e:
         logger.error(f"Error fetching detections: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -134,6 +177,10 @@ def download_detection_logs_pdf():
         camera = request.args.get('camera')
         alert_type = request.args.get('alert_type')
         date = request.args.get('date')
+        try:
+            where_clauses, params = build_detection_filters(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Get detections data with filters
         conn = get_db_connection()
@@ -148,48 +195,21 @@ def download_detection_logs_pdf():
                 sr.name as sub_region_name,
                 d.alert_type,
                 d.confidence,
-                d.time_stamp,
-                d.date_created
+                d.detected_at
             FROM detections d
             JOIN cameras c ON d.camera_id = c.id
             JOIN regions r ON c.region = r.id
             JOIN sub_regions sr ON c.sub_region = sr.id
         """
         
-        # Build WHERE clause based on filters
-        where_clauses = []
-        params = []
-        
-        if region:
-            where_clauses.append("r.name = %s")
-            params.append(region)
-            
-        if sub_region:
-            where_clauses.append("sr.name = %s")
-            params.append(sub_region)
-            
-        if camera:
-            where_clauses.append("c.name = %s")
-            params.append(camera)
-            
-        if alert_type:
-            where_clauses.append("d.alert_type = %s")
-            params.append(alert_type)
-            
-        if date:
-            where_clauses.append("d.date_created = %s")
-            params.append(date)
-        
-        # Add WHERE clause if any filters are applied
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
+        query += " WHERE " + " AND ".join(where_clauses)
             
         # Add ordering and limit
-        query += " ORDER BY d.date_created DESC, d.time_stamp DESC LIMIT 100"
+        query += " ORDER BY d.detected_at DESC, d.id DESC LIMIT 100"
         
         logger.info("Executing database query")
         cursor.execute(query, params)
-        detections = cursor.fetchall()
+        detections = [format_detection_time(detection) for detection in cursor.fetchall()]
         logger.info(f"Retrieved {len(detections)} detections from database")
         
         cursor.close()
@@ -241,7 +261,6 @@ def download_detection_logs_pdf():
             pdf.ln(5)
         
         # Add timestamp
-        from datetime import datetime
         pdf.set_font("Helvetica", "", 10)
         pdf.cell(0, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 0, 1)
         pdf.ln(5)
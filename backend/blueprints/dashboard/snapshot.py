@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+import cv2
+from backend.stream_resolver import resolve_stream_url
+from . import camera_worker
+from .pipeline_stats import get_camera_stats
+from .stream_profile import encode_frame
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds a snapshot may spend opening a camera and reading a frame when no worker is streaming it
+SNAPSHOT_GRAB_TIMEOUT_SECONDS = float(os.getenv('SNAPSHOT_GRAB_TIMEOUT_SECONDS', '5'))
+
+# Seconds a grabbed frame is reused, so polling clients don't reopen the camera each time
+SNAPSHOT_GRAB_CACHE_SECONDS = float(os.getenv('SNAPSHOT_GRAB_CACHE_SECONDS', '5'))
+# Seconds a failed grab is remembered, so re-rendering a list of unreachable cameras doesn't retry them all
+SNAPSHOT_GRAB_FAILURE_CACHE_SECONDS = float(os.getenv('SNAPSHOT_GRAB_FAILURE_CACHE_SECONDS', '30'))
+
+# Encoded snapshots kept across all cameras and sizes
+SNAPSHOT_CACHE_ENTRIES = 64
+
+# A JPEG still of a camera. etag is derived from the JPEG bytes, modified_at is
+# the unix time the frame was captured, and source is 'live' for a frame of the
+# running stream worker or 'grab' for one read just for the snapshot
+Snapshot = namedtuple('Snapshot', ['jpeg', 'etag', 'modified_at', 'source'])
+
+# (camera_id, width, quality) -> (frame stamp, Snapshot), least recently used first.
+# Shared by every camera, so it has its own lock rather than the per-camera ones
+_encoded = OrderedDict()
+_encoded_lock = threading.Lock()
+# camera_id -> (grabbed_at, frame or None, unix time of the grab)
+_grabs = {}
+# One lock per camera, so concurrent pollers share one grab and one encode
+_camera_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _camera_lock(camera_id):
+    with _locks_lock:
+        return _camera_locks.setdefault(camera_id, threading.Lock())
+
+
+def grab_frame(video_path, timeout=SNAPSHOT_GRAB_TIMEOUT_SECONDS):
+    """Open a stream, read one frame and release it, giving up after about timeout seconds"""
+    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp'
+    timeout_ms = int(timeout * 1000)
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [
+        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+        cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms
+    ])
+    try:
+        if not cap.isOpened():
+            return None
+        ret, frame = cap.read()
+        return frame if ret else None
+    finally:
+        cap.release()
+
+
+def _encode(key, stamp, frame, modified_at, source):
+    with _encoded_lock:
+        cached = _encoded.get(key)
+        if cached is not None and cached[0] == stamp:
+            _encoded.move_to_end(key)
+            return cached[1]
+
+    # Encoded outside the shared lock; the camera's own lock keeps it to one encode per frame
+    jpeg = encode_frame(frame, key[1], key[2])
+    snapshot = Snapshot(jpeg, hashlib.blake2b(jpeg, digest_size=12).hexdigest(), modified_at, source)
+    with _encoded_lock:
+        _encoded[key] = (stamp, snapshot)
+        _encoded.move_to_end(key)
+        while len(_encoded) > SNAPSHOT_CACHE_ENTRIES:
+            _encoded.popitem(last=False)
+    return snapshot
+
+
+def _grab(camera_id, video_path):
+    grabbed = _grabs.get(camera_id)
+    if grabbed is not None:
+        max_age = SNAPSHOT_GRAB_CACHE_SECONDS if grabbed[1] is not None else SNAPSHOT_GRAB_FAILURE_CACHE_SECONDS
+        if time.monotonic() - grabbed[0] > max_age:
+            grabbed = None
+    if grabbed is None:
+        try:
+            # YouTube URLs are resolved within the grab's time limit too; a slow resolution finishes in the background
+            frame = grab_frame(resolve_stream_url(video_path, timeout=SNAPSHOT_GRAB_TIMEOUT_SECONDS))
+        except Exception as e:
+            logger.error(f"Error grabbing snapshot for camera {camera_id}: {str(e)}")
+            frame = None
+        grabbed = (time.monotonic(), frame, time.time())
+        _grabs[camera_id] = grabbed
+        get_camera_stats(camera_id).increment('snapshot_grabs' if frame is not None else 'snapshot_grab_failures')
+    return grabbed
+
+
+def get_snapshot(camera_id, video_path, profile, allow_grab=True):
+    """
+    Get a JPEG snapshot of a camera at the profile's width and quality: the
+    newest frame of its running stream worker (with detections drawn when the
+    worker runs inference), or else, with allow_grab, a frame grabbed from the
+    camera within SNAPSHOT_GRAB_TIMEOUT_SECONDS. Returns None when the camera
+    can't be read.
+    """
+    key = (camera_id, profile.width, profile.quality)
+    with _camera_lock(camera_id):
+        worker = camera_worker.get_worker(camera_id)
+        latest = worker.latest_frame() if worker is not None else None
+        if latest is not None:
+            frame, captured_at, seq = latest
+            # captured_at is monotonic; turn it into wall-clock time for Last-Modified
+            modified_at = time.time() - (time.monotonic() - captured_at)
+            snapshot = _encode(key, (id(worker), seq), frame, modified_at, 'live')
+        elif not allow_grab:
+            return None
+        else:
+            grabbed_at, frame, modified_at = _grab(camera_id, video_path)
+            if frame is None:
+                return None
+            snapshot = _encode(key, ('grab', grabbed_at), frame, modified_at, 'grab')
+
+    get_camera_stats(camera_id).increment('snapshots_served')
+    return snapshot
@@ -0,0 +1,74 @@
+import math
+import os
+from collections import namedtuple
+import cv2
+from .detection_overlay import STREAM_DISPLAY_FPS
+
+# Widest frame a viewer can ask for; wider camera frames are always scaled down to it
+STREAM_MAX_WIDTH = int(os.getenv('STREAM_MAX_WIDTH', '1920'))
+# Narrowest frame a viewer can ask for
+STREAM_MIN_WIDTH = 160
+
+# JPEG quality when the viewer doesn't ask for one (OpenCV's own default)
+STREAM_DEFAULT_QUALITY = int(os.getenv('STREAM_JPEG_QUALITY', '95'))
+# Highest JPEG quality a viewer can ask for
+STREAM_MAX_QUALITY = int(os.getenv('STREAM_MAX_JPEG_QUALITY', '95'))
+STREAM_MIN_QUALITY = 10
+
+# How a viewer wants a camera encoded: width in pixels (None keeps the camera's
+# width, up to STREAM_MAX_WIDTH), JPEG quality, and frames per second (None for
+# every frame the camera worker produces)
+StreamProfile = namedtuple('StreamProfile', ['width', 'quality', 'fps'])
+
+DEFAULT_PROFILE = StreamProfile(None, STREAM_DEFAULT_QUALITY, None)
+
+
+def _parse_number(args, name, cast):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+    # float() takes 'nan' and 'inf', which would slip past the range checks
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"Invalid {name}: {value}")
+    return number
+
+
+def parse_stream_profile(args):
+    """
+    Build a stream profile from request arguments (width, quality, fps),
+    clamping each to the server's limits. Raises ValueError for values that
+    are not finite positive numbers.
+    """
+    width = _parse_number(args, 'width', int)
+    quality = _parse_number(args, 'quality', int)
+    fps = _parse_number(args, 'fps', float)
+
+    if width is not None:
+        width = max(STREAM_MIN_WIDTH, min(width, STREAM_MAX_WIDTH))
+    quality = STREAM_DEFAULT_QUALITY if quality is None else max(STREAM_MIN_QUALITY, min(quality, STREAM_MAX_QUALITY))
+    # Viewers can't get more frames than the worker streams
+    if fps is not None and STREAM_DISPLAY_FPS > 0:
+        fps = min(fps, STREAM_DISPLAY_FPS)
+
+    return StreamProfile(width, quality, fps)
+
+
+def encode_frame(frame, width=None, quality=STREAM_DEFAULT_QUALITY):
+    """Scale a frame down to width (never up) and encode it as JPEG bytes"""
+    height, frame_width = frame.shape[:2]
+    target_width = min(width or frame_width, STREAM_MAX_WIDTH)
+    if target_width < frame_width:
+        target_height = max(1, round(height * target_width / frame_width))
+        frame = cv2.resize(frame, (target_width, target_height), interpolation=cv2.INTER_AREA)
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+def multipart_chunk(frame_bytes):
+    """Wrap JPEG bytes as one part of a multipart/x-mixed-replace stream"""
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
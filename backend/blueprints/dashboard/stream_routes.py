@@ -0,0 +1,102 @@
+"""
+Video streaming, snapshot and pipeline routes
+
+Kept apart from the dashboard API routes because importing them loads the
+video pipeline (OpenCV, the inference backends and the model loader).
+create_app leaves this blueprint out in API_ONLY mode.
+"""
+from flask import Blueprint, Response, jsonify, request
+from flask_cors import cross_origin
+import logging
+from datetime import datetime, timezone
+from . import testing_script
+from . import camera_worker
+from . import snapshot
+from .stream_profile import parse_stream_profile
+from backend.camera_registry import camera_registry, get_camera_by_id
+
+# Configure logging
+logger = logging.getLogger(__name__)
+stream_bp = Blueprint('stream', __name__)
+
+@stream_bp.route("/video_feed/<int:camera_id>")
+@cross_origin()
+def video_feed(camera_id):
+    """
+    Stream video feed from a specific camera.
+    Optional width, quality and fps arguments ask for a smaller, lighter stream.
+    """
+    try:
+        profile = parse_stream_profile(request.args)
+    except ValueError as e:
+        return str(e), 400
+
+    try:
+        camera = get_camera_by_id(camera_id)
+        
+        if not camera:
+            return "Camera not found", 404
+            
+        # Get the RTSP URL from the camera
+        video_url = camera['rtsp_url']
+        logger.info(f"Streaming from camera {camera_id} with URL: {video_url}")
+        
+        # Attach to the camera's shared worker so viewers don't each decode and infer
+        return Response(
+            camera_worker.subscribe(
+                camera_id,
+                video_url,
+                inference_fps=camera.get('inference_fps'),
+                profile=profile
+            ),
+            mimetype='multipart/x-mixed-replace; boundary=frame'
+        )
+    except Exception as e:
+        logger.error(f"Error in video_feed endpoint: {str(e)}")
+        return str(e), 500
+
+@stream_bp.route("/api/cameras/<int:camera_id>/snapshot.jpg")
+@cross_origin()
+def camera_snapshot(camera_id):
+    """
+    Latest still JPEG of a camera, from its running stream when someone is
+    watching it and from a single short grab otherwise; inactive cameras are
+    only served from a running stream, never opened. Optional width and
+    quality arguments work as for /video_feed. Responds 304 to If-None-Match
+    or If-Modified-Since while the frame hasn't changed.
+    """
+    try:
+        profile = parse_stream_profile(request.args)
+    except ValueError as e:
+        return str(e), 400
+
+    try:
+        camera = camera_registry.get(camera_id)
+        if not camera:
+            return "Camera not found", 404
+
+        still = snapshot.get_snapshot(camera_id, camera['rtsp_url'], profile,
+                                      allow_grab=camera['status'] == 'Active')
+        if still is None:
+            return "Camera unavailable", 503
+
+        response = Response(still.jpeg, mimetype='image/jpeg')
+        response.set_etag(still.etag)
+        response.last_modified = datetime.fromtimestamp(still.modified_at, timezone.utc)
+        # Browsers may keep the image but must check it is still current before showing it
+        response.cache_control.no_cache = True
+        response.headers['X-Snapshot-Source'] = still.source
+        return response.make_conditional(request)
+    except Exception as e:
+        logger.error(f"Error in snapshot endpoint: {str(e)}")
+        return str(e), 500
+
+@stream_bp.route("/api/pipeline/stats")
+@cross_origin()
+def pipeline_stats():
+    """Report live video pipeline metrics"""
+    try:
+        return jsonify(testing_script.get_pipeline_stats())
+    except Exception as e:
+        logger.error(f"Error collecting pipeline stats: {str(e)}")
+        return jsonify({'error': str(e)}), 500
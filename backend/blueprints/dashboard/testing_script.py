@@ -1,121 +1,94 @@
 import cv2
-from ultralytics import YOLO
-import yt_dlp
+import atexit
 import logging
 import os
 import sys
 from datetime import datetime
 import time
+import threading
 import numpy as np
 
 # Add the parent directory to sys.path to make imports work
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
-from backend.utils import get_db_connection
-from backend.test import check_and_send_unique_log_email
+from backend.test import check_and_send_unique_log_email, get_alert_stats
+from backend.inference_worker import ModelLoader, filter_detections, get_model_path
+from backend.detection_writer import DetectionWriter
+from backend.camera_registry import camera_registry
+from backend.utils import db_pool
+from backend.db_session import query_stats
+from backend.stream_resolver import is_youtube_url, resolve_stream_url, youtube_url_cache
+from backend.blueprints.dashboard.inference import InferenceScheduler, LocalBackend, ProcessPoolBackend
+from backend.blueprints.dashboard.frame_grabber import grab_latest_frames
+from backend.blueprints.dashboard.pipeline_stats import get_camera_stats, snapshot_camera_stats
+from backend.blueprints.dashboard.rate_control import rate_controller
+from backend.blueprints.dashboard.motion_gate import create_motion_gate
+from backend.blueprints.dashboard.tracker import create_tracker
+from backend.blueprints.dashboard.detection_overlay import STREAM_REUSE_BOXES, DetectionOverlay, DisplayPacer
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Which model artifact to run: 'pytorch' (best.pt) or one exported by Ml_Model/export_model.py,
+# i.e. 'onnx', 'onnx-int8', 'openvino' or 'openvino-int8'
+MODEL_FORMAT = os.getenv('MODEL_FORMAT', 'pytorch')
+
 # Path to the model file
-MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'Ml_Model', 'best.pt')
-
-# Load model
-try:
-    model = YOLO(MODEL_PATH)
-    logger.info(f"YOLO model loaded successfully from {MODEL_PATH}")
-except Exception as e:
-    logger.error(f"Failed to load YOLO model: {str(e)}")
-    model = None
-
-# Configuration
-CONF_THRESHOLDS = {"fire": 0.2, "smoke": 0.2}
-FRAME_SKIP = 4
-
-def is_youtube_url(url):
-    """Check if URL is a YouTube URL"""
-    return "youtube.com" in url or "youtu.be" in url
-
-def get_youtube_stream_url(youtube_url):
-    """Get streamable URL from YouTube video"""
-    ydl_opts = {
-        "quiet": True,
-        "skip_download": True,
-        "format": "best[ext=mp4]/best",
-    }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(youtube_url, download=False)
-        return info["url"]
+MODEL_PATH = get_model_path(MODEL_FORMAT)
 
-def get_camera_feeds():
-    """Get active camera feeds from the database"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-            SELECT 
-                c.id, 
-                c.name, 
-                c.rtsp_url, 
-                r.name as region_name,
-                sr.name as sub_region_name,
-                c.status
-            FROM cameras c
-            JOIN regions r ON c.region = r.id
-            JOIN sub_regions sr ON c.sub_region = sr.id
-            WHERE c.status = 'Active'
-        """
-        
-        logger.info("Executing query to fetch camera feeds")
-        cursor.execute(query)
-        cameras = cursor.fetchall()
-        logger.info(f"Found {len(cameras)} active cameras")
-
-        cursor.close()
-        conn.close()
-        return cameras
-    except Exception as e:
-        logger.error(f"Error fetching camera feeds: {str(e)}")
-        return []
+# 'local' runs the model in this process, 'process' in a pool of worker processes
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'local')
+# Worker processes for the 'process' backend, each loading the model once
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', '2'))
+
+# The model is loaded and warmed up on first use, not at import, so processes that
+# never run inference don't pay for it (worker processes load their own copy for
+# the 'process' backend)
+model_loader = ModelLoader(MODEL_PATH)
+
+# Colours (BGR) used to draw each detection type
+BOX_COLORS = {"fire": (0, 0, 255), "smoke": (160, 160, 160)}
+
+# 'latest' drains the stream on a reader thread and only hands on the newest frame,
+# 'sequential' reads frames in order between inference steps
+CAPTURE_MODE = os.getenv('CAPTURE_MODE', 'latest')
+
+# Frames per batched inference call across cameras (1 runs each frame on its own)
+INFERENCE_BATCH_SIZE = int(os.getenv('INFERENCE_BATCH_SIZE', '1'))
+# Milliseconds the first frame of a batch may wait for other cameras to join it
+INFERENCE_BATCH_WAIT_MS = float(os.getenv('INFERENCE_BATCH_WAIT_MS', '50'))
+
+# Shared inference backend and batching scheduler, created on first use
+_backend = None
+# Set once the 'process' backend could not start, so it isn't retried on every frame
+_backend_failed = False
+_backend_lock = threading.Lock()
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+# Shared background writer for the detections table, created on first use
+_writer = None
+_writer_lock = threading.Lock()
+
+# Detection tracker of each camera, created on first use
+_trackers = {}
+_trackers_lock = threading.Lock()
 
 def get_camera_info(camera_id):
     """Get camera information including region and sub-region"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-            SELECT c.id, c.region, c.sub_region
-            FROM cameras c
-            WHERE c.id = %s
-        """
-        
-        cursor.execute(query, (camera_id,))
-        camera = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        return camera
+        return camera_registry.get(camera_id)
     except Exception as e:
         logger.error(f"Error getting camera info: {str(e)}")
         return None
 
-def process_video(video_path, camera_id):
-    """Process video with object detection and stream the results"""
-    # Handle YouTube URLs
+def resolve_video_path(video_path):
+    """Turn a camera URL into something OpenCV can open"""
     if is_youtube_url(video_path):
-        try:
-            logger.info(f"Processing YouTube URL: {video_path}")
-            video_path = get_youtube_stream_url(video_path)
-        except Exception as e:
-            logger.error(f"Failed to process YouTube URL: {str(e)}")
-            yield (b'--frame\r\n'
-                   b'Content-Type: text/plain\r\n\r\n' + 
-                   f"Error processing YouTube URL: {str(e)}".encode() + b'\r\n')
-            return
+        logger.info(f"Processing YouTube URL: {video_path}")
+    return resolve_stream_url(video_path)
 
-    # Set OpenCV parameters for better RTSP handling
+def open_video_capture(video_path):
+    """Open a video stream, retrying a few times before giving up"""
     logger.info(f"Attempting to open video stream: {video_path}")
     
     # Set OpenCV parameters for better RTSP handling
@@ -123,7 +96,8 @@ def process_video(video_path, camera_id):
     
     # Configure capture with appropriate parameters
     cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 3)  # Set buffer size
+    # Set buffer size; the reader thread in 'latest' mode keeps it drained itself
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1 if CAPTURE_MODE == 'latest' else 3)
     
     # Set connection timeout
     max_retries = 3
@@ -143,18 +117,14 @@ def process_video(video_path, camera_id):
     
     if not cap.isOpened():
         logger.error(f"Error: Could not open video after {max_retries} attempts: {video_path}")
-        # Return a friendly error image instead of None
-        error_img = create_error_image(f"Camera {camera_id} unavailable")
-        _, buffer = cv2.imencode('.jpg', error_img)
-        frame_bytes = buffer.tobytes()
-        
-        # Yield the error frame once
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        return
+        return None
+    return cap
 
-    # Processing variables
-    frame_count = 0
+def read_frames(cap, video_path, camera_id):
+    """
+    Yield (frame, captured_at) from an open capture, reconnecting once if the
+    stream drops. captured_at is a time.monotonic() timestamp.
+    """
     error_reported = False
     last_frame_time = time.time()
     
@@ -190,95 +160,260 @@ def process_video(video_path, camera_id):
             # Reset error flag and update last frame time on successful frame read
             error_reported = False
             last_frame_time = time.time()
-                
-            # Skip frames to improve performance
-            frame_count += 1
-            if frame_count % FRAME_SKIP != 0:
-                continue
-
-            # Run inference with YOLO
-            if model:
-                results = model.predict(source=frame, save=False)
-
-                # Filter detections by confidence threshold
-                for result in results:
-                    filtered_boxes = []
-                    detections = []
-                    for box in result.boxes:
-                        class_id = int(box.cls[0].item())
-                        conf = box.conf[0].item()
-                        class_label = model.names[class_id]
-
-                        if class_label in CONF_THRESHOLDS and conf >= CONF_THRESHOLDS[class_label]:
-                            filtered_boxes.append(box)
-                            detections.append({
-                                'type': class_label,
-                                'confidence': float(conf),
-                                'timestamp': datetime.now().strftime('%H:%M:%S'),
-                                'date': datetime.now().strftime('%d/%m/%y')
-                            })
-
-                    # Save detections to database if any found
-                    if detections:
-                        try:
-                            conn = get_db_connection()
-                            cursor = conn.cursor()
-                            for detection in detections:
-                                query = """
-                                INSERT INTO detections 
-                                (camera_id, alert_type, confidence, time_stamp, date_created)
-                                VALUES (%s, %s, %s, %s, %s)
-                                """
-                                cursor.execute(query, (
-                                    camera_id,
-                                    detection['type'],
-                                    detection['confidence'],
-                                    detection['timestamp'],
-                                    detection['date']
-                                ))
-                                
-                                # Get camera info and check for unique detection
-                                camera_info = get_camera_info(camera_id)
-                                if camera_info:
-                                    check_and_send_unique_log_email(
-                                        camera_id,
-                                        camera_info['region'],
-                                        camera_info['sub_region'],
-                                        detection['type']
-                                    )
-                                
-                            conn.commit()
-                            cursor.close()
-                            conn.close()
-                        except Exception as e:
-                            logger.error(f"Error saving detections to database: {str(e)}")
-
-                    result.boxes = filtered_boxes
-
-                # Draw bounding boxes on frame
-                annotated_frame = results[0].plot()
+            
+            yield frame, time.monotonic()
+    finally:
+        # Always release the video capture
+        cap.release()
+
+def iter_frames(cap, video_path, camera_id):
+    """Yield (frame, captured_at) from an open capture using the configured capture mode"""
+    frames = read_frames(cap, video_path, camera_id)
+    if CAPTURE_MODE != 'latest':
+        return frames
+
+    # Local files are paced at their own frame rate, live streams arrive in real time
+    frame_interval = 0
+    if os.path.isfile(video_path):
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_interval = 1.0 / fps if fps > 0 else 0
+
+    return grab_latest_frames(
+        frames,
+        camera_id,
+        stats=get_camera_stats(camera_id),
+        frame_interval=frame_interval
+    )
+
+def start_process_backend():
+    """
+    Start the worker processes and wait for them to load the model.
+    Returns None when the model file is missing or no worker could load it.
+    """
+    if not os.path.exists(MODEL_PATH):
+        logger.error(f"Model file not found at {MODEL_PATH}")
+        return None
+    backend = ProcessPoolBackend(MODEL_PATH, INFERENCE_WORKERS)
+    if not backend.warm_up():
+        logger.error("No inference worker could load the model")
+        backend.close()
+        return None
+    logger.info(f"Running inference in {INFERENCE_WORKERS} worker process(es)")
+    return backend
+
+def get_inference_backend():
+    """Get the shared inference backend, or None when no model is available"""
+    global _backend, _backend_failed
+    with _backend_lock:
+        if _backend is None:
+            if INFERENCE_BACKEND == 'process':
+                if not _backend_failed:
+                    _backend = start_process_backend()
+                    _backend_failed = _backend is None
             else:
-                # If model not available, use original frame
-                annotated_frame = frame
+                model = model_loader.get()
+                if model:
+                    _backend = LocalBackend(model)
+        return _backend
 
-            # Convert to JPEG for streaming
-            _, buffer = cv2.imencode('.jpg', annotated_frame)
-            frame_bytes = buffer.tobytes()
-            
-            # Yield frame in multipart format for streaming
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+def warm_up_model():
+    """
+    Load and warm up the model now rather than on the first frame.
+    Returns False when no model is available.
+    """
+    return get_inference_backend() is not None
+
+def get_inference_scheduler():
+    """Get the shared batching scheduler, or None when batching is disabled"""
+    global _scheduler
+    backend = get_inference_backend()
+    if INFERENCE_BATCH_SIZE <= 1 or not backend:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = InferenceScheduler(
+                backend.predict_batch,
+                max_batch_size=INFERENCE_BATCH_SIZE,
+                max_wait=INFERENCE_BATCH_WAIT_MS / 1000
+            )
+            logger.info(f"Batching inference across cameras (batch size {INFERENCE_BATCH_SIZE}, max wait {INFERENCE_BATCH_WAIT_MS}ms)")
+        return _scheduler
+
+def run_model(frame, camera_id):
+    """
+    Run the model on one frame, through the batching scheduler when enabled.
+    Returns every detection as a dict with 'type', 'confidence' and 'box' (x1, y1, x2, y2).
+    """
+    started = time.monotonic()
+    scheduler = get_inference_scheduler()
+    if scheduler:
+        detections = scheduler.predict(camera_id, frame)
+    else:
+        detections = get_inference_backend().predict_batch([frame])[0]
+
+    # Let the rate controller adapt to how long inference actually takes
+    rate_controller.record_latency(camera_id, time.monotonic() - started)
+    return detections
+
+def draw_detections(frame, detections):
+    """Draw detection boxes and labels on a copy of the frame"""
+    annotated_frame = frame.copy()
+    for detection in detections:
+        x1, y1, x2, y2 = (int(value) for value in detection['box'])
+        color = BOX_COLORS.get(detection['type'], (0, 255, 0))
+        label = f"{detection['type']} {detection['confidence']:.2f}"
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(annotated_frame, label, (x1, max(y1 - 6, 12)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    return annotated_frame
+
+def send_detection_alerts(rows):
+    """Check each camera and alert type of a written batch of detections for a unique alert"""
+    camera_info = {}
+    # Rows are (camera_id, alert_type, confidence, detected_at, track_id)
+    for camera_id, alert_type in dict.fromkeys((row[0], row[1]) for row in rows):
+        # Look each camera up once per batch rather than once per detection
+        if camera_id not in camera_info:
+            camera_info[camera_id] = get_camera_info(camera_id)
+        info = camera_info[camera_id]
+        if info:
+            check_and_send_unique_log_email(camera_id, info['region'], info['sub_region'], alert_type)
+
+def get_detection_writer():
+    """Get the shared detections writer, starting it on first use"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DetectionWriter(after_flush=send_detection_alerts)
+            atexit.register(_writer.close)
+        return _writer
+
+def get_tracker(camera_id):
+    """Get the camera's detection tracker, or None when tracking is disabled"""
+    with _trackers_lock:
+        if camera_id not in _trackers:
+            _trackers[camera_id] = create_tracker(get_camera_stats(camera_id))
+        return _trackers[camera_id]
+
+def get_pipeline_stats():
+    """Collect live pipeline metrics for tuning"""
+    return {
+        'model': model_loader.get_stats() if INFERENCE_BACKEND != 'process' else None,
+        'inference_backend': _backend.get_stats() if _backend else None,
+        'inference_batching': _scheduler.get_stats() if _scheduler else None,
+        'inference_rates': rate_controller.get_stats(),
+        'detection_writer': _writer.get_stats() if _writer else None,
+        'alerts': get_alert_stats(),
+        'youtube_url_cache': youtube_url_cache.get_stats(),
+        'camera_registry': camera_registry.get_stats(),
+        'database_pool': db_pool.get_stats(),
+        'database_queries': query_stats.get_stats(),
+        'cameras': snapshot_camera_stats()
+    }
+
+def analyse_frame(frame, camera_id):
+    """Run YOLO on a frame, save any detections and return them"""
+    if not get_inference_backend():
+        # No model available, so nothing to detect
+        return []
+
+    # Filter detections by confidence threshold
+    detections = filter_detections(run_model(frame, camera_id))
+    detected_at = datetime.now()
+    for detection in detections:
+        detection['detected_at'] = detected_at
+
+    # Save one row per tracked object rather than one per frame it appears in
+    tracker = get_tracker(camera_id)
+    rows = tracker.update(detections) if tracker else detections
+
+    # Queue rows for the background writer, which saves them in batches
+    if rows:
+        writer = get_detection_writer()
+        for row in rows:
+            writer.submit(camera_id, row)
+
+    return detections
+
+def detect_objects(frame, camera_id, annotate=True):
+    """
+    Run YOLO on a frame, save any detections and return the annotated frame.
+    Headless callers pass annotate=False to skip drawing.
+    """
+    detections = analyse_frame(frame, camera_id)
+    if not annotate:
+        return frame
+
+    # Draw bounding boxes on frame
+    return draw_detections(frame, detections)
+
+def process_video(video_path, camera_id, run_inference=True, inference_fps=None):
+    """
+    Process video with object detection and yield (annotated frame, captured_at)
+    for streaming; the camera worker encodes them for each viewer.
+    Frames are analysed at up to inference_fps per second (the default rate
+    when None), scaled down when the inference budget is exhausted.
+    With STREAM_REUSE_BOXES on, inference runs in the background and every
+    frame (up to STREAM_DISPLAY_FPS) is streamed with the latest boxes drawn
+    on it, so the video stays smooth whatever the inference rate.
+    With run_inference=False the raw frames are streamed, for deployments
+    where the detection service does the inference.
+    """
+    # Handle YouTube URLs
+    try:
+        video_path = resolve_video_path(video_path)
+    except Exception as e:
+        logger.error(f"Failed to process YouTube URL: {str(e)}")
+        yield create_error_image("Error processing YouTube URL"), time.monotonic()
+        return
+
+    cap = open_video_capture(video_path)
+    if cap is None:
+        # Yield a friendly error image once instead of nothing
+        yield create_error_image(f"Camera {camera_id} unavailable"), time.monotonic()
+        return
+
+    # Processing variables
+    stats = get_camera_stats(camera_id)
+    motion_gate = create_motion_gate(stats)
+    overlay = DetectionOverlay(analyse_frame, camera_id) if STREAM_REUSE_BOXES and run_inference else None
+    pacer = DisplayPacer() if STREAM_REUSE_BOXES else None
+    frames = iter_frames(cap, video_path, camera_id)
+    rate_controller.register(camera_id, inference_fps)
+    
+    try:
+        for frame, captured_at in frames:
+            if pacer:
+                # Hand the frame to the model when this camera is due, without waiting for the result
+                if overlay and not overlay.busy and rate_controller.is_due(camera_id):
+                    if motion_gate is None or motion_gate.should_infer(frame):
+                        overlay.submit(frame)
+
+                if not pacer.is_due():
+                    continue
+
+                # Draw the most recent boxes, which may come from an earlier frame
+                detections = overlay.latest()[0] if overlay else []
+                annotated_frame = draw_detections(frame, detections) if detections else frame
+            else:
+                # Skip frames until this camera's share of the inference budget allows another one
+                if not rate_controller.is_due(camera_id):
+                    continue
+
+                # Run inference with YOLO, unless the scene has not changed since the last inference
+                if run_inference and (motion_gate is None or motion_gate.should_infer(frame)):
+                    annotated_frame = detect_objects(frame, camera_id)
+                else:
+                    annotated_frame = frame
+
+            stats.increment('frames_displayed')
+            yield annotated_frame, captured_at
     
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
     finally:
-        # Always release the video capture
-        cap.release()
-
-def get_camera_by_id(camera_id):
-    """Get a specific camera by ID"""
-    cameras = get_camera_feeds()
-    return next((cam for cam in cameras if cam['id'] == camera_id), None)
+        # Releases the video capture
+        frames.close()
+        rate_controller.unregister(camera_id)
 
 def create_error_image(message):
     """Create an image with error text"""
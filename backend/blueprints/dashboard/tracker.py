@@ -0,0 +1,132 @@
+import os
+import random
+import threading
+import time
+
+# Set to 0 to save every detection of every analysed frame instead of one row per tracked object
+DETECTION_TRACKING = os.getenv('DETECTION_TRACKING', '1') == '1'
+
+# Analysed frames an object must be seen in before it is saved as a detection
+TRACK_CONFIRM_FRAMES = int(os.getenv('TRACK_CONFIRM_FRAMES', '3'))
+
+# Overlap (intersection over union) a box needs with a track's last box to continue it
+TRACK_IOU_THRESHOLD = float(os.getenv('TRACK_IOU_THRESHOLD', '0.3'))
+
+# Seconds a track survives without being seen; longer gaps start a new track (and a new row)
+TRACK_MAX_AGE_SECONDS = float(os.getenv('TRACK_MAX_AGE_SECONDS', '10'))
+
+# How much higher than the saved confidence a track's confidence must climb to update its row
+TRACK_PEAK_MARGIN = float(os.getenv('TRACK_PEAK_MARGIN', '0.05'))
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class Track:
+    """One object followed across analysed frames"""
+
+    def __init__(self, detection, now):
+        # Random rather than sequential, so ids from different processes and restarts don't collide
+        self.track_id = random.getrandbits(63)
+        self.type = detection['type']
+        self.box = detection['box']
+        self.hits = 1
+        self.last_seen = now
+        self.peak_confidence = detection['confidence']
+        # Confidence of the saved row, None until the track is confirmed
+        self.saved_confidence = None
+
+
+class DetectionTracker:
+    """
+    Follow one camera's detections from frame to frame by box overlap and turn
+    them into track events: 'new' once an object has been seen in
+    confirm_frames analysed frames, then 'peak' whenever its confidence
+    climbs more than peak_margin above what was saved. Each event is the
+    frame's detection dict with 'track_id' and 'event' added.
+    """
+
+    def __init__(self, stats=None, confirm_frames=TRACK_CONFIRM_FRAMES, iou_threshold=TRACK_IOU_THRESHOLD,
+                 max_age=TRACK_MAX_AGE_SECONDS, peak_margin=TRACK_PEAK_MARGIN):
+        self.stats = stats
+        self.confirm_frames = confirm_frames
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.peak_margin = peak_margin
+
+        self._lock = threading.Lock()
+        self._tracks = []
+
+    def update(self, detections, now=None):
+        """Match one analysed frame's detections to tracks and return the events to save"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._update(detections, now)
+
+    def _update(self, detections, now):
+        self._tracks = [track for track in self._tracks if now - track.last_seen <= self.max_age]
+
+        # Greedily pair boxes with the tracks they overlap most, within the same class
+        pairs = sorted(
+            ((box_iou(track.box, detection['box']), t, d)
+             for t, track in enumerate(self._tracks)
+             for d, detection in enumerate(detections)
+             if track.type == detection['type']),
+            key=lambda pair: pair[0], reverse=True
+        )
+        matched_tracks = set()
+        matched_detections = {}
+        for iou, t, d in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            matched_tracks.add(t)
+            matched_detections[d] = self._tracks[t]
+
+        events = []
+        for d, detection in enumerate(detections):
+            track = matched_detections.get(d)
+            if track is None:
+                track = Track(detection, now)
+                self._tracks.append(track)
+            else:
+                track.box = detection['box']
+                track.hits += 1
+                track.last_seen = now
+                track.peak_confidence = max(track.peak_confidence, detection['confidence'])
+
+            event = self._event_for(track)
+            if event:
+                events.append(dict(detection, confidence=track.peak_confidence,
+                                   track_id=track.track_id, event=event))
+
+        if self.stats:
+            self.stats.increment('tracked_detections', len(detections))
+            self.stats.increment('track_events', len(events))
+            self.stats.set('tracks_active', len(self._tracks))
+        return events
+
+    def _event_for(self, track):
+        if track.saved_confidence is None:
+            if track.hits < self.confirm_frames:
+                return None
+            track.saved_confidence = track.peak_confidence
+            return 'new'
+        if track.peak_confidence > track.saved_confidence + self.peak_margin:
+            track.saved_confidence = track.peak_confidence
+            return 'peak'
+        return None
+
+
+def create_tracker(stats=None):
+    """Get a detection tracker for one camera, or None when tracking is disabled"""
+    return DetectionTracker(stats=stats) if DETECTION_TRACKING else None
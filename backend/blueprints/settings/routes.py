@@ -5,9 +5,11 @@ import logging
 import bcrypt
 from mysql.connector import Error
 from backend.utils import (
-    get_db_connection, validate_email, validate_password, 
+    validate_email, validate_password, 
     hash_password, save_profile_image, MAX_FILE_SIZE, token_required
 )
+from backend.db_session import get_db, register_blueprint_session
+from backend.pagination import list_counts
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,6 +17,9 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 settings_bp = Blueprint('settings', __name__, url_prefix='/api')
 
+# Release each request's database session when the request ends
+settings_bp.record_once(register_blueprint_session)
+
 # Add routes for settings functionality here
 # This can include app settings, user profile settings, etc.
 
@@ -31,7 +36,7 @@ def serve_profile_image(filename):
 @token_required
 def get_current_user(current_user):
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute('''
@@ -67,11 +72,6 @@ def get_current_user(current_user):
     except Error as e:
         logger.error(f"Database error while fetching user: {e}")
         return jsonify({'error': 'Database error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 
 @settings_bp.route('/settings/user', methods=['PUT'])
@@ -86,7 +86,7 @@ def update_user(current_user):
         logger.debug(f"Received form data: {data}")
         logger.debug(f"Profile image received: {profile_image is not None}")
         
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         # Check if user exists
@@ -212,17 +212,12 @@ def update_user(current_user):
     except Exception as e:
         logger.error(f"Unexpected error while updating user: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @settings_bp.route('/settings/deleteuser', methods=['DELETE'])
 @token_required
 def delete_user(current_user):
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
         
         # First get the user's profile image URL
@@ -242,6 +237,7 @@ def delete_user(current_user):
         # Delete the user from database
         cursor.execute('DELETE FROM users WHERE id = %s', (current_user['user_id'],))
         conn.commit()
+        conn.on_commit(lambda: list_counts.invalidate('users'))
         
         return jsonify({'message': 'User deleted successfully'})
         
@@ -250,9 +246,4 @@ def delete_user(current_user):
         return jsonify({'error': 'Database error'}), 500
     except Exception as e:
         logger.error(f"Unexpected error while deleting user: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
\ No newline at end of file
+        return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
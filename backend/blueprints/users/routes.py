@@ -5,9 +5,13 @@ import logging
 import bcrypt
 from mysql.connector import Error
 from backend.utils import (
-    get_db_connection, validate_email, validate_password, 
+    validate_email, validate_password, 
     hash_password, save_profile_image, MAX_FILE_SIZE, token_required
 )
+from backend.db_session import get_db, register_blueprint_session
+from backend.pagination import (
+    decode_cursor, keyset_page, list_counts, list_total, parse_count_mode, parse_page_size, total_pages
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,23 +19,35 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 users_bp = Blueprint('users', __name__, url_prefix='/api')
 
+# Release each request's database session when the request ends
+users_bp.record_once(register_blueprint_session)
+
+# Users per page when the request doesn't ask for a size
+USERS_PAGE_SIZE = 10
+
 @users_bp.route('/users', methods=['GET'])
 @token_required
 def get_users(current_user):
+    """
+    Get a page of users in id order. The response's next token (None on the
+    last page) is passed back as cursor for the page after it.
+    """
     try:
-        page = int(request.args.get('page', 1))
-        per_page = 10
-        offset = (page - 1) * per_page
-
-        conn = get_db_connection()
+        try:
+            page_size = parse_page_size(request.args, default=USERS_PAGE_SIZE)
+            count_mode = parse_count_mode(request.args)
+            cursor_token = request.args.get('cursor')
+            after_id = decode_cursor(cursor_token, (int,))[0] if cursor_token else 0
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
-        # Get total count of users
-        cursor.execute('SELECT COUNT(*) as total FROM users')
-        total_users = cursor.fetchone()['total']
-        total_pages = (total_users + per_page - 1) // per_page
+        # Total number of users, counted once per LIST_COUNT_CACHE_SECONDS
+        total_users = list_total(cursor, count_mode, 'users', (), 'SELECT COUNT(*) as total FROM users', ())
 
-        # Get paginated users
+        # Get the users after the previous page's last one, straight from the primary key
         cursor.execute('''
             SELECT 
                 id, 
@@ -42,31 +58,29 @@ def get_users(current_user):
                 country,
                 date_of_birth
             FROM users 
-            LIMIT %s OFFSET %s
-        ''', (per_page, offset))
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        ''', (after_id, page_size + 1))
         
-        users = cursor.fetchall()
+        users, next_token = keyset_page(cursor.fetchall(), page_size, lambda user: (user['id'],))
 
         return jsonify({
             'users': users,
-            'total_pages': total_pages,
-            'current_page': page
+            'next': next_token,
+            'total': total_users,
+            'total_pages': total_pages(total_users, page_size)
         })
 
     except Error as e:
         logger.error(f"Database error while fetching users: {e}")
         return jsonify({'error': 'Database error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @users_bp.route('/users/<int:user_id>', methods=['DELETE'])
 @token_required
 def delete_user(current_user, user_id):
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
         
         # First get the user's profile image URL
@@ -86,6 +100,7 @@ def delete_user(current_user, user_id):
         # Delete the user from database
         cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
         conn.commit()
+        conn.on_commit(lambda: list_counts.invalidate('users'))
         
         return jsonify({'message': 'User deleted successfully'})
         
@@ -95,17 +110,12 @@ def delete_user(current_user, user_id):
     except Exception as e:
         logger.error(f"Unexpected error while deleting user: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @users_bp.route('/users/<int:user_id>', methods=['GET'])
 @token_required
 def get_user(current_user, user_id):
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute('''
@@ -141,11 +151,6 @@ def get_user(current_user, user_id):
     except Error as e:
         logger.error(f"Database error while fetching user: {e}")
         return jsonify({'error': 'Database error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @users_bp.route('/users', methods=['POST'])
 @token_required
@@ -175,7 +180,7 @@ def create_user(current_user):
         # Hash the password
         hashed_password = hash_password(data['password'])
 
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
 
         # Check if email already exists
@@ -216,6 +221,7 @@ def create_user(current_user):
                     ''', (profile_image_url, new_user_id))
             
             conn.commit()
+            conn.on_commit(lambda: list_counts.invalidate('users'))
 
             return jsonify({
                 'message': 'User created successfully',
@@ -232,11 +238,6 @@ def create_user(current_user):
     except Exception as e:
         logger.error(f"Unexpected error while creating user: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
 
 @users_bp.route('/users/<int:user_id>', methods=['PUT'])
 @token_required
@@ -256,7 +257,7 @@ def update_user_by_id(current_user, user_id):
         if not isinstance(data['access'], list) or len(data['access']) == 0:
             return jsonify({'error': 'At least one access level is required'}), 400
 
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         # Check if user exists
@@ -285,8 +286,3 @@ def update_user_by_id(current_user, user_id):
     except Exception as e:
         logger.error(f"Unexpected error while updating user: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
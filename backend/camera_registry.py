@@ -0,0 +1,140 @@
+"""
+In-process registry of camera metadata
+
+Camera name, stream URL, status, region and sub-region are loaded once with
+a single query and kept indexed by camera id, so the video pipeline and
+alerts look cameras up without a database round trip. The camera and area
+routes invalidate it on every write; other processes, such as the detection
+service, pick up changes once CAMERA_REGISTRY_TTL_SECONDS have passed.
+"""
+import os
+import threading
+import time
+import logging
+from backend.utils import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds before the registry is reloaded even without an invalidation
+CAMERA_REGISTRY_TTL_SECONDS = float(os.getenv('CAMERA_REGISTRY_TTL_SECONDS', '60'))
+
+CAMERA_QUERY = """
+    SELECT
+        c.id,
+        c.name,
+        c.rtsp_url,
+        c.region,
+        c.sub_region,
+        r.name as region_name,
+        sr.name as sub_region_name,
+        c.status,
+        c.inference_fps
+    FROM cameras c
+    JOIN regions r ON c.region = r.id
+    JOIN sub_regions sr ON c.sub_region = sr.id
+    ORDER BY c.id
+"""
+
+# Fields of a camera returned by get_camera_feeds and get_camera_by_id
+CAMERA_FEED_FIELDS = ('id', 'name', 'rtsp_url', 'region_name', 'sub_region_name', 'status', 'inference_fps')
+
+
+class CameraRegistry:
+    """Every camera's metadata, indexed by id and reloaded after invalidate() or ttl seconds"""
+
+    def __init__(self, connect=get_db_connection, ttl=CAMERA_REGISTRY_TTL_SECONDS):
+        self.connect = connect
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._cameras = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._stats = {'loads': 0, 'lookups': 0, 'invalidations': 0}
+
+    def _load(self):
+        conn = self.connect()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(CAMERA_QUERY)
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return {row['id']: row for row in rows}
+
+    def _is_fresh(self):
+        return self._cameras is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def _get_cameras(self):
+        with self._lock:
+            self._stats['lookups'] += 1
+            if self._is_fresh():
+                return self._cameras
+
+        # One thread reloads while the others wait for its result
+        with self._load_lock:
+            with self._lock:
+                if self._is_fresh():
+                    return self._cameras
+                generation = self._generation
+
+            cameras = self._load()
+            with self._lock:
+                # A load that started before an invalidation doesn't count as fresh
+                if generation == self._generation:
+                    self._loaded_at = time.monotonic()
+                self._cameras = cameras
+                self._stats['loads'] += 1
+            logger.info(f"Loaded {len(cameras)} camera(s) into the registry")
+            return cameras
+
+    def get(self, camera_id):
+        """Get one camera's metadata, or None if there is no such camera"""
+        camera = self._get_cameras().get(camera_id)
+        return dict(camera) if camera else None
+
+    def active_cameras(self):
+        """Get the metadata of every active camera, ordered by id"""
+        return [dict(camera) for camera in self._get_cameras().values() if camera['status'] == 'Active']
+
+    def invalidate(self):
+        """Make the next lookup reload from the database, after cameras, regions or sub-regions change"""
+        with self._lock:
+            self._loaded_at = 0.0
+            self._generation += 1
+            self._stats['invalidations'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, cameras=len(self._cameras) if self._cameras is not None else None)
+
+
+# Shared registry for this process
+camera_registry = CameraRegistry()
+
+
+def get_camera_feeds():
+    """Get active camera feeds from the camera registry"""
+    try:
+        cameras = [
+            {field: camera[field] for field in CAMERA_FEED_FIELDS}
+            for camera in camera_registry.active_cameras()
+        ]
+        logger.info(f"Found {len(cameras)} active cameras")
+        return cameras
+    except Exception as e:
+        logger.error(f"Error fetching camera feeds: {str(e)}")
+        return []
+
+
+def get_camera_by_id(camera_id):
+    """Get a specific active camera by ID"""
+    try:
+        camera = camera_registry.get(camera_id)
+    except Exception as e:
+        logger.error(f"Error getting camera info: {str(e)}")
+        return None
+    if camera is None or camera['status'] != 'Active':
+        return None
+    return {field: camera[field] for field in CAMERA_FEED_FIELDS}
@@ -0,0 +1,243 @@
+"""
+Pool of reusable database connections
+
+get_db_connection() borrows from this pool instead of opening a new
+connection for every request and every detection batch. close() on a
+borrowed connection hands it back: any unread results and open transaction
+are discarded, and it waits in the pool for the next caller. Connections are
+pinged before reuse once they have sat idle for DB_POOL_PING_IDLE_SECONDS,
+and replaced once they are DB_POOL_MAX_LIFETIME_SECONDS old.
+"""
+import os
+import threading
+import time
+import weakref
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Most connections open at once per process, borrowed and idle together (0 turns pooling off)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+
+# Seconds a caller waits for a connection when all of them are borrowed
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv('DB_POOL_TIMEOUT_SECONDS', '5'))
+
+# Seconds after which a connection is closed and replaced, kept well below MySQL's wait_timeout
+DB_POOL_MAX_LIFETIME_SECONDS = float(os.getenv('DB_POOL_MAX_LIFETIME_SECONDS', '1800'))
+
+# Seconds a connection may sit idle before it is pinged on checkout
+DB_POOL_PING_IDLE_SECONDS = float(os.getenv('DB_POOL_PING_IDLE_SECONDS', '5'))
+
+# Weight of the newest sample in the running wait-time average
+WAIT_ALPHA = 0.2
+
+
+class PooledConnection:
+    """
+    A borrowed connection. Everything but close() and is_connected() goes to
+    the underlying connection; close() returns it to the pool, and
+    is_connected() says whether it is still borrowed, without a round trip to
+    the server. A connection that is never closed is closed when this object
+    is garbage collected, so its pool slot is not lost.
+    """
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+        self._finalizer = weakref.finalize(self, pool._release_leaked, conn)
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise AttributeError(f"Connection already returned to the pool ({name})")
+        return getattr(conn, name)
+
+    def is_connected(self):
+        return self._conn is not None
+
+    def close(self):
+        conn = self._conn
+        if conn is None:
+            return
+        self._conn = None
+        self._finalizer.detach()
+        self._pool._return(conn, self._created_at)
+
+
+class ConnectionPool:
+    """
+    Hand out connections from connect(), keeping up to size of them open and
+    reusing them once callers close them. Raises TimeoutError when no
+    connection frees up within timeout seconds.
+    """
+
+    def __init__(self, connect, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT_SECONDS,
+                 max_lifetime=DB_POOL_MAX_LIFETIME_SECONDS, ping_idle=DB_POOL_PING_IDLE_SECONDS):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_idle = ping_idle
+
+        self._cond = threading.Condition()
+        # (connection, created_at, returned_at), most recently returned last
+        self._idle = []
+        self._open = 0
+        self._pid = os.getpid()
+        self._stats = {
+            'checkouts': 0, 'connects': 0, 'waits': 0, 'exhausted': 0, 'health_check_failures': 0,
+            'expired': 0, 'reset_failures': 0, 'leaked': 0
+        }
+        self._wait_avg = 0.0
+        self._wait_max = 0.0
+
+    def _count(self, name, amount=1):
+        # Called with the condition held
+        self._stats[name] += amount
+
+    def _check_pid(self):
+        # A forked child must not share its parent's sockets; forget them without closing
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._open = 0
+
+    def get(self):
+        """Borrow a connection, waiting up to timeout seconds if all of them are in use"""
+        if self.size <= 0:
+            conn = self.connect()
+            with self._cond:
+                self._count('checkouts')
+                self._count('connects')
+            return conn
+
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            self._check_pid()
+            while True:
+                idle = self._take_idle()
+                if idle is not None:
+                    break
+                if self._open < self.size:
+                    # Reserve the slot, then connect without holding the lock
+                    self._open += 1
+                    break
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._count('exhausted')
+                    raise TimeoutError(f"No database connection free within {self.timeout}s ({self.size} in use)")
+                waited = True
+                self._cond.wait(remaining)
+            self._count('checkouts')
+            if waited:
+                self._count('waits')
+            wait = time.monotonic() - started
+            self._wait_avg += WAIT_ALPHA * (wait - self._wait_avg)
+            self._wait_max = max(self._wait_max, wait)
+
+        if idle is not None:
+            conn, created_at, returned_at = idle
+            if time.monotonic() - returned_at < self.ping_idle or self._is_alive(conn):
+                return PooledConnection(self, conn, created_at)
+            self._close(conn)
+            with self._cond:
+                self._count('health_check_failures')
+
+        # A new connection in the reserved slot
+        try:
+            conn = self.connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._count('connects')
+        return PooledConnection(self, conn, time.monotonic())
+
+    def _take_idle(self):
+        # Called with the condition held. Expired connections are closed and their slots freed
+        while self._idle:
+            conn, created_at, returned_at = self._idle.pop()
+            if time.monotonic() - created_at < self.max_lifetime:
+                return conn, created_at, returned_at
+            self._open -= 1
+            self._count('expired')
+            self._close(conn)
+        return None
+
+    def _is_alive(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled database connection failed its health check, replacing it: {str(e)}")
+            return False
+
+    def _reset(self, conn):
+        """Discard unread results and any open transaction, so the next borrower starts clean"""
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+            if conn.in_transaction:
+                conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Could not reset a pooled database connection, closing it: {str(e)}")
+            return False
+
+    def _return(self, conn, created_at):
+        reusable = self._reset(conn)
+        expired = time.monotonic() - created_at >= self.max_lifetime
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            if reusable and not expired:
+                self._idle.append((conn, created_at, time.monotonic()))
+            else:
+                self._open -= 1
+                self._count('expired' if reusable else 'reset_failures')
+            self._cond.notify()
+        if not reusable or expired:
+            self._close(conn)
+
+    def _release_leaked(self, conn):
+        # The borrower dropped the connection without closing it; its state is unknown, so don't reuse it
+        self._close(conn)
+        with self._cond:
+            if self._pid == os.getpid():
+                self._open -= 1
+            self._count('leaked')
+            self._cond.notify()
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        """Close every connection not currently borrowed"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def get_stats(self):
+        """Get pool size, connections open/idle/in use, checkouts and wait figures"""
+        with self._cond:
+            return dict(
+                self._stats,
+                size=self.size,
+                open=self._open,
+                idle=len(self._idle),
+                in_use=self._open - len(self._idle),
+                avg_wait_ms=round(self._wait_avg * 1000, 2),
+                max_wait_ms=round(self._wait_max * 1000, 2)
+            )
@@ -0,0 +1,218 @@
+"""
+Request-scoped database sessions
+
+Routes call get_db() for the request's session instead of borrowing and
+closing a connection themselves. The session borrows one pooled connection
+on its first cursor() and every cursor of the request shares it; the
+cursors are closed and the connection returned to the pool when the request
+ends, so each request costs at most one checkout however many queries it
+runs. The queries of every request are counted per endpoint.
+
+With DB_REQUEST_TRANSACTION=1 a route's commit() only marks the request's
+work as done, and the whole request is committed as one transaction once
+its response is ready (or rolled back when the response is an error).
+"""
+import os
+import threading
+import logging
+from flask import g, jsonify, request
+from backend.utils import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Set to 1 to commit each request's writes together when it succeeds, instead of at every commit()
+DB_REQUEST_TRANSACTION = os.getenv('DB_REQUEST_TRANSACTION', '0') == '1'
+
+
+class CountingCursor:
+    """A cursor that counts the statements it runs for its session"""
+
+    def __init__(self, cursor, session):
+        self._cursor = cursor
+        self._session = session
+
+    def execute(self, *args, **kwargs):
+        self._session.queries += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._session.queries += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class DatabaseSession:
+    """
+    One request's database access. The connection is borrowed lazily by the
+    first cursor() and kept until close(). With transactional on, commit()
+    is deferred to finish().
+    """
+
+    def __init__(self, connect=get_db_connection, transactional=DB_REQUEST_TRANSACTION):
+        self.connect = connect
+        self.transactional = transactional
+        self.queries = 0
+        self._conn = None
+        self._cursors = []
+        self._commit_pending = False
+        self._after_commit = []
+
+    @property
+    def connection(self):
+        """The borrowed connection, borrowing it on first use"""
+        if self._conn is None:
+            self._conn = self.connect()
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        cursor = CountingCursor(self.connection.cursor(*args, **kwargs), self)
+        self._cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        if self._conn is None:
+            return
+        if self.transactional:
+            self._commit_pending = True
+            return
+        self._conn.commit()
+        self._run_after_commit()
+
+    def rollback(self):
+        self._commit_pending = False
+        self._after_commit = []
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def on_commit(self, callback):
+        """
+        Run callback once the request's writes are committed, e.g. to invalidate a
+        cache. Without a deferred commit waiting, it runs straight away.
+        """
+        if self._commit_pending:
+            self._after_commit.append(callback)
+        else:
+            callback()
+
+    def _run_after_commit(self):
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error running after-commit callback: {str(e)}")
+
+    def finish(self, succeeded):
+        """Commit a deferred transaction if the request succeeded, or roll it back"""
+        if not self._commit_pending:
+            return
+        self._commit_pending = False
+        if not succeeded:
+            self.rollback()
+            return
+        self._conn.commit()
+        self._run_after_commit()
+
+    def close(self):
+        """Close the request's cursors and return its connection to the pool"""
+        for cursor in self._cursors:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self._cursors = []
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception as e:
+                logger.warning(f"Error returning a database connection: {str(e)}")
+            self._conn = None
+
+
+def get_db():
+    """Get the current request's database session, creating it on first use"""
+    if 'db_session' not in g:
+        g.db_session = DatabaseSession(connect=get_db_connection)
+    return g.db_session
+
+
+class QueryStats:
+    """Requests and queries per endpoint, counted as each request's session closes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, queries, borrowed):
+        with self._lock:
+            stats = self._endpoints.setdefault(
+                endpoint, {'requests': 0, 'checkouts': 0, 'queries': 0, 'max_queries': 0}
+            )
+            stats['requests'] += 1
+            stats['checkouts'] += 1 if borrowed else 0
+            stats['queries'] += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                endpoint: dict(stats, avg_queries=round(stats['queries'] / stats['requests'], 2))
+                for endpoint, stats in self._endpoints.items()
+            }
+
+
+# Query counts of this process's requests
+query_stats = QueryStats()
+
+
+def _finish_request(response):
+    session = g.get('db_session')
+    if session is None:
+        return response
+    try:
+        session.finish(succeeded=response.status_code < 400)
+    except Exception as e:
+        logger.error(f"Error committing request transaction: {str(e)}")
+        try:
+            session.rollback()
+        except Exception:
+            pass
+        response = jsonify({'error': 'Database error'})
+        response.status_code = 500
+    return response
+
+
+def _close_session(exc):
+    session = g.pop('db_session', None)
+    if session is None:
+        return
+    borrowed = session._conn is not None
+    if exc is not None and borrowed:
+        try:
+            session.rollback()
+        except Exception as e:
+            logger.warning(f"Error rolling back a failed request: {str(e)}")
+    session.close()
+    endpoint = request.endpoint or 'unknown'
+    query_stats.record(endpoint, session.queries, borrowed)
+    logger.debug(f"{endpoint}: {session.queries} database queries")
+
+
+def init_app(app):
+    """Commit deferred transactions and release each request's session when it ends"""
+    if 'db_session' in app.extensions:
+        return
+    app.extensions['db_session'] = True
+    app.after_request(_finish_request)
+    app.teardown_request(_close_session)
+
+
+def register_blueprint_session(state):
+    """Blueprint hook: set up sessions for whichever app the blueprint is registered on"""
+    init_app(state.app)
@@ -0,0 +1,163 @@
+"""
+Headless detection service
+
+Runs fire/smoke detection for every active camera continuously, so detections
+are recorded whether or not anyone has the dashboard open. Run it next to the
+web server and start the web server with STREAM_INFERENCE=0 so its workers
+only stream video.
+
+Usage:
+    python backend/detection_service.py
+"""
+import os
+import sys
+import signal
+import threading
+import logging
+from dotenv import load_dotenv
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load environment variables before backend.utils reads the database config
+load_dotenv()
+
+from backend.blueprints.dashboard import testing_script
+from backend.camera_registry import get_camera_feeds
+from backend.blueprints.dashboard.rate_control import rate_controller
+from backend.blueprints.dashboard.motion_gate import create_motion_gate
+from backend.blueprints.dashboard.pipeline_stats import get_camera_stats
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the cameras table for added or removed cameras
+CAMERA_REFRESH_SECONDS = float(os.getenv('DETECTION_CAMERA_REFRESH_SECONDS', '30'))
+
+# Seconds to wait before reopening a camera whose stream failed or ended
+RECONNECT_DELAY_SECONDS = float(os.getenv('DETECTION_RECONNECT_DELAY_SECONDS', '5'))
+
+# Number of threads torch may use for inference in this process
+TORCH_THREADS = os.getenv('DETECTION_TORCH_THREADS')
+
+
+class CameraDetector:
+    """Runs the detection loop for one camera on its own thread"""
+
+    def __init__(self, camera):
+        self.camera_id = camera['id']
+        self.rtsp_url = camera['rtsp_url']
+        self.inference_fps = camera.get('inference_fps')
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"detector-{self.camera_id}",
+            daemon=True
+        )
+
+    def start(self):
+        logger.info(f"Starting detection for camera {self.camera_id}")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        rate_controller.register(self.camera_id, self.inference_fps)
+        motion_gate = create_motion_gate(get_camera_stats(self.camera_id))
+        while not self._stop_event.is_set():
+            try:
+                video_path = testing_script.resolve_video_path(self.rtsp_url)
+                cap = testing_script.open_video_capture(video_path)
+                if cap is not None:
+                    frames = testing_script.iter_frames(cap, video_path, self.camera_id)
+                    try:
+                        for frame, _ in frames:
+                            if self._stop_event.is_set():
+                                break
+
+                            # Keep decoding to drain the stream, but pace inference per camera
+                            if not rate_controller.is_due(self.camera_id):
+                                continue
+
+                            # Skip the model when the scene has not changed
+                            if motion_gate and not motion_gate.should_infer(frame):
+                                continue
+
+                            testing_script.detect_objects(frame, self.camera_id, annotate=False)
+                    finally:
+                        frames.close()
+            except Exception as e:
+                logger.error(f"Error running detection for camera {self.camera_id}: {str(e)}")
+
+            if not self._stop_event.is_set():
+                logger.warning(f"Stream for camera {self.camera_id} ended, retrying in {RECONNECT_DELAY_SECONDS}s")
+                self._stop_event.wait(RECONNECT_DELAY_SECONDS)
+
+        rate_controller.unregister(self.camera_id)
+        logger.info(f"Detection for camera {self.camera_id} stopped")
+
+
+def sync_detectors(detectors, cameras):
+    """Start detectors for new cameras and stop those for removed or changed ones"""
+    active = {camera['id']: camera for camera in cameras}
+
+    for camera_id in list(detectors):
+        camera = active.get(camera_id)
+        if camera is None or camera['rtsp_url'] != detectors[camera_id].rtsp_url:
+            logger.info(f"Camera {camera_id} is no longer active or changed, stopping its detector")
+            detectors.pop(camera_id).stop()
+
+    for camera_id, camera in active.items():
+        detector = detectors.get(camera_id)
+        if detector is not None and detector.inference_fps != camera.get('inference_fps'):
+            detector.inference_fps = camera.get('inference_fps')
+            rate_controller.set_target(camera_id, detector.inference_fps)
+        if detector is None:
+            detector = CameraDetector(camera)
+            detectors[camera_id] = detector
+            detector.start()
+
+
+def run_service():
+    """Run detection for all active cameras until interrupted"""
+    # Load and warm up the model before any camera starts
+    if not testing_script.warm_up_model():
+        logger.error("YOLO model is not available, detection service cannot start")
+        return 1
+
+    if TORCH_THREADS:
+        import torch
+        torch.set_num_threads(int(TORCH_THREADS))
+        logger.info(f"Limited torch to {TORCH_THREADS} thread(s)")
+
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    detectors = {}
+    try:
+        while not stop_event.is_set():
+            cameras = get_camera_feeds()
+            sync_detectors(detectors, cameras)
+            stop_event.wait(CAMERA_REFRESH_SECONDS)
+    finally:
+        for detector in detectors.values():
+            detector.stop()
+        for detector in detectors.values():
+            detector.join(timeout=RECONNECT_DELAY_SECONDS)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run_service())
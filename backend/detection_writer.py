@@ -0,0 +1,237 @@
+"""
+Background writer for the detections table
+
+Detections from every camera are queued and written in batches by one
+thread, so inference and streaming never wait on the database. Each batch
+borrows a connection from the pool and returns it once written, so the
+writer holds no pool slot between flushes.
+"""
+import os
+import queue
+import threading
+import time
+import logging
+from backend.utils import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Detection rows that may wait to be written before the overflow policy applies
+DETECTION_QUEUE_SIZE = int(os.getenv('DETECTION_QUEUE_SIZE', '10000'))
+
+# Rows written per INSERT; a full batch is flushed straight away
+DETECTION_FLUSH_SIZE = int(os.getenv('DETECTION_FLUSH_SIZE', '200'))
+
+# Milliseconds the first queued row may wait before its batch is flushed
+DETECTION_FLUSH_INTERVAL_MS = float(os.getenv('DETECTION_FLUSH_INTERVAL_MS', '500'))
+
+# What to do with a new row when the queue is full:
+# 'drop_newest' discards it, 'drop_oldest' discards the oldest queued row to make room,
+# 'block' waits up to DETECTION_QUEUE_BLOCK_MS for room and then discards it
+DETECTION_QUEUE_OVERFLOW = os.getenv('DETECTION_QUEUE_OVERFLOW', 'drop_newest')
+DETECTION_QUEUE_BLOCK_MS = float(os.getenv('DETECTION_QUEUE_BLOCK_MS', '50'))
+
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+INSERT_DETECTION_QUERY = """
+    INSERT INTO detections
+    (camera_id, alert_type, confidence, detected_at, track_id)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Raises the confidence of a tracked detection's row when the track peaks
+UPDATE_TRACK_QUERY = """
+    UPDATE detections SET confidence = %s
+    WHERE camera_id = %s AND track_id = %s
+"""
+
+
+class DetectionWriter:
+    """
+    Queue detection rows and write them with executemany, once a batch is
+    full or its oldest row has waited flush_interval seconds. Detections
+    with event 'peak' (from the tracker) update their track's row instead.
+    """
+
+    def __init__(self, connect=get_db_connection, max_queue=DETECTION_QUEUE_SIZE,
+                 flush_size=DETECTION_FLUSH_SIZE, flush_interval=DETECTION_FLUSH_INTERVAL_MS / 1000,
+                 overflow=DETECTION_QUEUE_OVERFLOW, block_timeout=DETECTION_QUEUE_BLOCK_MS / 1000,
+                 after_flush=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', expected one of: {', '.join(OVERFLOW_POLICIES)}")
+
+        self.connect = connect
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        # Called with the inserted rows of every successful flush, e.g. to send alerts
+        self.after_flush = after_flush
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+
+        self._stats_lock = threading.Lock()
+        self._rows_queued = 0
+        self._rows_written = 0
+        self._rows_updated = 0
+        self._rows_dropped = 0
+        self._rows_failed = 0
+        self._flushes = 0
+        self._last_flush_size = 0
+        self._flush_latency_total = 0.0
+        self._last_flush_latency = 0.0
+        self._max_flush_latency = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="detection-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, camera_id, detection):
+        """Queue one detection for writing. Returns False if the overflow policy dropped it."""
+        if detection.get('event') == 'peak':
+            row = ('update', (detection['confidence'], camera_id, detection['track_id']))
+        else:
+            row = ('insert', (
+                camera_id,
+                detection['type'],
+                detection['confidence'],
+                detection['detected_at'],
+                detection.get('track_id')
+            ))
+        try:
+            if self.overflow == 'block':
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            if self.overflow != 'drop_oldest' or not self._replace_oldest(row):
+                self._count('_rows_dropped')
+                return False
+        self._count('_rows_queued')
+        return True
+
+    def _replace_oldest(self, row):
+        try:
+            self._queue.get_nowait()
+            self._count('_rows_dropped')
+            self._queue.put_nowait(row)
+            return True
+        except (queue.Empty, queue.Full):
+            return False
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _collect_batch(self):
+        # Wait for a first row, then fill the batch until it is full or the deadline passes
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop_event.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.flush_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self.flush(batch)
+
+        # Write whatever is still queued before stopping
+        batch = self._drain()
+        while batch:
+            self.flush(batch)
+            batch = self._drain()
+
+    def flush(self, batch):
+        """Write a batch of rows in one transaction, retrying once on a fresh connection"""
+        started = time.monotonic()
+        inserts = [row for kind, row in batch if kind == 'insert']
+        updates = [row for kind, row in batch if kind == 'update']
+        for attempt in range(2):
+            conn = None
+            try:
+                conn = self.connect()
+                cursor = conn.cursor()
+                # Inserts first, so a track confirmed and peaking in the same batch has a row to update
+                if inserts:
+                    cursor.executemany(INSERT_DETECTION_QUERY, inserts)
+                if updates:
+                    cursor.executemany(UPDATE_TRACK_QUERY, updates)
+                conn.commit()
+                cursor.close()
+                break
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} detection(s) to database: {str(e)}")
+            finally:
+                # Back to the pool, which health-checks and replaces connections as needed
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+        else:
+            self._count('_rows_failed', len(batch))
+            return False
+
+        self._record_flush(len(inserts), len(updates), time.monotonic() - started)
+        if self.after_flush and inserts:
+            try:
+                self.after_flush(inserts)
+            except Exception as e:
+                logger.error(f"Error handling written detections: {str(e)}")
+        return True
+
+    def _record_flush(self, inserted, updated, latency):
+        with self._stats_lock:
+            self._rows_written += inserted
+            self._rows_updated += updated
+            self._flushes += 1
+            self._last_flush_size = inserted + updated
+            self._flush_latency_total += latency
+            self._last_flush_latency = latency
+            self._max_flush_latency = max(self._max_flush_latency, latency)
+
+    def close(self, timeout=5):
+        """Stop accepting batches and write what is queued"""
+        self._stop_event.set()
+        self._thread.join(timeout)
+
+    def get_stats(self):
+        """Get queue depth, flush size and flush latency figures"""
+        with self._stats_lock:
+            flushes = self._flushes or 1
+            return {
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'overflow_policy': self.overflow,
+                'rows_queued': self._rows_queued,
+                'rows_written': self._rows_written,
+                'rows_updated': self._rows_updated,
+                'rows_dropped': self._rows_dropped,
+                'rows_failed': self._rows_failed,
+                'flushes': self._flushes,
+                'last_flush_size': self._last_flush_size,
+                'avg_flush_size': round((self._rows_written + self._rows_updated) / flushes, 2),
+                'last_flush_latency_ms': round(self._last_flush_latency * 1000, 1),
+                'avg_flush_latency_ms': round(self._flush_latency_total / flushes * 1000, 1),
+                'max_flush_latency_ms': round(self._max_flush_latency * 1000, 1)
+            }
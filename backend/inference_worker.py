@@ -0,0 +1,170 @@
+"""
+Model code shared by the web server, inference worker processes and the
+offline tools in Ml_Model
+
+Kept outside the dashboard package so that starting a worker process or a
+command-line tool only imports what it needs to run the model, not the Flask app.
+"""
+import os
+import threading
+import time
+import logging
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory holding best.pt and the artifacts exported from it
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Ml_Model')
+
+# Model artifact for each MODEL_FORMAT, as written by Ml_Model/export_model.py
+MODEL_FILES = {
+    'pytorch': 'best.pt',
+    'onnx': 'best.onnx',
+    'onnx-int8': 'best_int8.onnx',
+    'openvino': 'best_openvino_model',
+    'openvino-int8': 'best_int8_openvino_model'
+}
+
+# Minimum confidence for each class to count as a detection
+CONF_THRESHOLDS = {"fire": 0.2, "smoke": 0.2}
+
+# Side of the blank frame run through a freshly loaded model (the model's input size)
+WARMUP_FRAME_SIZE = 640
+
+# Model loaded once per worker process by init_worker
+_model = None
+
+
+def get_model_path(model_format='pytorch'):
+    """Get the path of the model artifact for a format"""
+    if model_format not in MODEL_FILES:
+        raise ValueError(f"Unknown model format '{model_format}', expected one of: {', '.join(MODEL_FILES)}")
+    return os.path.join(MODEL_DIR, MODEL_FILES[model_format])
+
+
+def load_model(model_path):
+    """Load a YOLO model from a .pt file or an exported ONNX/OpenVINO artifact"""
+    from ultralytics import YOLO
+    # Exported artifacts don't always record their task, so name it explicitly
+    return YOLO(model_path, task='detect')
+
+
+def warm_up_model(model):
+    """Run one inference on a blank frame, so the first real frame doesn't pay for initialisation"""
+    blank = np.zeros((WARMUP_FRAME_SIZE, WARMUP_FRAME_SIZE, 3), dtype=np.uint8)
+    model.predict(source=[blank], save=False, verbose=False)
+
+
+class ModelLoader:
+    """
+    Load a model on first use instead of at import, and warm it up straight
+    after loading. A model that fails to load is not retried; get() returns None.
+    """
+
+    def __init__(self, model_path, load=load_model, warm_up=warm_up_model):
+        self.model_path = model_path
+        self.load = load
+        self.warm_up = warm_up
+
+        self._lock = threading.Lock()
+        self._model = None
+        self._error = None
+        self._load_seconds = None
+        self._warmup_seconds = None
+
+    def get(self):
+        """Get the model, loading and warming it up on the first call"""
+        with self._lock:
+            if self._model is None and self._error is None:
+                self._load()
+            return self._model
+
+    def _load(self):
+        started = time.monotonic()
+        try:
+            model = self.load(self.model_path)
+        except Exception as e:
+            logger.error(f"Failed to load YOLO model: {str(e)}")
+            self._error = str(e)
+            return
+        loaded = time.monotonic()
+        self._load_seconds = loaded - started
+        logger.info(f"YOLO model loaded successfully from {self.model_path} in {self._load_seconds:.2f}s")
+
+        if self.warm_up:
+            try:
+                self.warm_up(model)
+                self._warmup_seconds = time.monotonic() - loaded
+                logger.info(f"YOLO model warmed up in {self._warmup_seconds:.2f}s")
+            except Exception as e:
+                # The model still works; the first real frame just pays for initialisation
+                logger.warning(f"Model warm-up failed: {str(e)}")
+        self._model = model
+
+    def get_stats(self):
+        def ms(seconds):
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        return {
+            'path': self.model_path,
+            'loaded': self._model is not None,
+            'error': self._error,
+            'load_ms': ms(self._load_seconds),
+            'warmup_ms': ms(self._warmup_seconds)
+        }
+
+
+def filter_detections(detections, thresholds=CONF_THRESHOLDS):
+    """Keep only the detection types we alert on, above their confidence threshold"""
+    return [
+        detection for detection in detections
+        if detection['type'] in thresholds and detection['confidence'] >= thresholds[detection['type']]
+    ]
+
+
+def extract_detections(result, names):
+    """Turn an Ultralytics result into plain, picklable detection dicts"""
+    detections = []
+    for box in result.boxes:
+        class_id = int(box.cls[0].item())
+        detections.append({
+            'type': names[class_id],
+            'confidence': float(box.conf[0].item()),
+            'box': [float(value) for value in box.xyxy[0].tolist()]
+        })
+    return detections
+
+
+def init_worker(model_path, ready=None):
+    """
+    Load and warm up the model when a worker process starts. With a ready
+    queue, the worker reports (pid, error or None) on it once done instead of
+    raising, so a pool doesn't keep restarting workers that can't load it.
+    """
+    global _model
+    try:
+        _model = load_model(model_path)
+        warm_up_model(_model)
+    except Exception as e:
+        if ready is None:
+            raise
+        logger.error(f"Inference worker {os.getpid()} could not load model from {model_path}: {str(e)}")
+        ready.put((os.getpid(), str(e)))
+        return
+    logger.info(f"Inference worker {os.getpid()} loaded model from {model_path}")
+    if ready is not None:
+        ready.put((os.getpid(), None))
+
+
+def predict_frames(frames):
+    """
+    Run the model on a list of frames.
+    Returns (worker pid, detections per frame, seconds spent).
+    """
+    if _model is None:
+        raise RuntimeError(f"Inference worker {os.getpid()} has no model loaded")
+    started = time.monotonic()
+    results = _model.predict(source=frames, save=False)
+    detections = [extract_detections(result, _model.names) for result in results]
+    return os.getpid(), detections, time.monotonic() - started
@@ -0,0 +1,127 @@
+"""
+Measure web server startup cost
+
+Starts a fresh Python process for each mode, builds the Flask app in it and
+reports how long importing and creating the app took and how much memory
+(peak RSS) the process ended up using (unavailable on Windows without psutil). Use it to see what API_ONLY and
+model warm-up cost on a given machine.
+
+Modes:
+    api-only  create_app(api_only=True): no streaming routes, no video pipeline
+    full      create_app(): streaming routes registered, model loaded on first use
+    warm      create_app() followed by warm_up_model(), i.e. the model loaded and run once
+
+Usage:
+    python backend/measure_startup.py
+    python backend/measure_startup.py --modes api-only full --repeat 3 --json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Project root, so the child processes can import the backend package
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ('api-only', 'full', 'warm')
+
+# Run in each child process; prints one JSON line with its measurements
+CHILD_SCRIPT = """
+import json, logging, sys, time
+logging.disable(logging.CRITICAL)
+mode = sys.argv[1]
+started = time.perf_counter()
+from backend.app import create_app
+imported = time.perf_counter()
+create_app(api_only=(mode == 'api-only'))
+created = time.perf_counter()
+model_available = None
+if mode == 'warm':
+    from backend.blueprints.dashboard.testing_script import warm_up_model
+    model_available = warm_up_model()
+warmed = time.perf_counter()
+try:
+    import resource
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+except ImportError:
+    # No resource module on Windows; psutil reports the peak working set there
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        rss_mb = getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+    except ImportError:
+        rss_mb = None
+heavy = ('cv2', 'numpy', 'yt_dlp', 'torch', 'ultralytics')
+print(json.dumps({
+    'import_seconds': imported - started,
+    'create_app_seconds': created - imported,
+    'warmup_seconds': warmed - created if mode == 'warm' else None,
+    'total_seconds': warmed - started,
+    'peak_rss_mb': rss_mb,
+    'model_available': model_available,
+    'heavy_modules': [name for name in heavy if name in sys.modules]
+}))
+"""
+
+
+def measure(mode):
+    """Build the app in a fresh interpreter and return its measurements"""
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    # The explicit warm-up is measured on its own, not started in the background
+    env.pop('MODEL_WARMUP_ON_START', None)
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, mode],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Measuring '{mode}' failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarise(runs):
+    """Median of each timing and memory figure over repeated runs"""
+    summary = dict(runs[-1])
+    for key in ('import_seconds', 'create_app_seconds', 'warmup_seconds', 'total_seconds', 'peak_rss_mb'):
+        values = [run[key] for run in runs if run[key] is not None]
+        summary[key] = round(statistics.median(values), 3) if values else None
+    summary['runs'] = len(runs)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and memory of the web server in each startup mode")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help="Startup modes to measure")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per mode; the median is reported")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        try:
+            results[mode] = summarise([measure(mode) for _ in range(args.repeat)])
+        except RuntimeError as e:
+            results[mode] = {'error': str(e)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'mode':<10} {'import s':>9} {'create s':>9} {'warmup s':>9} {'total s':>8} {'peak RSS MB':>12} {'model':>6}  heavy modules")
+    for mode, result in results.items():
+        if 'error' in result:
+            print(f"{mode:<10} {result['error']}")
+            continue
+        warmup = f"{result['warmup_seconds']:.3f}" if result['warmup_seconds'] is not None else '-'
+        rss = f"{result['peak_rss_mb']:.1f}" if result['peak_rss_mb'] is not None else '-'
+        model = {True: 'yes', False: 'no', None: '-'}[result['model_available']]
+        print(f"{mode:<10} {result['import_seconds']:>9.3f} {result['create_app_seconds']:>9.3f} {warmup:>9} "
+              f"{result['total_seconds']:>8.3f} {rss:>12} {model:>6}  {', '.join(result['heavy_modules']) or '-'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
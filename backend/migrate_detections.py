@@ -0,0 +1,199 @@
+"""
+Migrate the detections table to detected_at
+
+Detections used to record when they were made as two strings, time_stamp
+('%H:%M:%S') and date_created ('%d/%m/%y'), which sort by day of the month
+and can't be indexed as a range. This brings an existing table in line with
+database/schema.sql:
+
+    1. adds detected_at DATETIME(3) and the (camera_id, detected_at),
+       (alert_type, detected_at) and (detected_at) indexes, and lets new rows
+       leave time_stamp and date_created out;
+    2. fills detected_at in for existing rows, batch by batch, from their
+       time_stamp and date_created (or created_at where those don't parse);
+    3. with --drop-legacy, once every row has detected_at, makes it NOT NULL
+       and drops time_stamp and date_created.
+
+Every step checks what is already done, so the tool can be run again, e.g.
+after rows written by a server still running the old code.
+
+Usage:
+    python backend/migrate_detections.py --dry-run
+    python backend/migrate_detections.py --batch-size 5000
+    python backend/migrate_detections.py --drop-legacy
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+# Add the project root to sys.path to make backend imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend.utils import connect_database
+
+LEGACY_COLUMNS = ('time_stamp', 'date_created')
+LEGACY_FORMAT = '%d/%m/%y %H:%M:%S'
+
+# Index name -> columns, as in database/schema.sql
+DETECTED_AT_INDEXES = {
+    'idx_detections_camera_time': '(camera_id, detected_at)',
+    'idx_detections_type_time': '(alert_type, detected_at)',
+    'idx_detections_time': '(detected_at)'
+}
+
+BACKFILL_SELECT = """
+    SELECT id, time_stamp, date_created, created_at
+    FROM detections
+    WHERE detected_at IS NULL AND id > %s
+    ORDER BY id
+    LIMIT %s
+"""
+
+BACKFILL_UPDATE = "UPDATE detections SET detected_at = %s WHERE id = %s"
+
+
+def parse_legacy_timestamp(time_stamp, date_created, created_at=None):
+    """When a legacy row was detected, from its strings, or created_at if they don't parse"""
+    try:
+        return datetime.strptime(f"{date_created} {time_stamp}", LEGACY_FORMAT)
+    except (TypeError, ValueError):
+        return created_at
+
+
+def get_table_layout(cursor):
+    """Get the detections table's columns (name -> nullable) and index names"""
+    cursor.execute("""
+        SELECT COLUMN_NAME, IS_NULLABLE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'detections'
+    """)
+    columns = {name: nullable == 'YES' for name, nullable in cursor.fetchall()}
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'detections'
+    """)
+    indexes = {name for (name,) in cursor.fetchall()}
+    return columns, indexes
+
+
+def plan_schema_changes(columns, indexes):
+    """ALTER TABLE clauses that add detected_at and its indexes and relax the legacy columns"""
+    clauses = []
+    if 'detected_at' not in columns:
+        clauses.append("ADD COLUMN detected_at DATETIME(3) NULL AFTER confidence")
+    for column in LEGACY_COLUMNS:
+        if column in columns and not columns[column]:
+            clauses.append(f"MODIFY {column} VARCHAR(8) NULL")
+    for name, index_columns in DETECTED_AT_INDEXES.items():
+        if name not in indexes:
+            clauses.append(f"ADD INDEX {name} {index_columns}")
+    return clauses
+
+
+def plan_legacy_drop(columns):
+    """ALTER TABLE clauses that make detected_at required and drop the legacy columns"""
+    clauses = []
+    if columns.get('detected_at'):
+        clauses.append("MODIFY detected_at DATETIME(3) NOT NULL")
+    clauses.extend(f"DROP COLUMN {column}" for column in LEGACY_COLUMNS if column in columns)
+    return clauses
+
+
+def backfill(conn, batch_size, pause=0.0, dry_run=False):
+    """
+    Set detected_at on every row without it, batch_size rows per transaction,
+    pausing between batches to leave the database room for live writes.
+    Returns (rows updated, rows that fell back to created_at).
+    """
+    cursor = conn.cursor()
+    updated = 0
+    fallbacks = 0
+    last_id = 0
+    while True:
+        cursor.execute(BACKFILL_SELECT, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for row_id, time_stamp, date_created, created_at in rows:
+            detected_at = parse_legacy_timestamp(time_stamp, date_created, created_at)
+            if detected_at is None:
+                # Nothing to go on; leave the row for a human to look at
+                continue
+            if detected_at is created_at:
+                fallbacks += 1
+            updates.append((detected_at, row_id))
+
+        if updates and not dry_run:
+            cursor.executemany(BACKFILL_UPDATE, updates)
+            conn.commit()
+        updated += len(updates)
+        last_id = rows[-1][0]
+        print(f"Backfilled {updated} row(s), up to id {last_id}")
+        if pause:
+            time.sleep(pause)
+    cursor.close()
+    return updated, fallbacks
+
+
+def alter_detections(conn, clauses, dry_run):
+    if not clauses:
+        return
+    statement = "ALTER TABLE detections " + ", ".join(clauses)
+    print(statement)
+    if not dry_run:
+        cursor = conn.cursor()
+        cursor.execute(statement)
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate detections from time_stamp/date_created strings to detected_at")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Rows backfilled per transaction")
+    parser.add_argument('--pause', type=float, default=0.0, help="Seconds to wait between batches")
+    parser.add_argument('--drop-legacy', action='store_true',
+                        help="After backfilling, make detected_at NOT NULL and drop time_stamp and date_created")
+    parser.add_argument('--dry-run', action='store_true', help="Print the changes without making them")
+    args = parser.parse_args()
+
+    conn = connect_database()
+    try:
+        cursor = conn.cursor()
+        columns, indexes = get_table_layout(cursor)
+        cursor.close()
+        if not columns:
+            print("No detections table found")
+            return 1
+
+        alter_detections(conn, plan_schema_changes(columns, indexes), args.dry_run)
+
+        if all(column in columns for column in LEGACY_COLUMNS):
+            if 'detected_at' in columns or not args.dry_run:
+                updated, fallbacks = backfill(conn, args.batch_size, args.pause, args.dry_run)
+                print(f"{updated} row(s) backfilled, {fallbacks} from created_at")
+            else:
+                print("Rows would be backfilled once detected_at exists")
+
+        if args.drop_legacy:
+            if 'detected_at' not in columns and args.dry_run:
+                print("time_stamp and date_created would be dropped once every row is backfilled")
+            else:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM detections WHERE detected_at IS NULL")
+                missing = cursor.fetchone()[0]
+                columns, _ = get_table_layout(cursor)
+                cursor.close()
+                if missing and not args.dry_run:
+                    print(f"{missing} row(s) still have no detected_at; not dropping time_stamp and date_created")
+                    return 1
+                alter_detections(conn, plan_legacy_drop(columns), args.dry_run)
+
+        print("Dry run, nothing changed" if args.dry_run else "Detections table is up to date")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Keyset pagination for list endpoints
+
+A page ends with a token for the sort key of its last row, and the next
+page is the rows after that key: `WHERE (key) < (last key) ORDER BY key
+LIMIT n`. Unlike OFFSET, the database seeks straight to the key in the
+index, so a page deep in a large table costs the same as the first.
+
+Tokens are opaque to clients: the key's values as URL-safe base64 JSON.
+
+Totals, for "page 1 of N", would need a COUNT(*) over the whole list, so
+they come from list_counts instead: a count kept per list and filter for
+LIST_COUNT_CACHE_SECONDS and dropped when the list's table is written, or
+MySQL's estimate of the table's rows.
+"""
+import os
+import json
+import time
+import base64
+import binascii
+import threading
+from datetime import datetime
+
+# Rows per page when the request doesn't ask for a size
+PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', '100'))
+# Most rows a request can ask for in one page
+PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '500'))
+
+# Seconds a list's total is reused before it is counted again (writes through the API drop it sooner)
+LIST_COUNT_CACHE_SECONDS = float(os.getenv('LIST_COUNT_CACHE_SECONDS', '30'))
+
+# How a list's total can be worked out, chosen with the count request argument
+COUNT_MODES = ('cached', 'approximate', 'none')
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Can't put {type(value).__name__} in a page token")
+
+
+def encode_cursor(values):
+    """Turn the sort key of a page's last row into a token for the next page"""
+    data = json.dumps(list(values), default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, types):
+    """
+    Turn a token back into its sort key, converting each value with the
+    matching callable in types (e.g. (datetime.fromisoformat, int)).
+    Raises ValueError for a token that wasn't made by encode_cursor for
+    that key.
+    """
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(data)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Invalid page token")
+
+
+def parse_page_size(args, default=PAGE_SIZE_DEFAULT, maximum=PAGE_SIZE_MAX):
+    """Get the limit request argument, capped at maximum. Raises ValueError if it isn't a positive integer"""
+    value = args.get('limit')
+    if value in (None, ''):
+        return min(default, maximum)
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid limit: {value}")
+    if size <= 0:
+        raise ValueError(f"Invalid limit: {value}")
+    return min(size, maximum)
+
+
+def keyset_page(rows, page_size, key):
+    """
+    Split rows fetched with LIMIT page_size + 1 into the page and the token
+    for the page after it (None on the last page). key gives a row's sort
+    key.
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    page = rows[:page_size]
+    return page, encode_cursor(key(page[-1]))
+
+
+def parse_count_mode(args):
+    """Get the count request argument (default: cached). Raises ValueError for an unknown mode"""
+    mode = args.get('count') or 'cached'
+    if mode not in COUNT_MODES:
+        raise ValueError(f"Invalid count: {mode} (expected one of {', '.join(COUNT_MODES)})")
+    return mode
+
+
+class CountCache:
+    """
+    Row counts of lists, each kept for ttl seconds under (table, filters).
+    invalidate(table) drops every count of a table, e.g. once a write to it
+    commits. Counts are per process, so other processes' writes show up
+    within ttl.
+    """
+
+    def __init__(self, ttl=LIST_COUNT_CACHE_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (table, filters) -> (count, counted_at)
+        self._counts = {}
+
+    def get(self, table, filters, count):
+        """Get the cached count of table under filters, or call count() and keep its result"""
+        key = (table, filters)
+        with self._lock:
+            cached = self._counts.get(key)
+        if cached is not None and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        total = count()
+        with self._lock:
+            self._counts[key] = (total, time.monotonic())
+        return total
+
+    def invalidate(self, table):
+        with self._lock:
+            for key in [key for key in self._counts if key[0] == table]:
+                del self._counts[key]
+
+
+# List totals of this process, invalidated by the routes that write each table
+list_counts = CountCache()
+
+
+def approximate_row_count(cursor, table):
+    """
+    MySQL's estimate of a table's rows, read from its statistics without
+    scanning it. Unfiltered only, and it can be well off, or stale by up to
+    information_schema_stats_expiry (a day by default).
+    """
+    cursor.execute("""
+        SELECT TABLE_ROWS AS total FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    result = cursor.fetchone()
+    if not result:
+        return None
+    total = result['total'] if isinstance(result, dict) else result[0]
+    return int(total) if total is not None else None
+
+
+def list_total(cursor, mode, table, filters, count_query, params):
+    """
+    The total for a list in the given count mode: count_query's count from
+    list_counts (cached), the table's estimate when there are no filters
+    (approximate; filtered lists fall back to cached), or None (none).
+    """
+    if mode == 'none':
+        return None
+    if mode == 'approximate' and not filters:
+        return approximate_row_count(cursor, table)
+
+    def count():
+        cursor.execute(count_query, params)
+        result = cursor.fetchone()
+        return result['total'] if result else 0
+
+    return list_counts.get(table, filters, count)
+
+
+def total_pages(total, page_size):
+    """Pages needed for total rows, at least one; None when the total isn't known"""
+    if total is None:
+        return None
+    return max(1, (total + page_size - 1) // page_size)
@@ -0,0 +1,225 @@
+"""
+Resolve YouTube camera URLs to streamable URLs, with a cache
+
+Resolving a YouTube URL with yt_dlp takes seconds, so resolved URLs are
+cached until shortly before the signed URL expires, concurrent resolutions
+of the same URL share one yt_dlp call, and URLs still in use are refreshed
+in the background before they expire. Used by the dashboard and by the
+scripts in Ml_Model.
+"""
+import os
+import re
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from urllib.parse import parse_qs, urlparse
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Lifetime of a resolved URL whose expiry can't be read from the URL itself
+YOUTUBE_URL_TTL_SECONDS = float(os.getenv('YOUTUBE_URL_TTL_SECONDS', '3600'))
+
+# Resolved URLs are refreshed in the background this many seconds before they expire
+YOUTUBE_URL_REFRESH_MARGIN_SECONDS = float(os.getenv('YOUTUBE_URL_REFRESH_MARGIN_SECONDS', '300'))
+
+# A cached URL is not handed out when it has less than this many seconds left
+YOUTUBE_URL_MIN_REMAINING_SECONDS = 60
+
+# URLs not asked for in this many seconds are dropped instead of refreshed
+YOUTUBE_URL_IDLE_SECONDS = float(os.getenv('YOUTUBE_URL_IDLE_SECONDS', '900'))
+
+# Signed googlevideo URLs carry their expiry as ?expire=<unix time> or /expire/<unix time>/
+EXPIRE_PATH_PATTERN = re.compile(r'/expire/(\d+)')
+
+
+def is_youtube_url(url):
+    """Check if URL is a YouTube URL"""
+    return "youtube.com" in url or "youtu.be" in url
+
+
+def get_youtube_stream_url(youtube_url):
+    """Get streamable URL from YouTube video"""
+    # Imported here so processes without YouTube cameras never load yt_dlp
+    import yt_dlp
+    ydl_opts = {
+        "quiet": True,
+        "skip_download": True,
+        "format": "best[ext=mp4]/best",
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(youtube_url, download=False)
+        return info["url"]
+
+
+def get_url_expiry(stream_url):
+    """Get the unix time a signed stream URL expires at, or None if it doesn't say"""
+    parsed = urlparse(stream_url)
+    expire = parse_qs(parsed.query).get('expire')
+    if expire:
+        value = expire[0]
+    else:
+        match = EXPIRE_PATH_PATTERN.search(parsed.path)
+        value = match.group(1) if match else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class StreamURLCache:
+    """
+    Cache of resolved stream URLs keyed by source URL. resolve takes a source
+    URL and returns a streamable one; clock returns unix time.
+    """
+
+    def __init__(self, resolve, default_ttl=YOUTUBE_URL_TTL_SECONDS,
+                 refresh_margin=YOUTUBE_URL_REFRESH_MARGIN_SECONDS,
+                 min_remaining=YOUTUBE_URL_MIN_REMAINING_SECONDS,
+                 idle_seconds=YOUTUBE_URL_IDLE_SECONDS, clock=time.time, background_refresh=True):
+        self.resolve = resolve
+        self.default_ttl = default_ttl
+        self.refresh_margin = refresh_margin
+        self.min_remaining = min_remaining
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self.background_refresh = background_refresh
+
+        self._lock = threading.Lock()
+        # source URL -> {'url', 'resolved_at', 'expires_at', 'last_used'}
+        self._entries = {}
+        # source URL -> Future of a resolution in progress
+        self._in_flight = {}
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'refreshes': 0, 'errors': 0}
+
+        self._wake = threading.Event()
+        self._refresher = None
+
+    def get(self, source_url, timeout=None):
+        """
+        Get a streamable URL for source_url, resolving it only if no fresh one is
+        cached. With a timeout, raises TimeoutError after that many seconds; the
+        resolution carries on in the background and is cached for later calls.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(source_url)
+            if entry is not None and entry['expires_at'] - now > self.min_remaining:
+                entry['last_used'] = now
+                self._stats['hits'] += 1
+                return entry['url']
+
+            future = self._in_flight.get(source_url)
+            if future is not None:
+                # Someone is already resolving this URL; wait for their result
+                self._stats['coalesced'] += 1
+                owner = False
+            else:
+                future = Future()
+                self._in_flight[source_url] = future
+                self._stats['misses'] += 1
+                owner = True
+
+        if owner:
+            if timeout is None:
+                self._resolve(source_url, future, last_used=now)
+            else:
+                threading.Thread(target=self._resolve, args=(source_url, future), kwargs={'last_used': now},
+                                 name="stream-url-resolver", daemon=True).start()
+            self._start_refresher()
+        return future.result(timeout=timeout)
+
+    def _resolve(self, source_url, future, last_used=None):
+        try:
+            url = self.resolve(source_url)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                del self._in_flight[source_url]
+            future.set_exception(e)
+            return
+
+        now = self.clock()
+        expires_at = get_url_expiry(url) or now + self.default_ttl
+        with self._lock:
+            previous = self._entries.get(source_url)
+            self._entries[source_url] = {
+                'url': url,
+                'resolved_at': now,
+                'expires_at': expires_at,
+                'last_used': last_used if last_used is not None else (previous or {}).get('last_used', now)
+            }
+            del self._in_flight[source_url]
+        future.set_result(url)
+        logger.info(f"Resolved {source_url}, valid for {int(expires_at - now)}s")
+
+    def _start_refresher(self):
+        """Start the refresh thread, or wake it to reschedule around a new entry"""
+        if not self.background_refresh:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="stream-url-refresher", daemon=True)
+                self._refresher.start()
+        self._wake.set()
+
+    def refresh_due(self):
+        """Refresh entries close to expiry that are still in use, and drop idle ones"""
+        now = self.clock()
+        due = []
+        with self._lock:
+            for source_url, entry in list(self._entries.items()):
+                if now - entry['last_used'] > self.idle_seconds:
+                    del self._entries[source_url]
+                    continue
+                # Short-lived URLs are refreshed at most once every min_remaining seconds
+                if (entry['expires_at'] - now <= self.refresh_margin
+                        and now - entry['resolved_at'] >= self.min_remaining
+                        and source_url not in self._in_flight):
+                    future = Future()
+                    self._in_flight[source_url] = future
+                    self._stats['refreshes'] += 1
+                    due.append((source_url, future))
+
+        for source_url, future in due:
+            self._resolve(source_url, future)
+            if future.exception() is not None:
+                logger.error(f"Error refreshing {source_url}: {str(future.exception())}")
+
+    def _next_refresh_delay(self):
+        now = self.clock()
+        with self._lock:
+            deadlines = [entry['expires_at'] - self.refresh_margin for entry in self._entries.values()]
+        if not deadlines:
+            return None
+        # Also wake up now and then to drop entries nobody asks for any more
+        return max(1.0, min(min(deadlines) - now, self.idle_seconds))
+
+    def _refresh_loop(self):
+        while True:
+            self._wake.wait(timeout=self._next_refresh_delay())
+            self._wake.clear()
+            try:
+                self.refresh_due()
+            except Exception as e:
+                logger.error(f"Error refreshing stream URLs: {str(e)}")
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+# Shared cache for every camera in this process
+youtube_url_cache = StreamURLCache(get_youtube_stream_url)
+
+
+def resolve_stream_url(video_path, timeout=None):
+    """
+    Turn a YouTube URL into a streamable one through the shared cache; other
+    paths are returned as they are. Raises TimeoutError when a timeout is
+    given and resolving takes longer.
+    """
+    if is_youtube_url(video_path):
+        return youtube_url_cache.get(video_path, timeout=timeout)
+    return video_path
@@ -1,11 +1,15 @@
-import smtplib
+import atexit
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import json
 import os
 import logging
+import threading
+import time
 from datetime import datetime
 from backend.utils import get_db_connection
+from backend.alert_dispatcher import AlertDispatcher, SMTPSession
+from backend.camera_registry import camera_registry
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -21,27 +25,128 @@ receiver_emails = [
     "pratham22373@iiitd.ac.in"
 ]
 
-# Path to sent alerts file
+# Alerts recorded by earlier versions, imported into the sent_alerts table on first use
 SENT_ALERTS_FILE = os.path.join(os.path.dirname(__file__), 'sent_alerts.json')
+# The file is renamed with this suffix once imported, so it is only imported once
+SENT_ALERTS_IMPORTED_SUFFIX = '.imported'
 
-def load_sent_alerts():
-    """Load the sent alerts from JSON file"""
-    try:
-        if os.path.exists(SENT_ALERTS_FILE):
-            with open(SENT_ALERTS_FILE, 'r') as f:
-                return json.load(f)
-        return {}
-    except Exception as e:
-        logger.error(f"Error loading sent alerts: {str(e)}")
-        return {}
+# Seconds to wait before loading the sent_alerts table again after a failed load
+SENT_ALERTS_RETRY_SECONDS = float(os.getenv('SENT_ALERTS_RETRY_SECONDS', '30'))
 
-def save_sent_alerts(alerts):
-    """Save the sent alerts to JSON file"""
-    try:
-        with open(SENT_ALERTS_FILE, 'w') as f:
-            json.dump(alerts, f, indent=4)
-    except Exception as e:
-        logger.error(f"Error saving sent alerts: {str(e)}")
+
+class SentAlertIndex:
+    """
+    Remembers which camera/region/sub-region combinations have already been
+    alerted. Lookups are answered from memory; a new combination is claimed
+    with INSERT IGNORE into the sent_alerts table, so only one thread or
+    process ever sends its alert.
+
+    If the table can't be loaded, loading is retried every retry_interval
+    seconds; until then, combinations claimed in this process are still
+    remembered, so a camera doesn't send an email for every detection.
+    """
+
+    def __init__(self, connect=get_db_connection, legacy_file=SENT_ALERTS_FILE,
+                 retry_interval=SENT_ALERTS_RETRY_SECONDS):
+        self.connect = connect
+        self.legacy_file = legacy_file
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._keys = None
+        # Claimed while the table couldn't be loaded, merged in once it is
+        self._unloaded_keys = set()
+        self._retry_at = 0.0
+
+    def _load(self):
+        """Fill the index from the sent_alerts table, importing the old JSON file first. None if it fails."""
+        try:
+            conn = self.connect()
+            cursor = conn.cursor()
+            imported = self._import_legacy_file(cursor)
+            conn.commit()
+            if imported:
+                self._retire_legacy_file()
+            cursor.execute("SELECT camera_id, region_id, sub_region_id FROM sent_alerts")
+            keys = {tuple(row) for row in cursor.fetchall()}
+            cursor.close()
+            conn.close()
+            return keys
+        except Exception as e:
+            logger.warning(f"Error loading sent alerts, retrying in {self.retry_interval}s: {str(e)}")
+            return None
+
+    def _get_keys(self):
+        # Called with the lock held
+        if self._keys is None and time.monotonic() >= self._retry_at:
+            keys = self._load()
+            if keys is None:
+                self._retry_at = time.monotonic() + self.retry_interval
+            else:
+                self._keys = keys | self._unloaded_keys
+                self._unloaded_keys = set()
+        return self._keys if self._keys is not None else self._unloaded_keys
+
+    def _import_legacy_file(self, cursor):
+        """Insert the old JSON file's alerts into the table. Returns whether there was a file to import."""
+        if not os.path.exists(self.legacy_file):
+            return False
+        with open(self.legacy_file, 'r') as f:
+            alerts = json.load(f)
+        rows = [
+            (alert['camera_id'], alert['region_id'], alert['sub_region_id'], alert['first_alert_time'])
+            for alert in alerts.values()
+        ]
+        if rows:
+            cursor.executemany("""
+                INSERT IGNORE INTO sent_alerts (camera_id, region_id, sub_region_id, first_alert_time)
+                VALUES (%s, %s, %s, %s)
+            """, rows)
+            logger.info(f"Imported {len(rows)} sent alert(s) from {self.legacy_file}")
+        return True
+
+    def _retire_legacy_file(self):
+        """Rename the imported JSON file, so later loads don't import it again"""
+        try:
+            os.replace(self.legacy_file, self.legacy_file + SENT_ALERTS_IMPORTED_SUFFIX)
+        except FileNotFoundError:
+            # Another process imported and renamed it at the same time
+            pass
+        except OSError as e:
+            logger.warning(f"Could not rename {self.legacy_file} after importing it: {str(e)}")
+
+    def _claim(self, key, alert_type):
+        """Record a new combination in the table. Returns False if another process got there first."""
+        try:
+            conn = self.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT IGNORE INTO sent_alerts (camera_id, region_id, sub_region_id, alert_type)
+                VALUES (%s, %s, %s, %s)
+            """, key + (alert_type,))
+            claimed = cursor.rowcount == 1
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return claimed
+        except Exception as e:
+            # Better a possible duplicate email than a missed alert
+            logger.error(f"Error recording sent alert, sending anyway: {str(e)}")
+            return True
+
+    def claim(self, camera_id, region_id, sub_region_id, alert_type):
+        """Check whether this combination still needs its alert, marking it as sent if so"""
+        key = (camera_id, region_id, sub_region_id)
+        with self._lock:
+            keys = self._get_keys()
+            if key in keys:
+                return False
+            # Mark it before releasing the lock so other threads don't claim it too
+            keys.add(key)
+        return self._claim(key, alert_type)
+
+
+# Shared index for every camera in this process
+sent_alert_index = SentAlertIndex()
 
 def check_and_send_unique_log_email(camera_id, region_id, sub_region_id, alert_type):
     """
@@ -49,93 +154,99 @@ def check_and_send_unique_log_email(camera_id, region_id, sub_region_id, alert_t
     and send an email if it is unique
     """
     try:
-        # Create a unique key for this combination
-        alert_key = f"{camera_id}_{region_id}_{sub_region_id}"
-        
-        # Load existing sent alerts
-        sent_alerts = load_sent_alerts()
-        
-        # If this combination hasn't been sent before, send email
-        if alert_key not in sent_alerts:
+        if sent_alert_index.claim(camera_id, region_id, sub_region_id, alert_type):
             send_alert_email(camera_id, region_id, sub_region_id, alert_type)
-            
-            # Add to sent alerts
-            sent_alerts[alert_key] = {
-                'camera_id': camera_id,
-                'region_id': region_id,
-                'sub_region_id': sub_region_id,
-                'first_alert_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            # Save updated alerts
-            save_sent_alerts(sent_alerts)
-            logger.info(f"Sent unique alert email for camera {camera_id}, region {region_id}, sub-region {sub_region_id}")
+            logger.info(f"Queued unique alert email for camera {camera_id}, region {region_id}, sub-region {sub_region_id}")
         
     except Exception as e:
         logger.error(f"Error checking unique logs: {str(e)}")
 
-def send_alert_email(camera_id, region_id, sub_region_id, alert_type):
-    """
-    Send an alert email for a unique detection
-    """
-    try:
-        # Get camera and region details
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-            SELECT 
-                c.name as camera_name,
-                r.name as region_name,
-                sr.name as sub_region_name
-            FROM cameras c
-            JOIN regions r ON c.region = r.id
-            JOIN sub_regions sr ON c.sub_region = sr.id
-            WHERE c.id = %s
-        """
-        
-        cursor.execute(query, (camera_id,))
-        details = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        # Create the email
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = ", ".join(receiver_emails)
-        msg['Subject'] = f"Alert: {alert_type} Detected"
-
-        # Email body with detailed information
-        body = f"""
+def get_alert_details(camera_id):
+    """Get the camera, region and sub-region names for an alert"""
+    return camera_registry.get(camera_id)
+
+def build_alert_message(alerts):
+    """Write the subject and body of an email for one alert, or a digest of several"""
+    details = {}
+    lines = []
+    for alert in alerts:
+        # Look each camera up once, even when it raised several alerts in a digest
+        if alert['camera_id'] not in details:
+            details[alert['camera_id']] = get_alert_details(alert['camera_id']) or {
+                'name': f"Camera {alert['camera_id']}", 'region_name': 'Unknown', 'sub_region_name': 'Unknown'
+            }
+        camera = details[alert['camera_id']]
+        lines.append(f"""
+        - Camera: {camera['name']}
+        - Region: {camera['region_name']}
+        - Sub-Region: {camera['sub_region_name']}
+        - Alert Type: {alert['alert_type']}
+        - Time: {alert['time']}
+        """)
+
+    alert_types = sorted({alert['alert_type'] for alert in alerts})
+    if len(alerts) == 1:
+        subject = f"Alert: {alerts[0]['alert_type']} Detected"
+        summary = f"A {alerts[0]['alert_type']} has been detected in your monitoring system."
+    else:
+        subject = f"Alert: {len(alerts)} {'/'.join(alert_types)} Detections"
+        summary = f"{len(alerts)} detections ({', '.join(alert_types)}) have been made in your monitoring system."
+
+    body = f"""
         Dear Security Team,
 
-        A {alert_type} has been detected in your monitoring system.
+        {summary}
 
         Details:
-        - Camera: {details['camera_name']}
-        - Region: {details['region_name']}
-        - Sub-Region: {details['sub_region_name']}
-        - Alert Type: {alert_type}
-        - Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
+        {''.join(lines)}
         Please take appropriate action.
 
         Regards,
         Security Monitoring System
         """
+    return subject, body
+
+# Session kept open between alert emails. SMTP_USERNAME='' skips the login,
+# e.g. for a local test server
+smtp_session = SMTPSession(
+    username=os.getenv('SMTP_USERNAME', sender_email),
+    password=os.getenv('SMTP_PASSWORD', app_password)
+)
+
+def deliver_email(subject, body):
+    """Send one alert email to every recipient over the shared SMTP session"""
+    msg = MIMEMultipart()
+    msg['From'] = sender_email
+    msg['To'] = ", ".join(receiver_emails)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    smtp_session.send(sender_email, receiver_emails, msg.as_string())
+
+# Shared dispatcher for alert emails, started on first use
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_alert_dispatcher():
+    """Get the background alert dispatcher, starting it on first use"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher(build_alert_message, deliver_email)
+            atexit.register(_dispatcher.close)
+        return _dispatcher
+
+def get_alert_stats():
+    """Get the alert dispatcher's queue and latency figures, or None before the first alert"""
+    return _dispatcher.get_stats() if _dispatcher else None
 
-        msg.attach(MIMEText(body, 'plain'))
-
-        # Send the email
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(sender_email, app_password)
-        server.sendmail(sender_email, receiver_emails, msg.as_string())
-        server.quit()
-        
-        logger.info("Alert email sent successfully")
-        
-    except Exception as e:
-        logger.error(f"Error sending alert email: {str(e)}")
-
+def send_alert_email(camera_id, region_id, sub_region_id, alert_type):
+    """
+    Queue an alert email for a unique detection; it is sent in the background
+    """
+    get_alert_dispatcher().submit({
+        'camera_id': camera_id,
+        'region_id': region_id,
+        'sub_region_id': sub_region_id,
+        'alert_type': alert_type,
+        'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
@@ -0,0 +1,159 @@
+import unittest
+import socketserver
+import threading
+import time
+import smtplib
+from unittest.mock import patch
+from backend.alert_dispatcher import AlertDispatcher, SMTPSession
+
+
+class LocalSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages, recording each one on the server"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost test server")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply("250 localhost")
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b'.\r\n', b''):
+                        break
+                    data.append(data_line.decode())
+                self.server.messages.append(''.join(data))
+                self.reply("250 OK")
+                if self.server.drop_after_message:
+                    # Simulate the server closing the session
+                    self.server.drop_after_message = False
+                    return
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), LocalSMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.drop_after_message = False
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestAlertDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalSMTPServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.session = SMTPSession(host='127.0.0.1', port=self.server.server_address[1], starttls=False)
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def send(self, subject, body):
+        message = f"Subject: {subject}\r\n\r\n{body}\r\n"
+        self.session.send('alerts@example.com', ['team@example.com'], message)
+
+    def build_message(self, alerts):
+        return f"{len(alerts)} alert(s)", '\n'.join(alert['alert_type'] for alert in alerts)
+
+    def test_alerts_reuse_one_smtp_session(self):
+        dispatcher = AlertDispatcher(self.build_message, self.send, digest_seconds=0)
+        for alert_type in ('fire', 'smoke', 'fire'):
+            dispatcher.submit({'alert_type': alert_type})
+
+        self.assertTrue(wait_for(lambda: len(self.server.messages) == 3))
+        dispatcher.close()
+
+        self.assertEqual(self.server.connections, 1)
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['alerts_sent'], 3)
+        self.assertEqual(stats['emails_sent'], 3)
+        self.assertIsNotNone(stats['avg_send_latency_ms'])
+        self.assertIsNotNone(stats['max_queue_lag_ms'])
+
+    def test_alerts_in_digest_window_share_one_email(self):
+        dispatcher = AlertDispatcher(self.build_message, self.send, digest_seconds=0.3)
+        for alert_type in ('fire', 'smoke', 'fire'):
+            dispatcher.submit({'alert_type': alert_type})
+
+        self.assertTrue(wait_for(lambda: self.server.messages))
+        dispatcher.close()
+
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertIn('Subject: 3 alert(s)', self.server.messages[0])
+        self.assertEqual(dispatcher.get_stats()['emails_sent'], 1)
+
+    def test_dropped_session_is_reopened(self):
+        self.server.drop_after_message = True
+        dispatcher = AlertDispatcher(self.build_message, self.send, digest_seconds=0)
+
+        dispatcher.submit({'alert_type': 'fire'})
+        self.assertTrue(wait_for(lambda: len(self.server.messages) == 1))
+        dispatcher.submit({'alert_type': 'smoke'})
+        self.assertTrue(wait_for(lambda: len(self.server.messages) == 2))
+        dispatcher.close()
+
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(dispatcher.get_stats()['alerts_failed'], 0)
+
+    def test_failed_connect_is_retried(self):
+        real_smtp = smtplib.SMTP
+        attempts = []
+
+        def connect(*args, **kwargs):
+            attempts.append(args)
+            if len(attempts) == 1:
+                raise ConnectionRefusedError('mail server restarting')
+            return real_smtp(*args, **kwargs)
+
+        with patch('backend.alert_dispatcher.smtplib.SMTP', side_effect=connect):
+            self.send('fire', 'Camera 1')
+
+        self.assertEqual(len(attempts), 2)
+        self.assertTrue(wait_for(lambda: len(self.server.messages) == 1))
+
+    def test_second_failed_connect_is_raised(self):
+        with patch('backend.alert_dispatcher.smtplib.SMTP', side_effect=ConnectionRefusedError('mail server down')) as mock_smtp:
+            with self.assertRaises(ConnectionRefusedError):
+                self.send('fire', 'Camera 1')
+
+        self.assertEqual(mock_smtp.call_count, 2)
+
+    def test_failed_send_is_counted(self):
+        def send(subject, body):
+            raise ConnectionRefusedError('mail server down')
+
+        dispatcher = AlertDispatcher(self.build_message, send, digest_seconds=0)
+        dispatcher.submit({'alert_type': 'fire'})
+
+        self.assertTrue(wait_for(lambda: dispatcher.get_stats()['alerts_failed'] == 1))
+        dispatcher.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+from unittest.mock import patch, MagicMock
+from backend import test as alerts
+from backend.test import SentAlertIndex
+from backend.camera_registry import CameraRegistry
+
+
+class FakeSentAlertsTable:
+    """Stand-in for the sent_alerts table, shared like a real database would be"""
+
+    def __init__(self, rows=()):
+        self.rows = set(rows)
+        self.lock = threading.Lock()
+        self.connections = 0
+
+    def connect(self):
+        self.connections += 1
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+
+        def execute(query, params=None):
+            if query.strip().startswith('SELECT'):
+                cursor.fetchall.return_value = list(self.rows)
+            else:
+                with self.lock:
+                    key = tuple(params[:3])
+                    cursor.rowcount = 0 if key in self.rows else 1
+                    self.rows.add(key)
+
+        def executemany(query, rows):
+            for row in rows:
+                execute(query, row)
+
+        cursor.execute.side_effect = execute
+        cursor.executemany.side_effect = executemany
+        return conn
+
+
+class TestSentAlertIndex(unittest.TestCase):
+    def setUp(self):
+        self.table = FakeSentAlertsTable(rows=[(1, 1, 1)])
+
+    def test_known_alerts_are_answered_from_memory(self):
+        index = SentAlertIndex(connect=self.table.connect, legacy_file='missing.json')
+
+        self.assertFalse(index.claim(1, 1, 1, 'fire'))
+        self.assertTrue(index.claim(2, 1, 3, 'smoke'))
+        connections = self.table.connections
+
+        # Repeated detections don't touch the database again
+        for _ in range(10):
+            self.assertFalse(index.claim(2, 1, 3, 'smoke'))
+        self.assertEqual(self.table.connections, connections)
+
+    def test_only_one_process_wins_a_new_alert(self):
+        # Two processes share the table but not their in-memory index
+        first = SentAlertIndex(connect=self.table.connect, legacy_file='missing.json')
+        second = SentAlertIndex(connect=self.table.connect, legacy_file='missing.json')
+        first.claim(1, 1, 1, 'fire')
+        second.claim(1, 1, 1, 'fire')
+
+        self.assertTrue(first.claim(5, 2, 2, 'fire'))
+        self.assertFalse(second.claim(5, 2, 2, 'fire'))
+
+    def test_concurrent_threads_send_once(self):
+        index = SentAlertIndex(connect=self.table.connect, legacy_file='missing.json')
+        results = []
+
+        def claim():
+            results.append(index.claim(7, 1, 1, 'fire'))
+
+        threads = [threading.Thread(target=claim) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(results.count(True), 1)
+
+    def test_legacy_file_is_imported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            legacy_file = os.path.join(directory, 'sent_alerts.json')
+            with open(legacy_file, 'w') as f:
+                json.dump({'3_1_2': {
+                    'camera_id': 3, 'region_id': 1, 'sub_region_id': 2,
+                    'first_alert_time': '2025-04-20 15:58:07'
+                }}, f)
+
+            index = SentAlertIndex(connect=self.table.connect, legacy_file=legacy_file)
+            self.assertFalse(index.claim(3, 1, 2, 'fire'))
+            self.assertIn((3, 1, 2), self.table.rows)
+
+            # The file is renamed once imported, so the next process doesn't import it again
+            self.assertFalse(os.path.exists(legacy_file))
+            self.assertTrue(os.path.exists(legacy_file + '.imported'))
+            cursor = MagicMock()
+            self.assertFalse(SentAlertIndex(connect=self.table.connect, legacy_file=legacy_file)._import_legacy_file(cursor))
+            cursor.executemany.assert_not_called()
+
+    def test_legacy_file_is_kept_when_import_fails(self):
+        with tempfile.TemporaryDirectory() as directory:
+            legacy_file = os.path.join(directory, 'sent_alerts.json')
+            with open(legacy_file, 'w') as f:
+                json.dump({'3_1_2': {
+                    'camera_id': 3, 'region_id': 1, 'sub_region_id': 2,
+                    'first_alert_time': '2025-04-20 15:58:07'
+                }}, f)
+
+            conn = MagicMock()
+            conn.commit.side_effect = Exception("Lost connection to MySQL server")
+            index = SentAlertIndex(connect=MagicMock(return_value=conn), legacy_file=legacy_file)
+            index.claim(3, 1, 2, 'fire')
+
+            self.assertTrue(os.path.exists(legacy_file))
+
+    def test_failed_load_is_retried(self):
+        connect = MagicMock(side_effect=Exception("Can't connect to MySQL server"))
+        index = SentAlertIndex(connect=connect, legacy_file='missing.json', retry_interval=60)
+
+        # While the table can't be read, claims in this process are still remembered
+        self.assertTrue(index.claim(2, 1, 1, 'fire'))
+        self.assertFalse(index.claim(2, 1, 1, 'fire'))
+        # No new load attempt before the retry interval
+        self.assertEqual(connect.call_count, 2)
+
+        # Once the database is back the table is loaded, keeping what was claimed meanwhile
+        connect.side_effect = self.table.connect
+        index._retry_at = 0
+        self.assertFalse(index.claim(1, 1, 1, 'fire'))
+        self.assertFalse(index.claim(2, 1, 1, 'fire'))
+        self.assertTrue(index.claim(3, 1, 1, 'fire'))
+
+    @patch('backend.test.send_alert_email')
+    def test_check_and_send_unique_log_email(self, mock_send):
+        with patch.object(alerts, 'sent_alert_index', SentAlertIndex(connect=self.table.connect, legacy_file='missing.json')):
+            alerts.check_and_send_unique_log_email(4, 1, 1, 'fire')
+            alerts.check_and_send_unique_log_email(4, 1, 1, 'fire')
+
+        mock_send.assert_called_once_with(4, 1, 1, 'fire')
+
+
+class TestBuildAlertMessage(unittest.TestCase):
+    def setUp(self):
+        # A registry loaded from a CAMERA_QUERY row, as alerts see in production
+        connect = MagicMock()
+        connect.return_value.cursor.return_value.fetchall.return_value = [{
+            'id': 4, 'name': 'Gate Camera', 'rtsp_url': 'rtsp://example.com/4', 'region': 1, 'sub_region': 2,
+            'region_name': 'North', 'sub_region_name': 'Gate', 'status': 'Active', 'inference_fps': None
+        }]
+        self.patcher = patch.object(alerts, 'camera_registry', CameraRegistry(connect=connect, ttl=60))
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_message_from_registry_row(self):
+        subject, body = alerts.build_alert_message([{'camera_id': 4, 'alert_type': 'fire', 'time': '12:00:00'}])
+        self.assertEqual(subject, 'Alert: fire Detected')
+        self.assertIn('Camera: Gate Camera', body)
+        self.assertIn('Region: North', body)
+        self.assertIn('Sub-Region: Gate', body)
+
+    def test_unknown_camera_still_gets_a_message(self):
+        subject, body = alerts.build_alert_message([
+            {'camera_id': 4, 'alert_type': 'fire', 'time': '12:00:00'},
+            {'camera_id': 9, 'alert_type': 'smoke', 'time': '12:00:01'}
+        ])
+        self.assertEqual(subject, 'Alert: 2 fire/smoke Detections')
+        self.assertIn('Camera: Camera 9', body)
+        self.assertIn('Region: Unknown', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+import csv
+import json
+import tempfile
+from unittest.mock import patch
+import cv2
+import numpy as np
+
+# The Ml_Model tools are scripts rather than a package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Ml_Model'))
+import analyse_videos
+
+
+def fake_predict_frames(frames):
+    """Stand-in for the worker's model: one fire box per frame, and one low-confidence smoke box"""
+    detections = [[
+        {'type': 'fire', 'confidence': 0.9, 'box': [1.0, 2.0, 30.0, 40.0]},
+        {'type': 'smoke', 'confidence': 0.05, 'box': [0.0, 0.0, 10.0, 10.0]}
+    ] for _ in frames]
+    return os.getpid(), detections, 0.0
+
+
+class TestAnalyseVideos(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_video(self, name, frames=95, fps=10):
+        path = os.path.join(self.tmp.name, name)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (64, 48))
+        for index in range(frames):
+            writer.write(np.full((48, 64, 3), index, dtype=np.uint8))
+        writer.release()
+        return path
+
+    def test_plan_chunks(self):
+        self.assertEqual(analyse_videos.plan_chunks(95, 10, 3), [(0, 30), (30, 60), (60, 90), (90, 95)])
+        # Unknown length: one chunk read to the end
+        self.assertEqual(analyse_videos.plan_chunks(0, 25, 60), [(0, None)])
+
+    def test_find_videos_expands_directories(self):
+        first = self.write_video('a.avi')
+        os.makedirs(os.path.join(self.tmp.name, 'day2'))
+        second = self.write_video(os.path.join('day2', 'b.avi'))
+        with open(os.path.join(self.tmp.name, 'notes.txt'), 'w') as f:
+            f.write('not a video')
+
+        self.assertEqual(analyse_videos.find_videos([self.tmp.name, first]), sorted([first, second]))
+        with self.assertRaises(FileNotFoundError):
+            analyse_videos.find_videos([os.path.join(self.tmp.name, 'missing.mp4')])
+
+    @patch.object(analyse_videos, 'predict_frames', side_effect=fake_predict_frames)
+    def test_chunks_cover_the_video_once(self, mock_predict):
+        path = self.write_video('a.avi')
+        frame_count, fps = analyse_videos.probe_video(path)
+
+        rows = []
+        frames_read = 0
+        for start, end in analyse_videos.plan_chunks(frame_count, fps, 3):
+            chunk_rows, chunk_frames, _, _ = analyse_videos.analyse_chunk(path, start, end, fps, 4, 8)
+            rows.extend(chunk_rows)
+            frames_read += chunk_frames
+
+        self.assertEqual(frames_read, 95)
+        # Every 4th frame of the whole video, whichever chunk it falls in, with low-confidence boxes filtered out
+        self.assertEqual([row['frame'] for row in rows], list(range(0, 95, 4)))
+        self.assertEqual({row['type'] for row in rows}, {'fire'})
+        self.assertEqual(rows[1]['time_seconds'], 0.4)
+
+    def test_output_formats(self):
+        row = {'video': 'a.avi', 'frame': 4, 'time_seconds': 0.4, 'type': 'fire', 'confidence': 0.9,
+               'x1': 1.0, 'y1': 2.0, 'x2': 30.0, 'y2': 40.0}
+
+        jsonl_path = os.path.join(self.tmp.name, 'out.jsonl')
+        output = analyse_videos.DetectionOutput(jsonl_path)
+        output.write([row])
+        output.close()
+        with open(jsonl_path) as f:
+            self.assertEqual([json.loads(line) for line in f], [row])
+
+        csv_path = os.path.join(self.tmp.name, 'out.csv')
+        output = analyse_videos.DetectionOutput(csv_path)
+        output.write([row])
+        output.close()
+        with open(csv_path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0]['type'], 'fire')
+        self.assertEqual(rows[0]['frame'], '4')
+
+if __name__ == '__main__':
+    unittest.main()
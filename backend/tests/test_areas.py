@@ -57,7 +57,7 @@ class TestAreasBlueprint(unittest.TestCase):
     def tearDown(self):
         self.patcher.stop()
 
-    @patch('backend.blueprints.areas.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_get_regions(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -120,7 +120,7 @@ class TestAreasBlueprint(unittest.TestCase):
             # Verify the response status code
             self.assertEqual(response.status_code, 200)
 
-    @patch('backend.blueprints.areas.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_create_region(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -147,7 +147,7 @@ class TestAreasBlueprint(unittest.TestCase):
         self.assertEqual(data['data']['name'], 'New Region')
         self.assertEqual(data['data']['id'], 1)
 
-    @patch('backend.blueprints.areas.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_create_region_duplicate(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -170,8 +170,9 @@ class TestAreasBlueprint(unittest.TestCase):
         self.assertFalse(data['success'])
         self.assertEqual(data['error'], 'Region with this name already exists')
 
-    @patch('backend.blueprints.areas.routes.get_db_connection')
-    def test_update_region(self, mock_get_db):
+    @patch('backend.blueprints.areas.routes.camera_registry')
+    @patch('backend.db_session.get_db_connection')
+    def test_update_region(self, mock_get_db, mock_registry):
         # Setup mock database connection
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
@@ -192,8 +193,11 @@ class TestAreasBlueprint(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertTrue(data['success'])
+        
+        # Camera region names are cached, so the registry is told to reload
+        mock_registry.invalidate.assert_called_once()
 
-    @patch('backend.blueprints.areas.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_delete_region(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -14,7 +14,7 @@ class TestAuthBlueprint(unittest.TestCase):
         self.app.register_blueprint(auth_bp)
         self.client = self.app.test_client()
 
-    @patch('backend.blueprints.auth.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     @patch('backend.blueprints.auth.routes.bcrypt.checkpw')
     def test_login_success(self, mock_checkpw, mock_get_db):
         # Setup mock database connection
@@ -59,7 +59,7 @@ class TestAuthBlueprint(unittest.TestCase):
         self.assertEqual(decoded_token['user_id'], user_data['id'])
         self.assertEqual(decoded_token['username'], user_data['username'])
 
-    @patch('backend.blueprints.auth.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_login_invalid_credentials(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import tempfile
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+import sys
+
+# Mock the required modules
+sys.modules['ultralytics'] = MagicMock()
+sys.modules['yt_dlp'] = MagicMock()
+from backend import benchmark_pipeline
+from backend.blueprints.dashboard import camera_worker
+from backend.blueprints.dashboard.stream_profile import StreamProfile
+from backend.detection_writer import DetectionWriter
+
+
+class TestBenchmarkPipeline(unittest.TestCase):
+    def test_summarise_latencies(self):
+        summary = benchmark_pipeline.summarise_latencies([i / 1000 for i in range(1, 101)])
+        self.assertAlmostEqual(summary['p50_ms'], 50.5)
+        self.assertAlmostEqual(summary['p95_ms'], 95.0, places=0)
+        self.assertAlmostEqual(summary['p99_ms'], 99.0, places=0)
+        self.assertEqual(summary['max_ms'], 100.0)
+        # No samples, e.g. a camera that never delivered a frame
+        self.assertIsNone(benchmark_pipeline.summarise_latencies([])['p95_ms'])
+
+    def test_compare_results(self):
+        def run(fps_total, p95, rss):
+            return {'cameras': 2, 'inference_fps': 5, 'fps_total': fps_total, 'fps_min_camera': fps_total / 2,
+                    'latency': {'p95_ms': p95}, 'cpu_percent': 50.0, 'rss_mb_peak': rss}
+        baseline = {'runs': [run(30.0, 20.0, 100.0)]}
+
+        self.assertEqual(benchmark_pipeline.compare_results(baseline, {'runs': [run(29.0, 21.0, 105.0)]}, 0.1), [])
+        regressions = benchmark_pipeline.compare_results(baseline, {'runs': [run(20.0, 30.0, 100.0)]}, 0.1)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(any('p95_ms 20.0 -> 30.0' in regression for regression in regressions))
+        # Runs missing from the baseline aren't compared
+        other = dict(run(1.0, 500.0, 900.0), cameras=8)
+        self.assertEqual(benchmark_pipeline.compare_results(baseline, {'runs': [other]}, 0.1), [])
+
+    @patch.object(benchmark_pipeline, 'psutil', None)
+    @patch.object(benchmark_pipeline, 'resource', None)
+    @patch('builtins.open', side_effect=OSError)
+    def test_rss_unavailable_without_proc_psutil_or_resource(self, mock_open):
+        # As on Windows without psutil
+        self.assertIsNone(benchmark_pipeline.read_rss_mb())
+        sampler = benchmark_pipeline.ResourceSampler(interval=0.01)
+        sampler.start()
+        resources = sampler.stop()
+        self.assertIsNone(resources['rss_mb_peak'])
+        self.assertIsNone(resources['rss_mb_avg'])
+
+    def test_null_connection_discards_detections(self):
+        writer = DetectionWriter(connect=benchmark_pipeline.NullConnection, flush_interval=0.01)
+        writer.submit(1, {'type': 'fire', 'confidence': 0.9, 'detected_at': datetime.now()})
+        writer.close()
+        stats = writer.get_stats()
+        self.assertEqual(stats['rows_written'], 1)
+        self.assertEqual(stats['rows_failed'], 0)
+
+    @patch.object(camera_worker, 'STREAM_INFERENCE', False)
+    @patch.object(camera_worker, 'IDLE_GRACE_SECONDS', 0)
+    def test_run_benchmark(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fixture = benchmark_pipeline.make_fixture(
+                os.path.join(tmp, 'clip.avi'), seconds=4, fps=20, width=160, height=120
+            )
+            video = benchmark_pipeline.describe_video(fixture)
+            self.assertEqual((video['frames'], video['width'], video['height']), (80, 160, 120))
+            # The same arguments give the same clip
+            again = benchmark_pipeline.make_fixture(
+                os.path.join(tmp, 'again.avi'), seconds=4, fps=20, width=160, height=120
+            )
+            self.assertEqual(benchmark_pipeline.describe_video(again)['sha256'], video['sha256'])
+
+            result = benchmark_pipeline.run_benchmark(
+                0, [fixture], 2, 5, duration=1, warmup=0.3, profile=StreamProfile(None, 70, None)
+            )
+
+        self.assertEqual(result['cameras'], 2)
+        self.assertTrue(result['workers_stopped'])
+        self.assertEqual(len(result['camera_results']), 2)
+        for camera in result['camera_results']:
+            # The file plays at its own 20fps
+            self.assertGreater(camera['fps'], 10)
+            self.assertLess(camera['fps'], 25)
+            self.assertIsNotNone(camera['latency']['p99_ms'])
+            self.assertGreater(camera['stats']['frames_encoded'], 0)
+        self.assertGreater(result['rss_mb_peak'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
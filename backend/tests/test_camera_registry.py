@@ -0,0 +1,73 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+from backend.camera_registry import CameraRegistry
+
+
+def make_camera(camera_id, status='Active', region_name='North'):
+    return {
+        'id': camera_id, 'name': f'Camera {camera_id}', 'rtsp_url': f'rtsp://example.com/{camera_id}',
+        'region': 1, 'sub_region': 2, 'region_name': region_name, 'sub_region_name': 'Gate',
+        'status': status, 'inference_fps': None
+    }
+
+
+class TestCameraRegistry(unittest.TestCase):
+    def setUp(self):
+        self.rows = [make_camera(1), make_camera(2, status='Inactive')]
+        self.connect = MagicMock()
+        cursor = self.connect.return_value.cursor.return_value
+        cursor.fetchall.side_effect = lambda: [dict(row) for row in self.rows]
+
+    def test_lookups_are_served_from_one_load(self):
+        registry = CameraRegistry(connect=self.connect, ttl=60)
+
+        self.assertEqual(registry.get(1)['region_name'], 'North')
+        self.assertEqual(registry.get(2)['status'], 'Inactive')
+        self.assertIsNone(registry.get(3))
+        self.assertEqual([camera['id'] for camera in registry.active_cameras()], [1])
+
+        self.assertEqual(self.connect.call_count, 1)
+        self.assertEqual(registry.get_stats()['lookups'], 4)
+
+    def test_invalidate_reloads_on_next_lookup(self):
+        registry = CameraRegistry(connect=self.connect, ttl=60)
+        registry.get(1)
+
+        self.rows = [make_camera(1, region_name='South')]
+        self.assertEqual(registry.get(1)['region_name'], 'North')
+
+        registry.invalidate()
+        self.assertEqual(registry.get(1)['region_name'], 'South')
+        self.assertEqual(self.connect.call_count, 2)
+
+    def test_entries_expire_after_ttl(self):
+        registry = CameraRegistry(connect=self.connect, ttl=0)
+        registry.get(1)
+        registry.get(1)
+        self.assertEqual(self.connect.call_count, 2)
+
+    def test_callers_cannot_change_cached_rows(self):
+        registry = CameraRegistry(connect=self.connect, ttl=60)
+        registry.get(1)['name'] = 'Changed'
+        self.assertEqual(registry.get(1)['name'], 'Camera 1')
+
+    def test_concurrent_lookups_share_one_load(self):
+        release = threading.Event()
+        cursor = self.connect.return_value.cursor.return_value
+        cursor.execute.side_effect = lambda query: release.wait(timeout=5)
+        registry = CameraRegistry(connect=self.connect, ttl=60)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get(1))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.connect.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
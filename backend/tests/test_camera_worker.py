@@ -0,0 +1,141 @@
+import unittest
+import threading
+import time
+from unittest.mock import patch, MagicMock
+import sys
+import numpy as np
+import cv2
+
+# Mock the required modules
+sys.modules['ultralytics'] = MagicMock()
+sys.modules['yt_dlp'] = MagicMock()
+from backend.blueprints.dashboard import camera_worker
+from backend.blueprints.dashboard.stream_profile import StreamProfile
+
+
+def fake_process_video(frames, delay=0.01):
+    """Build a process_video replacement that yields frames whose pixels hold their number"""
+    def process_video(video_path, camera_id, run_inference=True, inference_fps=None):
+        for i in range(frames):
+            time.sleep(delay)
+            yield np.full((720, 1280, 3), i, dtype=np.uint8), time.monotonic()
+    return process_video
+
+
+def decode_chunk(chunk):
+    """Decode the JPEG inside one multipart chunk"""
+    jpeg = chunk.split(b'\r\n\r\n', 1)[1][:-2]
+    return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class TestCameraWorker(unittest.TestCase):
+    def setUp(self):
+        self.patcher = patch('backend.blueprints.dashboard.camera_worker.testing_script')
+        self.mock_testing_script = self.patcher.start()
+        camera_worker._workers.clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+        camera_worker._workers.clear()
+
+    def test_viewers_share_one_worker(self):
+        self.mock_testing_script.process_video.side_effect = fake_process_video(20)
+
+        first = camera_worker.subscribe(1, 'rtsp://example.com/camera1')
+        second = camera_worker.subscribe(1, 'rtsp://example.com/camera1')
+
+        received = {}
+
+        def consume(name, subscription):
+            received[name] = list(subscription)
+
+        threads = [
+            threading.Thread(target=consume, args=('first', first)),
+            threading.Thread(target=consume, args=('second', second))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # Only one capture/inference loop was started for both viewers
+        self.assertEqual(self.mock_testing_script.process_video.call_count, 1)
+        self.assertTrue(received['first'])
+        self.assertTrue(received['second'])
+        self.assertEqual(received['first'][-1], received['second'][-1])
+        self.assertAlmostEqual(int(decode_chunk(received['first'][-1]).mean()), 19, delta=1)
+
+    def test_profiles_are_encoded_once_per_frame(self):
+        self.mock_testing_script.process_video.side_effect = fake_process_video(20)
+        thumbnail = StreamProfile(320, 50, None)
+
+        viewers = [
+            camera_worker.subscribe(3, 'rtsp://example.com/camera3', profile=thumbnail),
+            camera_worker.subscribe(3, 'rtsp://example.com/camera3', profile=thumbnail),
+            camera_worker.subscribe(3, 'rtsp://example.com/camera3')
+        ]
+        worker = camera_worker._workers[3]
+
+        received = {}
+
+        def consume(index, subscription):
+            received[index] = list(subscription)
+
+        threads = [threading.Thread(target=consume, args=(i, viewer)) for i, viewer in enumerate(viewers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # Thumbnail viewers get a scaled-down stream, the default viewer the full frame
+        self.assertEqual(decode_chunk(received[0][-1]).shape, (180, 320, 3))
+        self.assertEqual(decode_chunk(received[2][-1]).shape, (720, 1280, 3))
+
+        # Both thumbnail viewers were served from one encode per frame
+        stats = worker.stats.snapshot()
+        sent = sum(len(chunks) for chunks in received.values())
+        self.assertEqual(stats['frames_encoded'] + stats.get('encode_cache_hits', 0), sent)
+        self.assertLessEqual(stats['frames_encoded'], 40)
+
+    def test_fps_profile_skips_frames(self):
+        self.mock_testing_script.process_video.side_effect = fake_process_video(30, delay=0.02)
+
+        slow = camera_worker.subscribe(4, 'rtsp://example.com/camera4', profile=StreamProfile(None, 80, 5))
+        fast = camera_worker.subscribe(4, 'rtsp://example.com/camera4')
+
+        received = {}
+
+        def consume(name, subscription):
+            received[name] = list(subscription)
+
+        threads = [
+            threading.Thread(target=consume, args=('slow', slow)),
+            threading.Thread(target=consume, args=('fast', fast))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # About 0.6s of frames at 5 fps
+        self.assertLessEqual(len(received['slow']), 5)
+        self.assertGreater(len(received['fast']), 20)
+
+    def test_worker_stops_after_idle_grace(self):
+        self.mock_testing_script.process_video.side_effect = fake_process_video(1000)
+
+        with patch.object(camera_worker, 'IDLE_GRACE_SECONDS', 0.05):
+            subscription = camera_worker.subscribe(2, 'rtsp://example.com/camera2')
+        worker = camera_worker._workers[2]
+        next(subscription)
+        subscription.close()
+
+        deadline = time.time() + 5
+        while not worker.stopped and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertTrue(worker.stopped)
+        self.assertNotIn(2, camera_worker._workers)
+
+if __name__ == '__main__':
+    unittest.main()
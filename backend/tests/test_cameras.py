@@ -6,6 +6,7 @@ from flask import Flask
 from unittest.mock import patch, MagicMock
 from functools import wraps
 from backend.blueprints.cameras.routes import cameras_bp
+from backend.pagination import decode_cursor, list_counts
 from flask.testing import FlaskClient
 
 # Create a custom test client class that includes an auth token
@@ -33,6 +34,8 @@ class TestCamerasBlueprint(unittest.TestCase):
         self.app = Flask(__name__)
         self.app.config['SECRET_KEY'] = 'test_secret_key'
         self.app.config['TESTING'] = True
+        # Every test counts its own cameras
+        list_counts.invalidate('cameras')
         
         # Replace the token_required decorator with a simplified version for testing
         def mock_token_decorator(f):
@@ -57,7 +60,7 @@ class TestCamerasBlueprint(unittest.TestCase):
     def tearDown(self):
         self.patcher.stop()
 
-    @patch('backend.blueprints.cameras.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_get_cameras(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -103,15 +106,78 @@ class TestCamerasBlueprint(unittest.TestCase):
         mock_cursor.fetchall.return_value = cameras_data
         
         # Test endpoint
-        response = self.client.get('/api/cameras?page=1')
+        response = self.client.get('/api/cameras')
         
         # Verify the response
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertEqual(len(data['cameras']), 2)
-        self.assertEqual(data['current_page'], 1)
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['total'], 15)
+        self.assertEqual(data['total_pages'], 2)  # 15 cameras, 10 per page = 2 pages
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn('ORDER BY c.created_at DESC, c.id DESC LIMIT %s', query)
+        self.assertEqual(params, [11])
 
-    @patch('backend.blueprints.cameras.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
+    def test_get_cameras_pages_by_keyset(self, mock_get_db):
+        mock_cursor = mock_get_db.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = {'total': 3}
+        created = datetime(2025, 3, 9, 10, 0, 0)
+        rows = [{'id': 3 - i, 'name': f'Camera {3 - i}', 'status': 'Active', 'created_at': created} for i in range(3)]
+
+        # A page of two comes back with a third row, so there is a next page
+        mock_cursor.fetchall.return_value = [dict(row) for row in rows]
+        data = self.client.get('/api/cameras?limit=2&status=Active').get_json()
+        self.assertEqual([c['id'] for c in data['cameras']], [3, 2])
+        self.assertEqual(decode_cursor(data['next'], (datetime.fromisoformat, int)), (created, 2))
+        self.assertEqual(data['total_pages'], 2)
+
+        # The next page seeks past the token, and the total isn't counted again
+        mock_cursor.reset_mock()
+        mock_cursor.fetchall.return_value = [dict(rows[2])]
+        data = self.client.get(f"/api/cameras?limit=2&status=Active&cursor={data['next']}").get_json()
+        self.assertEqual([c['id'] for c in data['cameras']], [1])
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['total'], 3)
+        mock_cursor.execute.assert_called_once()
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn('(c.created_at < %s OR (c.created_at = %s AND c.id < %s))', query)
+        self.assertNotIn('OFFSET', query)
+        self.assertEqual(params, ['Active', created, created, 2, 3])
+
+        self.assertEqual(self.client.get('/api/cameras?cursor=bad').status_code, 400)
+        self.assertEqual(self.client.get('/api/cameras?count=exactly').status_code, 400)
+
+    @patch('backend.db_session.get_db_connection')
+    def test_get_cameras_count_modes(self, mock_get_db):
+        mock_cursor = mock_get_db.return_value.cursor.return_value
+        mock_cursor.fetchall.return_value = []
+
+        # No total at all
+        data = self.client.get('/api/cameras?count=none').get_json()
+        self.assertIsNone(data['total'])
+        self.assertIsNone(data['total_pages'])
+        mock_cursor.execute.assert_called_once()
+
+        # MySQL's estimate, from the table statistics
+        mock_cursor.fetchone.return_value = {'total': 4000}
+        data = self.client.get('/api/cameras?count=approximate&limit=100').get_json()
+        self.assertEqual((data['total'], data['total_pages']), (4000, 40))
+        self.assertIn('information_schema.TABLES', mock_cursor.execute.call_args_list[1][0][0])
+
+    @patch('backend.db_session.get_db_connection')
+    def test_camera_write_drops_cached_total(self, mock_get_db):
+        mock_cursor = mock_get_db.return_value.cursor.return_value
+        mock_cursor.fetchall.return_value = []
+        mock_cursor.fetchone.return_value = {'total': 15}
+        self.client.get('/api/cameras')
+        self.client.delete('/api/cameras/1')
+
+        mock_cursor.fetchone.return_value = {'total': 14}
+        self.assertEqual(self.client.get('/api/cameras').get_json()['total'], 14)
+
+    @patch('backend.db_session.get_db_connection')
     def test_get_camera(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -148,7 +214,38 @@ class TestCamerasBlueprint(unittest.TestCase):
         self.assertEqual(data['id'], 1)
         self.assertEqual(data['name'], 'Camera 1')
 
-    @patch('backend.blueprints.cameras.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
+    def test_inference_fps_is_validated(self, mock_get_db):
+        mock_cursor = mock_get_db.return_value.cursor.return_value
+        mock_cursor.lastrowid = 1
+        mock_cursor.fetchone.return_value = {'id': 1}
+        camera_data = {
+            'name': 'New Camera',
+            'rtsp_url': 'rtsp://example.com/new_camera',
+            'region': 1,
+            'sub_region': 1,
+            'description': 'New Test Camera',
+            'access_level': 'Admin'
+        }
+
+        for value in ('abc', -2, 0, 'nan', 'inf', True):
+            response = self.client.post('/api/cameras', json=dict(camera_data, inference_fps=value))
+            self.assertEqual(response.status_code, 400, value)
+            response = self.client.put('/api/cameras/1', json={'inference_fps': value})
+            self.assertEqual(response.status_code, 400, value)
+        mock_get_db.assert_not_called()
+
+        # Numbers are stored as floats, and null or an empty form field means the default rate
+        response = self.client.post('/api/cameras', json=dict(camera_data, inference_fps='2.5'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mock_cursor.execute.call_args[0][1][7], 2.5)
+        response = self.client.post('/api/cameras', json=dict(camera_data, inference_fps=''))
+        self.assertIsNone(mock_cursor.execute.call_args[0][1][7])
+        response = self.client.put('/api/cameras/1', json={'inference_fps': None})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_cursor.execute.call_args[0][1], (None, 1))
+
+    @patch('backend.db_session.get_db_connection')
     def test_create_camera(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -181,8 +278,9 @@ class TestCamerasBlueprint(unittest.TestCase):
         self.assertEqual(data['message'], 'Camera added successfully')
         self.assertEqual(data['camera_id'], 1)
 
-    @patch('backend.blueprints.cameras.routes.get_db_connection')
-    def test_update_camera(self, mock_get_db):
+    @patch('backend.blueprints.cameras.routes.camera_registry')
+    @patch('backend.db_session.get_db_connection')
+    def test_update_camera(self, mock_get_db, mock_registry):
         # Setup mock database connection
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
@@ -213,8 +311,11 @@ class TestCamerasBlueprint(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertEqual(data['message'], 'Camera updated successfully')
+        
+        # The in-process camera registry is told to reload
+        mock_registry.invalidate.assert_called_once()
 
-    @patch('backend.blueprints.cameras.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_delete_camera(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -12,7 +12,9 @@ import sys
 sys.modules['ultralytics'] = MagicMock()
 sys.modules['yt_dlp'] = MagicMock()
 # Now we can safely import the dashboard_bp
-from backend.blueprints.dashboard.routes import dashboard_bp
+from backend.blueprints.dashboard.routes import dashboard_bp, format_detection_time
+from backend.blueprints.dashboard.stream_routes import stream_bp
+from backend.pagination import PAGE_SIZE_MAX
 # Also mock flask_cors
 from flask_cors import cross_origin
 
@@ -27,10 +29,6 @@ class TestDashboardBlueprint(unittest.TestCase):
         self.mock_cross_origin = self.patcher.start()
         self.mock_cross_origin.return_value = lambda f: f  # Make it a pass-through decorator
         
-        # Mock the testing_script module
-        self.patcher2 = patch('backend.blueprints.dashboard.routes.testing_script')
-        self.mock_testing_script = self.patcher2.start()
-        
         # Register the blueprint after patching
         self.app.register_blueprint(dashboard_bp)
         
@@ -39,15 +37,15 @@ class TestDashboardBlueprint(unittest.TestCase):
         
     def tearDown(self):
         self.patcher.stop()
-        self.patcher2.stop()
 
-    def test_cameras(self):
+    @patch('backend.blueprints.dashboard.routes.get_camera_feeds')
+    def test_cameras(self, mock_get_camera_feeds):
         # Setup mock camera feeds
         camera_feeds = [
             {"id": 1, "name": "Camera 1", "url": "rtsp://example.com/camera1"},
             {"id": 2, "name": "Camera 2", "url": "rtsp://example.com/camera2"}
         ]
-        self.mock_testing_script.get_camera_feeds.return_value = camera_feeds
+        mock_get_camera_feeds.return_value = camera_feeds
         
         # Test endpoint
         response = self.client.get('/api/cameras')
@@ -69,9 +67,6 @@ class TestDashboardBlueprint(unittest.TestCase):
         mock_conn.cursor.return_value = mock_cursor
         mock_get_db.return_value = mock_conn
         
-        # Create a real datetime object
-        now = datetime.now()
-        
         # Setup mock query results
         detections_data = [
             {
@@ -82,8 +77,7 @@ class TestDashboardBlueprint(unittest.TestCase):
                 'sub_region_name': 'Sub Region 1',
                 'alert_type': 'Person',
                 'confidence': 0.95,
-                'time_stamp': '10:30:00',
-                'date_created': now.strftime('%Y-%m-%d')
+                'detected_at': datetime(2025, 3, 9, 10, 35, 0, 120000)
             },
             {
                 'id': 2,
@@ -93,8 +87,7 @@ class TestDashboardBlueprint(unittest.TestCase):
                 'sub_region_name': 'Sub Region 2',
                 'alert_type': 'Vehicle',
                 'confidence': 0.88,
-                'time_stamp': '10:35:00',
-                'date_created': now.strftime('%Y-%m-%d')
+                'detected_at': datetime(2025, 3, 9, 10, 30, 0)
             }
         ]
         
@@ -107,6 +100,8 @@ class TestDashboardBlueprint(unittest.TestCase):
         # Verify the response
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
+        self.assertIsNone(data['next'])
+        data = data['detections']
         self.assertEqual(len(data), 2)
         self.assertEqual(data[0]['id'], 1)
         self.assertEqual(data[0]['camera_name'], 'Camera 1')
@@ -114,6 +109,195 @@ class TestDashboardBlueprint(unittest.TestCase):
         self.assertEqual(data[1]['id'], 2)
         self.assertEqual(data[1]['camera_name'], 'Camera 2')
         self.assertEqual(data[1]['alert_type'], 'Vehicle')
+        # detected_at is returned as ISO 8601, with the time and date strings the dashboard shows
+        self.assertEqual(data[0]['detected_at'], '2025-03-09T10:35:00.120')
+        self.assertEqual(data[0]['time_stamp'], '10:35:00')
+        self.assertEqual(data[0]['date_created'], '09/03/25')
+        query = mock_cursor.execute.call_args[0][0]
+        self.assertIn('ORDER BY d.detected_at DESC', query)
+
+    @patch('backend.blueprints.dashboard.routes.get_db_connection')
+    def test_get_detections_date_filter_is_a_range(self, mock_get_db):
+        mock_cursor = mock_get_db.return_value.cursor.return_value
+        mock_cursor.fetchall.return_value = []
+
+        response = self.client.get('/api/detections?date=09/03/25&alert_type=fire')
+        self.assertEqual(response.status_code, 200)
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn('d.detected_at >= %s AND d.detected_at < %s', query)
+        self.assertEqual(params, ['fire', datetime(2025, 3, 9), datetime(2025, 3, 10), 101])
+
+        # ISO dates work too; anything else is rejected before querying
+        self.client.get('/api/detections?date=2025-03-09')
+        self.assertEqual(mock_cursor.execute.call_args[0][1], [datetime(2025, 3, 9), datetime(2025, 3, 10), 101])
+        mock_get_db.reset_mock()
+        response = self.client.get('/api/detections?date=yesterday')
+        self.assertEqual(response.status_code, 400)
+        mock_get_db.assert_not_called()
+
+    @patch('backend.blueprints.dashboard.routes.get_db_connection')
+    def test_get_detections_pages_by_keyset(self, mock_get_db):
+        mock_cursor = mock_get_db.return_value.cursor.return_value
+        rows = [
+            {'id': 9 - i, 'camera_id': 1, 'camera_name': 'Camera 1', 'region_name': 'Region 1',
+             'sub_region_name': 'Sub Region 1', 'alert_type': 'fire', 'confidence': 0.9,
+             'detected_at': datetime(2025, 3, 9, 10, 0, 0) - timedelta(seconds=i)}
+            for i in range(3)
+        ]
+        # A page of two comes back with a third row, so there is a next page
+        mock_cursor.fetchall.return_value = [dict(row) for row in rows]
+        data = self.client.get('/api/detections?limit=2').get_json()
+        self.assertEqual([d['id'] for d in data['detections']], [9, 8])
+        self.assertTrue(data['next'])
+        self.assertEqual(mock_cursor.execute.call_args[0][1], [3])
+
+        # The token picks up after the last row, with no OFFSET
+        mock_cursor.fetchall.return_value = [dict(rows[2])]
+        data = self.client.get(f"/api/detections?limit=2&alert_type=fire&cursor={data['next']}").get_json()
+        self.assertEqual([d['id'] for d in data['detections']], [7])
+        self.assertIsNone(data['next'])
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn('(d.detected_at < %s OR (d.detected_at = %s AND d.id < %s))', query)
+        self.assertNotIn('OFFSET', query)
+        self.assertEqual(params, ['fire', rows[1]['detected_at'], rows[1]['detected_at'], 8, 3])
+
+        # Rows fetched again are still raw rows, so the same result set can be served twice
+        mock_cursor.fetchall.return_value = rows
+        data = self.client.get('/api/detections?limit=2').get_json()
+        self.client.get('/api/detections?limit=2')
+        self.assertEqual(rows[0]['detected_at'], datetime(2025, 3, 9, 10, 0, 0))
+        self.assertEqual(data['detections'][0]['detected_at'], '2025-03-09T10:00:00.000')
+
+        # Page sizes are capped, and bad sizes or tokens are rejected before querying
+        self.assertEqual(self.client.get('/api/detections?limit=100000').status_code, 200)
+        self.assertEqual(mock_cursor.execute.call_args[0][1], [PAGE_SIZE_MAX + 1])
+        mock_get_db.reset_mock()
+        self.assertEqual(self.client.get('/api/detections?limit=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/detections?cursor=not-a-token').status_code, 400)
+        mock_get_db.assert_not_called()
+
+
+    @patch('backend.blueprints.dashboard.routes.get_db_connection')
+    def test_rows_without_detected_at_are_left_out(self, mock_get_db):
+        mock_cursor = mock_get_db.return_value.cursor.return_value
+        mock_cursor.fetchall.return_value = []
+
+        # Rows migrate_detections.py hasn't backfilled yet are filtered out of the list and the PDF
+        self.assertEqual(self.client.get('/api/detections').status_code, 200)
+        self.assertIn('d.detected_at IS NOT NULL', mock_cursor.execute.call_args[0][0])
+        self.client.get('/api/detections/download-pdf?alert_type=fire')
+        self.assertIn('d.detected_at IS NOT NULL AND d.alert_type = %s', mock_cursor.execute.call_args[0][0])
+
+    def test_format_detection_time_without_detected_at(self):
+        row = {'id': 3, 'alert_type': 'fire', 'detected_at': None}
+        detection = format_detection_time(row)
+        self.assertIsNone(detection['detected_at'])
+        self.assertIsNone(detection['time_stamp'])
+        self.assertIsNone(detection['date_created'])
+        self.assertEqual(detection['id'], 3)
+
+class TestStreamBlueprint(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['TESTING'] = True
+        
+        # Mock the testing_script module
+        self.patcher = patch('backend.blueprints.dashboard.stream_routes.testing_script')
+        self.mock_testing_script = self.patcher.start()
+        
+        self.app.register_blueprint(stream_bp)
+        self.client = self.app.test_client()
+        
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_pipeline_stats(self):
+        self.mock_testing_script.get_pipeline_stats.return_value = {
+            'inference_batching': {'batches': 3, 'avg_batch_size': 2.5}
+        }
+        
+        # Test endpoint
+        response = self.client.get('/api/pipeline/stats')
+        
+        # Verify the response
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['inference_batching']['batches'], 3)
+
+    @patch('backend.blueprints.dashboard.stream_routes.get_camera_by_id')
+    @patch('backend.blueprints.dashboard.stream_routes.camera_worker')
+    def test_video_feed_stream_profile(self, mock_camera_worker, mock_get_camera_by_id):
+        mock_get_camera_by_id.return_value = {
+            'id': 1, 'rtsp_url': 'rtsp://example.com/camera1', 'inference_fps': None
+        }
+        mock_camera_worker.subscribe.return_value = iter([b'--frame\r\n'])
+        
+        # Test endpoint
+        response = self.client.get('/video_feed/1?width=480&quality=70&fps=10')
+        
+        # Verify the viewer was subscribed with the requested profile
+        self.assertEqual(response.status_code, 200)
+        profile = mock_camera_worker.subscribe.call_args[1]['profile']
+        self.assertEqual((profile.width, profile.quality, profile.fps), (480, 70, 10.0))
+        
+        # Invalid values are rejected before touching the camera
+        response = self.client.get('/video_feed/1?width=wide')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/video_feed/1?fps=nan')
+        self.assertEqual(response.status_code, 400)
+
+    @patch('backend.blueprints.dashboard.stream_routes.snapshot')
+    @patch('backend.blueprints.dashboard.stream_routes.camera_registry')
+    def test_camera_snapshot(self, mock_registry, mock_snapshot):
+        from backend.blueprints.dashboard.snapshot import Snapshot
+        mock_registry.get.return_value = {'id': 1, 'rtsp_url': 'rtsp://example.com/camera1', 'status': 'Active'}
+        mock_snapshot.get_snapshot.return_value = Snapshot(b'\xff\xd8jpeg', 'abc123', 1700000000.5, 'live')
+        
+        # Test endpoint
+        response = self.client.get('/api/cameras/1/snapshot.jpg?width=160')
+        
+        # Verify the response carries validators browsers can poll with
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/jpeg')
+        self.assertEqual(response.data, b'\xff\xd8jpeg')
+        self.assertEqual(response.headers['ETag'], '"abc123"')
+        self.assertEqual(response.headers['Last-Modified'], 'Tue, 14 Nov 2023 22:13:20 GMT')
+        self.assertEqual(mock_snapshot.get_snapshot.call_args[0][2].width, 160)
+        self.assertTrue(mock_snapshot.get_snapshot.call_args[1]['allow_grab'])
+        
+        # An unchanged frame is answered without a body
+        response = self.client.get('/api/cameras/1/snapshot.jpg', headers={'If-None-Match': '"abc123"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        
+        # No frame could be read
+        mock_snapshot.get_snapshot.return_value = None
+        response = self.client.get('/api/cameras/1/snapshot.jpg')
+        self.assertEqual(response.status_code, 503)
+        
+        # Inactive cameras are never opened just for a snapshot
+        mock_registry.get.return_value = {'id': 1, 'rtsp_url': 'rtsp://example.com/camera1', 'status': 'Inactive'}
+        self.client.get('/api/cameras/1/snapshot.jpg')
+        self.assertFalse(mock_snapshot.get_snapshot.call_args[1]['allow_grab'])
+        
+        # Unknown camera
+        mock_registry.get.return_value = None
+        response = self.client.get('/api/cameras/2/snapshot.jpg')
+        self.assertEqual(response.status_code, 404)
+
+
+class TestCreateApp(unittest.TestCase):
+    def test_api_only_leaves_out_streaming_routes(self):
+        from backend.app import create_app
+        
+        rules = {rule.rule for rule in create_app(api_only=True).url_map.iter_rules()}
+        self.assertIn('/api/detections', rules)
+        self.assertNotIn('/video_feed/<int:camera_id>', rules)
+        
+        rules = {rule.rule for rule in create_app(api_only=False).url_map.iter_rules()}
+        self.assertIn('/video_feed/<int:camera_id>', rules)
+        self.assertIn('/api/pipeline/stats', rules)
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
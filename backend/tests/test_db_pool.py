@@ -0,0 +1,170 @@
+import unittest
+import gc
+import threading
+import time
+from unittest.mock import patch
+from mysql.connector import Error
+from backend import utils
+from backend.db_pool import ConnectionPool
+
+
+class FakeConnection:
+    """Stand-in for a MySQL connection that records what the pool does with it"""
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.unread_result = False
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.alive:
+            raise Error("Lost connection to MySQL server")
+
+    def consume_results(self):
+        self.unread_result = False
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def cursor(self):
+        return 'cursor'
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+    def create_pool(self, **kwargs):
+        kwargs.setdefault('size', 2)
+        kwargs.setdefault('timeout', 0.2)
+        return ConnectionPool(self.connect, **kwargs)
+
+    def test_reuses_returned_connections(self):
+        pool = self.create_pool()
+        conn = pool.get()
+        self.assertTrue(conn.is_connected())
+        # Everything but close goes to the real connection
+        self.assertEqual(conn.cursor(), 'cursor')
+        conn.close()
+        self.assertFalse(conn.is_connected())
+        conn.close()
+
+        again = pool.get()
+        again.close()
+        self.assertEqual(len(self.opened), 1)
+        self.assertFalse(self.opened[0].closed)
+        stats = pool.get_stats()
+        self.assertEqual((stats['checkouts'], stats['connects'], stats['open'], stats['idle']), (2, 1, 1, 1))
+
+    def test_resets_connection_on_return(self):
+        pool = self.create_pool()
+        conn = pool.get()
+        self.opened[0].in_transaction = True
+        self.opened[0].unread_result = True
+        conn.close()
+        # A SELECT's open snapshot must not leak into the next borrower
+        self.assertEqual(self.opened[0].rollbacks, 1)
+        self.assertFalse(self.opened[0].unread_result)
+
+    def test_waits_then_reports_exhaustion(self):
+        pool = self.create_pool(size=1)
+        conn = pool.get()
+        with self.assertRaises(TimeoutError):
+            pool.get()
+        self.assertEqual(pool.get_stats()['exhausted'], 1)
+
+        # A waiting caller gets the connection as soon as it is returned
+        threading.Timer(0.05, conn.close).start()
+        second = pool.get()
+        second.close()
+        stats = pool.get_stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['max_wait_ms'], 0)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_replaces_connection_failing_health_check(self):
+        pool = self.create_pool(ping_idle=0)
+        pool.get().close()
+        self.opened[0].alive = False
+
+        conn = pool.get()
+        self.assertTrue(self.opened[0].closed)
+        self.assertEqual(len(self.opened), 2)
+        conn.close()
+        self.assertEqual(pool.get_stats()['health_check_failures'], 1)
+        self.assertEqual(pool.get_stats()['open'], 1)
+
+    def test_recently_used_connection_is_not_pinged(self):
+        pool = self.create_pool(ping_idle=60)
+        pool.get().close()
+        pool.get().close()
+        self.assertEqual(self.opened[0].pings, 0)
+
+    def test_expires_connections_past_max_lifetime(self):
+        pool = self.create_pool(max_lifetime=0.05)
+        pool.get().close()
+        time.sleep(0.06)
+        pool.get().close()
+        self.assertTrue(self.opened[0].closed)
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(pool.get_stats()['expired'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(lambda: (_ for _ in ()).throw(Error("Can't connect")), size=1, timeout=0.1)
+        for _ in range(2):
+            with self.assertRaises(Error):
+                pool.get()
+        self.assertEqual(pool.get_stats()['open'], 0)
+
+    def test_leaked_connection_frees_slot(self):
+        pool = self.create_pool(size=1)
+        pool.get()
+        gc.collect()
+        # The dropped connection is closed, not reused, and its slot is free again
+        pool.get().close()
+        self.assertTrue(self.opened[0].closed)
+        self.assertEqual(pool.get_stats()['leaked'], 1)
+
+    def test_unpooled(self):
+        pool = self.create_pool(size=0)
+        conn = pool.get()
+        self.assertIs(conn, self.opened[0])
+        conn.close()
+        self.assertTrue(conn.closed)
+
+
+class TestGetDbConnection(unittest.TestCase):
+    @patch('backend.utils.mysql.connector.connect')
+    def test_error_mapping(self, mock_connect):
+        error = Error(msg="Access denied", errno=1045)
+        mock_connect.side_effect = error
+        with patch.object(utils, 'db_pool', ConnectionPool(utils.connect_database, size=1)):
+            with self.assertRaises(Error) as context:
+                utils.get_db_connection()
+        self.assertIn('Access denied', str(context.exception))
+
+    def test_exhausted_pool(self):
+        pool = ConnectionPool(FakeConnection, size=1, timeout=0.01)
+        with patch.object(utils, 'db_pool', pool):
+            conn = utils.get_db_connection()
+            with self.assertRaises(Error) as context:
+                utils.get_db_connection()
+            conn.close()
+        self.assertIn('pool exhausted', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
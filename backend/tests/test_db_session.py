@@ -0,0 +1,113 @@
+import unittest
+from flask import Flask, Blueprint, jsonify
+from unittest.mock import patch, MagicMock
+from backend import db_session
+
+
+def create_app(transactional=False):
+    """An app with one blueprint whose routes use the request's database session"""
+    bp = Blueprint('session_test', __name__)
+    bp.record_once(db_session.register_blueprint_session)
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    after_commit = MagicMock()
+
+    @bp.route('/none')
+    def no_queries():
+        db_session.get_db()
+        return jsonify({})
+
+    @bp.route('/read')
+    def read():
+        conn = db_session.get_db()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute('SELECT 1')
+        cursor.execute('SELECT 2')
+        other = conn.cursor()
+        other.execute('SELECT 3')
+        return jsonify({'rows': cursor.fetchall()})
+
+    @bp.route('/write/<int:status>')
+    def write(status):
+        conn = db_session.get_db()
+        conn.transactional = transactional
+        conn.cursor().execute('UPDATE cameras SET name = %s', ('a',))
+        conn.commit()
+        conn.on_commit(after_commit)
+        return jsonify({}), status
+
+    app.register_blueprint(bp)
+    return app, after_commit
+
+
+@patch('backend.db_session.get_db_connection')
+class TestDatabaseSession(unittest.TestCase):
+    def setUp(self):
+        self.conn = MagicMock()
+        self.cursor = MagicMock()
+        self.cursor.fetchall.return_value = [{'id': 1}]
+        self.conn.cursor.return_value = self.cursor
+
+    def test_no_queries_no_checkout(self, mock_get_db):
+        app, _ = create_app()
+        self.assertEqual(app.test_client().get('/none').status_code, 200)
+        mock_get_db.assert_not_called()
+        stats = db_session.query_stats.get_stats()['session_test.no_queries']
+        self.assertEqual(stats['checkouts'], 0)
+
+    def test_one_checkout_per_request(self, mock_get_db):
+        mock_get_db.return_value = self.conn
+        app, _ = create_app()
+        client = app.test_client()
+        before = db_session.query_stats.get_stats().get('session_test.read', {'requests': 0, 'queries': 0})
+
+        response = client.get('/read')
+        self.assertEqual(response.get_json(), {'rows': [{'id': 1}]})
+        # Both cursors share one borrowed connection, and everything is released at the end
+        mock_get_db.assert_called_once()
+        self.assertEqual(self.conn.cursor.call_count, 2)
+        self.conn.cursor.assert_any_call(dictionary=True)
+        self.assertEqual(self.cursor.close.call_count, 2)
+        self.conn.close.assert_called_once()
+
+        stats = db_session.query_stats.get_stats()['session_test.read']
+        self.assertEqual(stats['requests'] - before['requests'], 1)
+        self.assertEqual(stats['queries'] - before['queries'], 3)
+        self.assertEqual(stats['max_queries'], 3)
+
+    def test_commit_without_transaction(self, mock_get_db):
+        mock_get_db.return_value = self.conn
+        app, after_commit = create_app()
+        app.test_client().get('/write/200')
+        self.conn.commit.assert_called_once()
+        after_commit.assert_called_once()
+
+    def test_transaction_commits_when_request_succeeds(self, mock_get_db):
+        mock_get_db.return_value = self.conn
+        app, after_commit = create_app(transactional=True)
+        app.test_client().get('/write/201')
+        self.conn.commit.assert_called_once()
+        self.conn.rollback.assert_not_called()
+        after_commit.assert_called_once()
+
+    def test_transaction_rolls_back_error_response(self, mock_get_db):
+        mock_get_db.return_value = self.conn
+        app, after_commit = create_app(transactional=True)
+        app.test_client().get('/write/400')
+        self.conn.commit.assert_not_called()
+        self.conn.rollback.assert_called_once()
+        after_commit.assert_not_called()
+
+    def test_failed_commit_becomes_error_response(self, mock_get_db):
+        self.conn.commit.side_effect = Exception("Deadlock found")
+        mock_get_db.return_value = self.conn
+        app, after_commit = create_app(transactional=True)
+        response = app.test_client().get('/write/200')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json(), {'error': 'Database error'})
+        after_commit.assert_not_called()
+        self.conn.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
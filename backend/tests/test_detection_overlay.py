@@ -0,0 +1,76 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+import sys
+
+# Mock the required modules
+sys.modules['ultralytics'] = MagicMock()
+sys.modules['yt_dlp'] = MagicMock()
+from backend.blueprints.dashboard.detection_overlay import DetectionOverlay, DisplayPacer
+
+
+class TestDetectionOverlay(unittest.TestCase):
+    def test_latest_detections_are_kept_between_inferences(self):
+        release = threading.Event()
+        finished = threading.Event()
+
+        def analyse(frame, camera_id):
+            release.wait(timeout=5)
+            finished.set()
+            return [{'type': 'fire', 'confidence': 0.9, 'box': [0, 0, 10, 10], 'frame': frame}]
+
+        overlay = DetectionOverlay(analyse, camera_id=1)
+        self.assertEqual(overlay.latest(), ([], None))
+
+        self.assertTrue(overlay.submit('frame1'))
+        # Frames arriving while the model is busy are not queued
+        self.assertTrue(overlay.busy)
+        self.assertFalse(overlay.submit('frame2'))
+
+        release.set()
+        finished.wait(timeout=5)
+        for _ in range(100):
+            if not overlay.busy:
+                break
+            threading.Event().wait(0.01)
+
+        detections, updated_at = overlay.latest()
+        self.assertEqual(detections[0]['frame'], 'frame1')
+        self.assertIsNotNone(updated_at)
+        self.assertFalse(overlay.busy)
+
+    def test_failed_inference_keeps_previous_boxes(self):
+        calls = []
+
+        def analyse(frame, camera_id):
+            calls.append(frame)
+            if frame == 'bad':
+                raise RuntimeError('model failed')
+            return [{'type': 'smoke', 'confidence': 0.5, 'box': [0, 0, 1, 1]}]
+
+        overlay = DetectionOverlay(analyse, camera_id=1)
+        for frame in ('good', 'bad'):
+            overlay.submit(frame)
+            for _ in range(100):
+                if not overlay.busy:
+                    break
+                threading.Event().wait(0.01)
+
+        self.assertEqual(calls, ['good', 'bad'])
+        self.assertEqual(overlay.latest()[0][0]['type'], 'smoke')
+
+
+class TestDisplayPacer(unittest.TestCase):
+    def test_limits_frames_to_display_rate(self):
+        pacer = DisplayPacer(fps=10)
+        shown = [now for now in [i * 0.025 for i in range(40)] if pacer.is_due(now=100 + now)]
+
+        # One second of 40 fps input comes out at 10 fps
+        self.assertEqual(len(shown), 10)
+
+    def test_zero_fps_passes_every_frame(self):
+        pacer = DisplayPacer(fps=0)
+        self.assertTrue(all(pacer.is_due(now=1.0) for _ in range(5)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+
+# Mock the required modules
+sys.modules['ultralytics'] = MagicMock()
+sys.modules['yt_dlp'] = MagicMock()
+from backend import detection_service
+
+
+class TestDetectionService(unittest.TestCase):
+    @patch('backend.detection_service.CameraDetector')
+    def test_sync_detectors(self, mock_detector_class):
+        mock_detector_class.side_effect = lambda camera: MagicMock(rtsp_url=camera['rtsp_url'])
+
+        removed = MagicMock(rtsp_url='rtsp://example.com/old')
+        changed = MagicMock(rtsp_url='rtsp://example.com/camera2')
+        kept = MagicMock(rtsp_url='rtsp://example.com/camera3')
+        detectors = {1: removed, 2: changed, 3: kept}
+
+        cameras = [
+            {'id': 2, 'rtsp_url': 'rtsp://example.com/camera2-moved'},
+            {'id': 3, 'rtsp_url': 'rtsp://example.com/camera3'},
+            {'id': 4, 'rtsp_url': 'rtsp://example.com/camera4'}
+        ]
+        detection_service.sync_detectors(detectors, cameras)
+
+        # Removed and changed cameras are stopped, unchanged ones are left running
+        removed.stop.assert_called_once()
+        changed.stop.assert_called_once()
+        kept.stop.assert_not_called()
+        self.assertIs(detectors[3], kept)
+
+        # New and changed cameras get a fresh detector
+        self.assertEqual(sorted(detectors), [2, 3, 4])
+        self.assertEqual(detectors[2].rtsp_url, 'rtsp://example.com/camera2-moved')
+        detectors[4].start.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+from backend.detection_writer import DetectionWriter
+
+DETECTED_AT = datetime(2025, 1, 1, 12, 0, 0, 250000)
+
+
+def make_detection(alert_type='fire', confidence=0.9):
+    return {'type': alert_type, 'confidence': confidence, 'detected_at': DETECTED_AT}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestDetectionWriter(unittest.TestCase):
+    def setUp(self):
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.connect = MagicMock(return_value=self.conn)
+
+    def test_rows_from_many_cameras_share_one_insert(self):
+        flushed = []
+        writer = DetectionWriter(connect=self.connect, flush_size=10, flush_interval=0.2, after_flush=flushed.append)
+        for camera_id in range(1, 6):
+            writer.submit(camera_id, make_detection())
+
+        self.assertTrue(wait_for(lambda: flushed))
+        writer.close()
+
+        # One executemany over one connection for all five rows
+        self.cursor.executemany.assert_called_once()
+        rows = self.cursor.executemany.call_args[0][1]
+        self.assertEqual([row[0] for row in rows], [1, 2, 3, 4, 5])
+        self.assertEqual(rows[0][1:], ('fire', 0.9, DETECTED_AT, None))
+        self.connect.assert_called_once()
+        # The connection went back to the pool once the batch was written
+        self.conn.close.assert_called_once()
+
+        stats = writer.get_stats()
+        self.assertEqual(stats['rows_written'], 5)
+        self.assertEqual(stats['flushes'], 1)
+        self.assertEqual(stats['last_flush_size'], 5)
+
+    def test_full_queue_drops_newest_rows(self):
+        release = threading.Event()
+        self.cursor.executemany.side_effect = lambda query, rows: release.wait(timeout=5)
+        writer = DetectionWriter(connect=self.connect, max_queue=2, flush_size=1, flush_interval=0.01)
+
+        # The first row is taken by the writer and blocks in the database
+        writer.submit(1, make_detection())
+        self.assertTrue(wait_for(lambda: self.cursor.executemany.called))
+
+        results = [writer.submit(1, make_detection()) for _ in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(writer.get_stats()['rows_dropped'], 2)
+
+        release.set()
+        writer.close()
+        self.assertEqual(writer.get_stats()['rows_written'], 3)
+
+    def test_full_queue_drops_oldest_rows(self):
+        release = threading.Event()
+        self.cursor.executemany.side_effect = lambda query, rows: release.wait(timeout=5)
+        writer = DetectionWriter(connect=self.connect, max_queue=2, flush_size=1, flush_interval=0.01,
+                                 overflow='drop_oldest')
+
+        writer.submit(1, make_detection())
+        self.assertTrue(wait_for(lambda: self.cursor.executemany.called))
+
+        results = [writer.submit(camera_id, make_detection()) for camera_id in (2, 3, 4)]
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(writer.get_stats()['rows_dropped'], 1)
+
+        release.set()
+        writer.close()
+        written = [call[0][1][0][0] for call in self.cursor.executemany.call_args_list]
+        self.assertEqual(written, [1, 3, 4])
+
+    def test_failed_flush_is_retried_then_counted(self):
+        self.cursor.executemany.side_effect = Exception('database down')
+        writer = DetectionWriter(connect=self.connect, flush_size=10, flush_interval=0.01)
+        writer.submit(1, make_detection())
+
+        self.assertTrue(wait_for(lambda: writer.get_stats()['rows_failed'] == 1))
+        writer.close()
+
+        # Retried once on a fresh connection, returning both
+        self.assertEqual(self.connect.call_count, 2)
+        self.assertEqual(self.conn.close.call_count, 2)
+        self.assertEqual(writer.get_stats()['rows_written'], 0)
+
+    def test_each_flush_borrows_a_connection(self):
+        flushed = []
+        writer = DetectionWriter(connect=self.connect, flush_size=1, flush_interval=0.01, after_flush=flushed.append)
+        writer.submit(1, make_detection())
+        self.assertTrue(wait_for(lambda: len(flushed) == 1))
+        # Nothing is held between flushes
+        self.assertEqual(self.conn.close.call_count, 1)
+        writer.submit(2, make_detection())
+        self.assertTrue(wait_for(lambda: len(flushed) == 2))
+        writer.close()
+
+        self.assertEqual(self.connect.call_count, 2)
+        self.assertEqual(self.conn.close.call_count, 2)
+        self.conn.ping.assert_not_called()
+
+    def test_track_peaks_update_the_track_row(self):
+        flushed = []
+        writer = DetectionWriter(connect=self.connect, flush_size=10, flush_interval=0.2, after_flush=flushed.append)
+        writer.submit(1, dict(make_detection(confidence=0.6), track_id=42, event='new'))
+        writer.submit(1, dict(make_detection(confidence=0.8), track_id=42, event='peak'))
+
+        self.assertTrue(wait_for(lambda: flushed))
+        writer.close()
+
+        # The insert runs before the update in the same flush
+        (insert_query, inserts), (update_query, updates) = [call[0] for call in self.cursor.executemany.call_args_list]
+        self.assertIn('INSERT', insert_query)
+        self.assertEqual(inserts, [(1, 'fire', 0.6, DETECTED_AT, 42)])
+        self.assertIn('UPDATE', update_query)
+        self.assertEqual(updates, [(0.8, 1, 42)])
+
+        # Only new rows are handed on for alerts
+        self.assertEqual(flushed, [inserts])
+        stats = writer.get_stats()
+        self.assertEqual((stats['rows_written'], stats['rows_updated']), (1, 1))
+
+    def test_unknown_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            DetectionWriter(connect=self.connect, overflow='explode')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import threading
+import time
+from backend.blueprints.dashboard.frame_grabber import grab_latest_frames
+from backend.blueprints.dashboard.pipeline_stats import CameraStats
+
+
+def gated_source(count, gate):
+    """Yield frame 0, then the remaining numbered frames as fast as possible once gate is set"""
+    yield 0, time.monotonic()
+    gate.wait()
+    for i in range(1, count):
+        yield i, time.monotonic()
+
+
+class TestFrameGrabber(unittest.TestCase):
+    def test_slow_consumer_gets_newest_frame(self):
+        stats = CameraStats()
+        gate = threading.Event()
+        frames = grab_latest_frames(gated_source(200, gate), 1, stats=stats)
+
+        first_frame, _ = next(frames)
+        self.assertEqual(first_frame, 0)
+
+        # Let the reader drain the rest of the source while we are "busy"
+        gate.set()
+        time.sleep(0.2)
+        remaining = [frame for frame, _ in frames]
+
+        # The backlog was skipped and the newest frame delivered
+        self.assertEqual(remaining[-1], 199)
+        self.assertLess(len(remaining), 199)
+        self.assertGreater(stats.snapshot()['frames_dropped'], 0)
+
+    def test_source_is_closed_when_consumer_stops(self):
+        closed = []
+
+        def source():
+            try:
+                while True:
+                    yield 'frame', time.monotonic()
+                    time.sleep(0.001)
+            finally:
+                closed.append(True)
+
+        frames = grab_latest_frames(source(), 1)
+        next(frames)
+        frames.close()
+
+        deadline = time.time() + 5
+        while not closed and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,277 @@
+import unittest
+import os
+import queue
+import multiprocessing
+import threading
+from unittest.mock import patch, MagicMock
+import sys
+import numpy as np
+
+# Mock the required modules
+sys.modules['ultralytics'] = MagicMock()
+sys.modules['yt_dlp'] = MagicMock()
+from backend import inference_worker
+from backend.blueprints.dashboard import inference, testing_script
+from backend.blueprints.dashboard.inference import InferenceScheduler, ProcessPoolBackend
+from backend.blueprints.dashboard.rate_control import InferenceRateController
+from backend.inference_worker import ModelLoader, filter_detections, get_model_path, init_worker
+
+
+class TestInferenceScheduler(unittest.TestCase):
+    def test_frames_from_many_cameras_share_a_batch(self):
+        batches = []
+
+        def predict_batch(frames):
+            batches.append(list(frames))
+            return [f"result-{frame}" for frame in frames]
+
+        scheduler = InferenceScheduler(predict_batch, max_batch_size=4, max_wait=0.5)
+
+        results = {}
+
+        def predict(camera_id):
+            results[camera_id] = scheduler.predict(camera_id, f"frame{camera_id}")
+
+        threads = [threading.Thread(target=predict, args=(camera_id,)) for camera_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # Every camera gets back the result for its own frame
+        for camera_id in range(4):
+            self.assertEqual(results[camera_id], f"result-frame{camera_id}")
+
+        # All four frames went through the model in a single call
+        self.assertEqual(len(batches), 1)
+        stats = scheduler.get_stats()
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual(stats['frames'], 4)
+        self.assertEqual(stats['largest_batch_size'], 4)
+
+    def test_deadline_flushes_partial_batch(self):
+        scheduler = InferenceScheduler(lambda frames: frames, max_batch_size=8, max_wait=0.01)
+
+        self.assertEqual(scheduler.predict(1, 'frame'), 'frame')
+        self.assertEqual(scheduler.get_stats()['last_batch_size'], 1)
+
+    def test_model_error_is_raised_to_callers(self):
+        def predict_batch(frames):
+            raise RuntimeError('model failed')
+
+        scheduler = InferenceScheduler(predict_batch, max_batch_size=2, max_wait=0.01)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.predict(1, 'frame')
+
+class TestProcessPoolBackend(unittest.TestCase):
+    def setUp(self):
+        # No real worker processes; the pool and ready queue are mocks
+        patcher = patch.object(inference.multiprocessing, 'get_context')
+        self.get_context = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_workers_load_the_model_in_the_pool_initializer(self):
+        backend = ProcessPoolBackend('best.pt', workers=2)
+
+        self.get_context.assert_called_once_with('spawn')
+        context = self.get_context.return_value
+        context.Pool.assert_called_once_with(
+            processes=2, initializer=init_worker, initargs=('best.pt', backend._ready)
+        )
+
+    def test_warm_up_waits_for_every_worker(self):
+        backend = ProcessPoolBackend('best.pt', workers=3)
+        backend._ready = queue.Queue()
+        backend._ready.put((11, None))
+        backend._ready.put((12, 'no such file'))
+        backend._ready.put((13, None))
+
+        self.assertEqual(backend.warm_up(timeout=1), 2)
+        # Warm-up doesn't run anything on the pool itself
+        backend._pool.apply_async.assert_not_called()
+
+    def test_warm_up_gives_up_after_timeout(self):
+        backend = ProcessPoolBackend('best.pt', workers=2)
+        backend._ready = queue.Queue()
+        backend._ready.put((11, None))
+
+        self.assertEqual(backend.warm_up(timeout=0.01), 1)
+
+    def test_boxes_are_mapped_back_to_full_frame(self):
+        backend = ProcessPoolBackend('best.pt', workers=2)
+        backend._pool.apply_async.return_value.get.return_value = (
+            1234,
+            [[{'type': 'fire', 'confidence': 0.9, 'box': [10.0, 10.0, 20.0, 20.0]}]],
+            0.05
+        )
+
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        detections = backend.predict_batch([frame])
+
+        # The worker was sent a frame shrunk to 640px on its longest side
+        sent_frames = backend._pool.apply_async.call_args[0][1][0]
+        self.assertEqual(sent_frames[0].shape, (360, 640, 3))
+        self.assertEqual(detections[0][0]['box'], [20.0, 20.0, 40.0, 40.0])
+
+        stats = backend.get_stats()
+        self.assertEqual(stats['per_worker'][1234]['frames'], 1)
+        self.assertEqual(stats['per_worker'][1234]['throughput_fps'], 20.0)
+
+    def test_batch_timeout_is_raised_to_callers(self):
+        backend = ProcessPoolBackend('best.pt', workers=2)
+        backend._pool.apply_async.return_value.get.side_effect = multiprocessing.TimeoutError
+
+        with self.assertRaises(TimeoutError):
+            backend.predict_batch([np.zeros((10, 10, 3), dtype=np.uint8)])
+        backend._pool.apply_async.return_value.get.assert_called_once_with(
+            timeout=inference.WORKER_BATCH_TIMEOUT_SECONDS
+        )
+        self.assertEqual(backend.get_stats()['timeouts'], 1)
+
+class TestProcessBackendStartup(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.multiple(testing_script, INFERENCE_BACKEND='process', _backend=None, _backend_failed=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        pool_patcher = patch.object(testing_script, 'ProcessPoolBackend')
+        self.pool_backend = pool_patcher.start()
+        self.addCleanup(pool_patcher.stop)
+
+    @patch.object(testing_script.os.path, 'exists', return_value=True)
+    def test_pool_without_ready_workers_is_no_backend(self, mock_exists):
+        self.pool_backend.return_value.warm_up.return_value = 0
+
+        self.assertFalse(testing_script.warm_up_model())
+        self.pool_backend.return_value.close.assert_called_once()
+        # Frames are streamed without inference, and the pool isn't started again
+        self.assertEqual(testing_script.analyse_frame(np.zeros((10, 10, 3), dtype=np.uint8), 1), [])
+        self.pool_backend.assert_called_once()
+
+    @patch.object(testing_script.os.path, 'exists', return_value=False)
+    def test_missing_model_file_starts_no_pool(self, mock_exists):
+        self.assertIsNone(testing_script.get_inference_backend())
+        self.pool_backend.assert_not_called()
+
+    @patch.object(testing_script.os.path, 'exists', return_value=True)
+    def test_pool_with_a_ready_worker_is_used(self, mock_exists):
+        self.pool_backend.return_value.warm_up.return_value = 1
+
+        self.assertTrue(testing_script.warm_up_model())
+        self.assertIs(testing_script.get_inference_backend(), self.pool_backend.return_value)
+
+class TestInitWorker(unittest.TestCase):
+    def tearDown(self):
+        inference_worker._model = None
+
+    @patch.object(inference_worker, 'warm_up_model')
+    @patch.object(inference_worker, 'load_model')
+    def test_worker_reports_ready_once_warmed_up(self, mock_load, mock_warm_up):
+        ready = queue.Queue()
+        init_worker('best.pt', ready)
+
+        mock_warm_up.assert_called_once_with(mock_load.return_value)
+        self.assertEqual(ready.get_nowait(), (os.getpid(), None))
+
+    @patch.object(inference_worker, 'load_model', side_effect=FileNotFoundError('best.pt'))
+    def test_load_failure_is_reported_not_raised(self, mock_load):
+        ready = queue.Queue()
+        init_worker('best.pt', ready)
+
+        self.assertEqual(ready.get_nowait(), (os.getpid(), 'best.pt'))
+        with self.assertRaises(RuntimeError):
+            inference_worker.predict_frames([])
+
+    @patch.object(inference_worker, 'load_model', side_effect=FileNotFoundError('best.pt'))
+    def test_load_failure_raises_without_ready_queue(self, mock_load):
+        with self.assertRaises(FileNotFoundError):
+            init_worker('best.pt')
+
+class TestModelHelpers(unittest.TestCase):
+    def test_model_path_for_each_format(self):
+        self.assertTrue(get_model_path().endswith('best.pt'))
+        self.assertTrue(get_model_path('onnx-int8').endswith('best_int8.onnx'))
+        with self.assertRaises(ValueError):
+            get_model_path('tensorrt')
+
+    def test_filter_detections_applies_class_thresholds(self):
+        detections = [
+            {'type': 'fire', 'confidence': 0.5, 'box': [0, 0, 1, 1]},
+            {'type': 'smoke', 'confidence': 0.1, 'box': [0, 0, 1, 1]},
+            {'type': 'person', 'confidence': 0.9, 'box': [0, 0, 1, 1]}
+        ]
+        self.assertEqual([d['type'] for d in filter_detections(detections)], ['fire'])
+
+class TestModelLoader(unittest.TestCase):
+    def test_model_is_loaded_and_warmed_up_once_on_first_use(self):
+        model = MagicMock()
+        load = MagicMock(return_value=model)
+        loader = ModelLoader('best.pt', load=load)
+        
+        # Nothing is loaded until the model is asked for
+        load.assert_not_called()
+        self.assertFalse(loader.get_stats()['loaded'])
+        
+        threads = [threading.Thread(target=loader.get) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertIs(loader.get(), model)
+        load.assert_called_once_with('best.pt')
+        # Warmed up with one inference on a blank frame
+        model.predict.assert_called_once()
+        self.assertEqual(model.predict.call_args[1]['source'][0].shape, (640, 640, 3))
+        self.assertTrue(loader.get_stats()['loaded'])
+
+    def test_failed_load_is_not_retried(self):
+        load = MagicMock(side_effect=FileNotFoundError('best.pt'))
+        loader = ModelLoader('best.pt', load=load)
+        
+        self.assertIsNone(loader.get())
+        self.assertIsNone(loader.get())
+        load.assert_called_once()
+        self.assertEqual(loader.get_stats()['error'], 'best.pt')
+
+    def test_failed_warm_up_still_returns_model(self):
+        model = MagicMock()
+        loader = ModelLoader('best.pt', load=MagicMock(return_value=model),
+                             warm_up=MagicMock(side_effect=RuntimeError('no device')))
+        
+        self.assertIs(loader.get(), model)
+        self.assertIsNone(loader.get_stats()['warmup_ms'])
+
+class TestInferenceRateController(unittest.TestCase):
+    def test_is_due_paces_to_target_rate(self):
+        controller = InferenceRateController(budget=1.0, default_fps=5, min_fps=0.5)
+        controller.register(1, 10)
+
+        self.assertTrue(controller.is_due(1, now=0.0))
+        self.assertFalse(controller.is_due(1, now=0.05))
+        self.assertTrue(controller.is_due(1, now=0.1))
+
+    def test_rates_scale_down_when_budget_exceeded(self):
+        controller = InferenceRateController(budget=1.0, default_fps=5, min_fps=0.5)
+        controller.register(1, 10)
+        controller.register(2, None)
+
+        # 10 Hz + 5 Hz at 100ms per inference needs 1.5s of model time per second
+        controller.record_latency(1, 0.1)
+        controller.record_latency(2, 0.1)
+
+        stats = controller.get_stats()
+        self.assertEqual(stats[1]['target_fps'], 10)
+        self.assertEqual(stats[2]['target_fps'], 5)
+        self.assertAlmostEqual(stats[1]['effective_fps'], 6.67, places=2)
+        self.assertAlmostEqual(stats[2]['effective_fps'], 3.33, places=2)
+
+    def test_rate_never_drops_below_minimum(self):
+        controller = InferenceRateController(budget=0.1, default_fps=5, min_fps=0.5)
+        controller.register(1, 5)
+        controller.record_latency(1, 2.0)
+
+        self.assertEqual(controller.get_stats()[1]['effective_fps'], 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from backend import migrate_detections
+
+
+class TestMigrateDetections(unittest.TestCase):
+    def test_parse_legacy_timestamp(self):
+        self.assertEqual(
+            migrate_detections.parse_legacy_timestamp('14:05:09', '03/02/25'),
+            datetime(2025, 2, 3, 14, 5, 9)
+        )
+        created_at = datetime(2025, 2, 3, 14, 5, 10)
+        # Strings that don't parse fall back to created_at
+        self.assertIs(migrate_detections.parse_legacy_timestamp('14:05', '03/02/25', created_at), created_at)
+        self.assertIs(migrate_detections.parse_legacy_timestamp(None, None, created_at), created_at)
+
+    def test_plan_schema_changes(self):
+        columns = {'id': False, 'camera_id': False, 'time_stamp': False, 'date_created': False}
+        clauses = migrate_detections.plan_schema_changes(columns, {'PRIMARY', 'idx_detections_time'})
+        self.assertEqual(clauses, [
+            "ADD COLUMN detected_at DATETIME(3) NULL AFTER confidence",
+            "MODIFY time_stamp VARCHAR(8) NULL",
+            "MODIFY date_created VARCHAR(8) NULL",
+            "ADD INDEX idx_detections_camera_time (camera_id, detected_at)",
+            "ADD INDEX idx_detections_type_time (alert_type, detected_at)"
+        ])
+
+    def test_plan_is_empty_once_migrated(self):
+        columns = {'detected_at': False}
+        indexes = set(migrate_detections.DETECTED_AT_INDEXES)
+        self.assertEqual(migrate_detections.plan_schema_changes(columns, indexes), [])
+        self.assertEqual(migrate_detections.plan_legacy_drop(columns), [])
+
+    def test_plan_legacy_drop(self):
+        columns = {'detected_at': True, 'time_stamp': True, 'date_created': True}
+        self.assertEqual(migrate_detections.plan_legacy_drop(columns), [
+            "MODIFY detected_at DATETIME(3) NOT NULL",
+            "DROP COLUMN time_stamp",
+            "DROP COLUMN date_created"
+        ])
+
+    def test_backfill_in_batches(self):
+        created_at = datetime(2025, 2, 3, 9, 0, 0)
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [
+            [(1, '08:00:00', '03/02/25', created_at), (2, 'bad', 'bad', created_at)],
+            [(5, None, None, None)],
+            []
+        ]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        updated, fallbacks = migrate_detections.backfill(conn, batch_size=2)
+        self.assertEqual((updated, fallbacks), (2, 1))
+        # Each batch starts after the last id of the one before
+        self.assertEqual([call.args[1] for call in cursor.execute.call_args_list], [(0, 2), (2, 2), (5, 2)])
+        cursor.executemany.assert_called_once_with(
+            migrate_detections.BACKFILL_UPDATE,
+            [(datetime(2025, 2, 3, 8, 0, 0), 1), (created_at, 2)]
+        )
+        conn.commit.assert_called_once()
+
+    def test_backfill_dry_run_writes_nothing(self):
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [[(1, '08:00:00', '03/02/25', None)], []]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        self.assertEqual(migrate_detections.backfill(conn, batch_size=10, dry_run=True), (1, 0))
+        cursor.executemany.assert_not_called()
+        conn.commit.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
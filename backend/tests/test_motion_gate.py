@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from backend.blueprints.dashboard.motion_gate import MotionGate
+from backend.blueprints.dashboard.pipeline_stats import CameraStats
+
+
+class TestMotionGate(unittest.TestCase):
+    def setUp(self):
+        self.stats = CameraStats()
+        self.gate = MotionGate(stats=self.stats, threshold=0.01, pixel_delta=15, force_interval=30)
+        self.static = np.full((480, 640, 3), 100, dtype=np.uint8)
+
+    def test_static_scene_is_skipped(self):
+        # The first frame always goes through to set the reference
+        self.assertTrue(self.gate.should_infer(self.static, now=0))
+        self.assertFalse(self.gate.should_infer(self.static.copy(), now=1))
+        self.assertFalse(self.gate.should_infer(self.static.copy(), now=2))
+
+        stats = self.stats.snapshot()
+        self.assertEqual(stats['motion_checks'], 3)
+        self.assertEqual(stats['motion_skipped'], 2)
+        self.assertAlmostEqual(stats['motion_skip_ratio'], 0.667)
+
+    def test_change_triggers_inference(self):
+        self.gate.should_infer(self.static, now=0)
+
+        changed = self.static.copy()
+        changed[100:300, 200:400] = 250
+        self.assertTrue(self.gate.should_infer(changed, now=1))
+
+    def test_inference_is_forced_periodically(self):
+        self.gate.should_infer(self.static, now=0)
+        self.assertFalse(self.gate.should_infer(self.static, now=10))
+        self.assertTrue(self.gate.should_infer(self.static, now=31))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from backend.pagination import (
+    CountCache, decode_cursor, encode_cursor, keyset_page, list_counts, list_total, parse_count_mode,
+    parse_page_size, total_pages
+)
+
+DETECTION_KEY = (datetime.fromisoformat, int)
+
+
+class TestPagination(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        key = (datetime(2025, 3, 9, 10, 35, 0, 120000), 42)
+        token = encode_cursor(key)
+        # Safe to put in a query string as it is
+        self.assertRegex(token, r'^[A-Za-z0-9_-]+$')
+        self.assertEqual(decode_cursor(token, DETECTION_KEY), key)
+        self.assertEqual(decode_cursor(encode_cursor(('Camera 1', 7)), (str, int)), ('Camera 1', 7))
+
+    def test_invalid_cursor(self):
+        for token in ('not a token', encode_cursor([1]), encode_cursor(['yesterday', 1]), encode_cursor({'id': 1})):
+            with self.assertRaises(ValueError):
+                decode_cursor(token, DETECTION_KEY)
+
+    def test_page_size(self):
+        self.assertEqual(parse_page_size({}, default=20, maximum=50), 20)
+        self.assertEqual(parse_page_size({'limit': '30'}, default=20, maximum=50), 30)
+        self.assertEqual(parse_page_size({'limit': '5000'}, default=20, maximum=50), 50)
+        for value in ('0', '-1', 'ten'):
+            with self.assertRaises(ValueError):
+                parse_page_size({'limit': value})
+
+    def test_keyset_page(self):
+        rows = [{'id': 3}, {'id': 2}, {'id': 1}]
+        page, token = keyset_page(rows, 2, lambda row: (row['id'],))
+        self.assertEqual(page, rows[:2])
+        self.assertEqual(decode_cursor(token, (int,)), (2,))
+        self.assertEqual(keyset_page(rows, 3, lambda row: (row['id'],)), (rows, None))
+
+
+class TestListTotals(unittest.TestCase):
+    def setUp(self):
+        list_counts.invalidate('cameras')
+
+    def test_count_cache(self):
+        cache = CountCache(ttl=60)
+        count = MagicMock(return_value=15)
+        self.assertEqual(cache.get('cameras', (), count), 15)
+        self.assertEqual(cache.get('cameras', (), count), 15)
+        count.assert_called_once()
+
+        # Each filter is counted on its own, and a write drops them all
+        cache.get('cameras', (('status', 'Active'),), count)
+        self.assertEqual(count.call_count, 2)
+        cache.invalidate('cameras')
+        cache.get('cameras', (), count)
+        self.assertEqual(count.call_count, 3)
+
+    def test_count_cache_expires(self):
+        cache = CountCache(ttl=0)
+        count = MagicMock(return_value=1)
+        cache.get('users', (), count)
+        cache.get('users', (), count)
+        self.assertEqual(count.call_count, 2)
+
+    def test_list_total_modes(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'total': 42}
+        self.assertIsNone(list_total(cursor, 'none', 'cameras', (), 'SELECT COUNT(*)', ()))
+        cursor.execute.assert_not_called()
+
+        self.assertEqual(list_total(cursor, 'approximate', 'cameras', (), 'SELECT COUNT(*)', ()), 42)
+        self.assertIn('TABLE_ROWS', cursor.execute.call_args[0][0])
+
+        # A filtered list has no estimate of its own, so it is counted
+        filters = (('status', 'Active'),)
+        self.assertEqual(list_total(cursor, 'approximate', 'cameras', filters, 'SELECT COUNT(*)', ['Active']), 42)
+        cursor.execute.assert_called_with('SELECT COUNT(*)', ['Active'])
+
+    def test_count_mode_and_pages(self):
+        self.assertEqual(parse_count_mode({}), 'cached')
+        self.assertEqual(parse_count_mode({'count': 'approximate'}), 'approximate')
+        with self.assertRaises(ValueError):
+            parse_count_mode({'count': 'exact'})
+        self.assertEqual(total_pages(0, 10), 1)
+        self.assertEqual(total_pages(15, 10), 2)
+        self.assertIsNone(total_pages(None, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
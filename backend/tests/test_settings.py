@@ -59,7 +59,7 @@ class TestSettingsBlueprint(unittest.TestCase):
     def tearDown(self):
         self.patcher.stop()
 
-    @patch('backend.blueprints.settings.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_get_current_user(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -101,7 +101,7 @@ class TestSettingsBlueprint(unittest.TestCase):
             # The profile_image_url is constructed in the route function
             self.assertTrue('profile_image_url' in data)
 
-    @patch('backend.blueprints.settings.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_update_user(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -152,7 +152,7 @@ class TestSettingsBlueprint(unittest.TestCase):
                 # Use a more generic assertion since we're not sure about the exact error message
                 self.assertTrue('error' in data or 'message' in data)
 
-    @patch('backend.blueprints.settings.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_invalid_password_update(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -199,7 +199,7 @@ class TestSettingsBlueprint(unittest.TestCase):
                 # Use a more generic assertion since we're not sure about the exact error
                 self.assertTrue('error' in data)
 
-    @patch('backend.blueprints.settings.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     @patch('backend.blueprints.settings.routes.os.path.exists')
     @patch('backend.blueprints.settings.routes.os.remove')
     def test_delete_user(self, mock_remove, mock_path_exists, mock_get_db):
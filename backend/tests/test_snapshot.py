@@ -0,0 +1,116 @@
+import unittest
+import threading
+import time
+import sys
+from unittest.mock import patch, MagicMock
+import numpy as np
+
+# Mock the required modules
+sys.modules['ultralytics'] = MagicMock()
+sys.modules['yt_dlp'] = MagicMock()
+from backend.blueprints.dashboard import snapshot
+from backend.blueprints.dashboard.stream_profile import StreamProfile
+
+PROFILE = StreamProfile(None, 80, None)
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        snapshot._encoded.clear()
+        snapshot._grabs.clear()
+        self.frame = np.full((120, 160, 3), 100, dtype=np.uint8)
+
+        self.get_worker = patch.object(snapshot.camera_worker, 'get_worker').start()
+        self.grab_frame = patch.object(snapshot, 'grab_frame').start()
+        self.addCleanup(patch.stopall)
+
+    def test_live_frame_is_encoded_once_per_frame(self):
+        worker = MagicMock()
+        captured_at = time.monotonic() - 2
+        worker.latest_frame.return_value = (self.frame, captured_at, 7)
+        self.get_worker.return_value = worker
+
+        first = snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE)
+        with patch.object(snapshot, 'encode_frame') as mock_encode:
+            second = snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE)
+            mock_encode.assert_not_called()
+
+        self.assertEqual(first, second)
+        self.assertEqual(first.source, 'live')
+        self.assertTrue(first.jpeg.startswith(b'\xff\xd8'))
+        self.assertAlmostEqual(first.modified_at, time.time() - 2, delta=0.5)
+        self.grab_frame.assert_not_called()
+
+        # A newer frame gets a new ETag
+        worker.latest_frame.return_value = (np.zeros_like(self.frame), captured_at + 1, 8)
+        self.assertNotEqual(snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE).etag, first.etag)
+
+    def test_grab_when_no_worker_is_running(self):
+        self.get_worker.return_value = None
+        self.grab_frame.return_value = self.frame
+
+        first = snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE)
+        second = snapshot.get_snapshot(1, 'rtsp://example.com/1', StreamProfile(80, 50, None))
+
+        self.assertEqual(first.source, 'grab')
+        # Polling within SNAPSHOT_GRAB_CACHE_SECONDS reuses the grabbed frame, at any size
+        self.grab_frame.assert_called_once_with('rtsp://example.com/1')
+        self.assertLess(len(second.jpeg), len(first.jpeg))
+
+    def test_failed_grab_is_cached_too(self):
+        self.get_worker.return_value = None
+        self.grab_frame.return_value = None
+
+        self.assertIsNone(snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE))
+        self.assertIsNone(snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE))
+        self.grab_frame.assert_called_once()
+
+        # Failures are remembered for longer than grabbed frames
+        grabbed_at, frame, modified_at = snapshot._grabs[1]
+        snapshot._grabs[1] = (grabbed_at - snapshot.SNAPSHOT_GRAB_CACHE_SECONDS - 1, frame, modified_at)
+        self.assertIsNone(snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE))
+        self.grab_frame.assert_called_once()
+        snapshot._grabs[1] = (grabbed_at - snapshot.SNAPSHOT_GRAB_FAILURE_CACHE_SECONDS - 1, frame, modified_at)
+        self.assertIsNone(snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE))
+        self.assertEqual(self.grab_frame.call_count, 2)
+
+    def test_slow_youtube_resolution_fails_the_grab(self):
+        self.get_worker.return_value = None
+        with patch.object(snapshot, 'resolve_stream_url', side_effect=TimeoutError) as mock_resolve:
+            self.assertIsNone(snapshot.get_snapshot(1, 'https://youtube.com/watch?v=1', PROFILE))
+
+        mock_resolve.assert_called_once_with('https://youtube.com/watch?v=1', timeout=snapshot.SNAPSHOT_GRAB_TIMEOUT_SECONDS)
+        self.grab_frame.assert_not_called()
+
+    def test_no_grab_when_not_allowed(self):
+        self.get_worker.return_value = None
+
+        self.assertIsNone(snapshot.get_snapshot(1, 'rtsp://example.com/1', PROFILE, allow_grab=False))
+        self.grab_frame.assert_not_called()
+
+    def test_cameras_evicting_at_once_share_the_cache_safely(self):
+        worker = MagicMock()
+        worker.latest_frame.return_value = (self.frame, time.monotonic(), 1)
+        self.get_worker.return_value = worker
+        errors = []
+
+        def poll(camera_id):
+            try:
+                # Every size is a new entry, so both cameras keep evicting
+                for width in range(160, 400):
+                    snapshot.get_snapshot(camera_id, 'rtsp://example.com/1', StreamProfile(width, 50, None))
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(snapshot, 'SNAPSHOT_CACHE_ENTRIES', 4):
+            threads = [threading.Thread(target=poll, args=(camera_id,)) for camera_id in (1, 2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(snapshot._encoded), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import numpy as np
+import cv2
+
+# Mock the required modules
+sys.modules['ultralytics'] = MagicMock()
+sys.modules['yt_dlp'] = MagicMock()
+from backend.blueprints.dashboard import stream_profile
+from backend.blueprints.dashboard.stream_profile import encode_frame, parse_stream_profile
+
+
+class TestStreamProfile(unittest.TestCase):
+    def test_defaults_keep_full_stream(self):
+        profile = parse_stream_profile({})
+        self.assertEqual(profile, stream_profile.DEFAULT_PROFILE)
+
+    def test_values_are_clamped_to_server_limits(self):
+        profile = parse_stream_profile({'width': '100000', 'quality': '100', 'fps': '1000'})
+        self.assertEqual(profile.width, stream_profile.STREAM_MAX_WIDTH)
+        self.assertEqual(profile.quality, stream_profile.STREAM_MAX_QUALITY)
+        self.assertLessEqual(profile.fps, 1000)
+
+        profile = parse_stream_profile({'width': '10', 'quality': '1'})
+        self.assertEqual(profile.width, stream_profile.STREAM_MIN_WIDTH)
+        self.assertEqual(profile.quality, stream_profile.STREAM_MIN_QUALITY)
+
+    def test_invalid_values_are_rejected(self):
+        for args in ({'width': 'wide'}, {'quality': '-5'}, {'fps': '0'}, {'fps': 'nan'}, {'fps': 'inf'}, {'fps': '-inf'}):
+            with self.assertRaises(ValueError):
+                parse_stream_profile(args)
+
+    def test_encode_scales_down_but_never_up(self):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+        small = cv2.imdecode(np.frombuffer(encode_frame(frame, 320, 70), dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(small.shape, (180, 320, 3))
+
+        same = cv2.imdecode(np.frombuffer(encode_frame(frame, 1920, 70), dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(same.shape, (720, 1280, 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import threading
+import time
+from unittest.mock import MagicMock
+import sys
+
+# Mock the required modules
+sys.modules['yt_dlp'] = MagicMock()
+from backend.stream_resolver import StreamURLCache, get_url_expiry
+
+
+class FakeClock:
+    def __init__(self, now=1000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestStreamURLCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.calls = []
+
+    def resolve(self, source_url):
+        self.calls.append(source_url)
+        expire = int(self.clock.now + 6 * 3600)
+        return f"https://rr1.googlevideo.com/videoplayback?expire={expire}&id={len(self.calls)}"
+
+    def test_expiry_is_read_from_signed_url(self):
+        self.assertEqual(get_url_expiry('https://x.googlevideo.com/videoplayback?expire=1700000000&sig=abc'), 1700000000)
+        self.assertEqual(get_url_expiry('https://x.googlevideo.com/api/manifest/hls/expire/1700000000/id/1'), 1700000000)
+        self.assertIsNone(get_url_expiry('https://example.com/video.mp4'))
+
+    def test_cached_until_close_to_expiry(self):
+        cache = StreamURLCache(self.resolve, clock=self.clock, background_refresh=False)
+
+        first = cache.get('https://youtube.com/watch?v=1')
+        self.clock.now += 5 * 3600
+        self.assertEqual(cache.get('https://youtube.com/watch?v=1'), first)
+        self.assertEqual(len(self.calls), 1)
+
+        # With under a minute left the URL is resolved again
+        self.clock.now += 3600 - 30
+        self.assertNotEqual(cache.get('https://youtube.com/watch?v=1'), first)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_urls_without_expiry_use_default_ttl(self):
+        cache = StreamURLCache(lambda url: 'https://example.com/stream.mp4', default_ttl=100,
+                               clock=self.clock, background_refresh=False)
+        cache.get('https://youtube.com/watch?v=2')
+        self.clock.now += 30
+        cache.get('https://youtube.com/watch?v=2')
+        self.assertEqual(cache.get_stats()['hits'], 1)
+
+    def test_concurrent_requests_share_one_resolution(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_resolve(source_url):
+            started.set()
+            release.wait(timeout=5)
+            return self.resolve(source_url)
+
+        cache = StreamURLCache(slow_resolve, clock=self.clock, background_refresh=False)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('https://youtu.be/3'))) for _ in range(5)]
+        threads[0].start()
+        started.wait(timeout=5)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(cache.get_stats()['coalesced'], 4)
+
+    def test_refresh_before_expiry_and_drop_idle(self):
+        cache = StreamURLCache(self.resolve, refresh_margin=300, idle_seconds=7 * 3600,
+                               clock=self.clock, background_refresh=False)
+        first = cache.get('https://youtube.com/watch?v=4')
+
+        # Within the refresh margin the URL is refreshed without anyone waiting on it
+        self.clock.now += 6 * 3600 - 200
+        cache.refresh_due()
+        self.assertEqual(len(self.calls), 2)
+        self.assertNotEqual(cache.get('https://youtube.com/watch?v=4'), first)
+        self.assertEqual(len(self.calls), 2)
+
+        # Entries nobody has asked for in idle_seconds are dropped
+        self.clock.now += 7 * 3600 + 1
+        cache.refresh_due()
+        self.assertEqual(cache.get_stats()['entries'], 0)
+
+    def test_timeout_leaves_resolution_running(self):
+        release = threading.Event()
+
+        def slow_resolve(source_url):
+            release.wait(timeout=5)
+            return self.resolve(source_url)
+
+        cache = StreamURLCache(slow_resolve, clock=self.clock, background_refresh=False)
+        with self.assertRaises(TimeoutError):
+            cache.get('https://youtube.com/watch?v=1', timeout=0.01)
+
+        # The resolution finishes in the background and later calls get its result
+        release.set()
+        self.assertTrue(cache.get('https://youtube.com/watch?v=1', timeout=5).endswith('id=1'))
+        self.assertEqual(len(self.calls), 1)
+
+    def test_failed_resolution_is_raised_and_not_cached(self):
+        def failing_resolve(source_url):
+            raise RuntimeError('video unavailable')
+
+        cache = StreamURLCache(failing_resolve, clock=self.clock, background_refresh=False)
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                cache.get('https://youtube.com/watch?v=5')
+        self.assertEqual(cache.get_stats()['errors'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from backend.blueprints.dashboard.tracker import DetectionTracker, box_iou
+from backend.blueprints.dashboard.pipeline_stats import CameraStats
+
+
+def make_detection(alert_type='fire', confidence=0.5, box=(100, 100, 200, 200)):
+    return {'type': alert_type, 'confidence': confidence, 'box': list(box)}
+
+
+class TestDetectionTracker(unittest.TestCase):
+    def setUp(self):
+        self.stats = CameraStats()
+        self.tracker = DetectionTracker(stats=self.stats, confirm_frames=3, iou_threshold=0.3,
+                                        max_age=10, peak_margin=0.05)
+
+    def test_box_iou(self):
+        self.assertEqual(box_iou((0, 0, 10, 10), (0, 0, 10, 10)), 1.0)
+        self.assertAlmostEqual(box_iou((0, 0, 10, 10), (5, 0, 15, 10)), 1 / 3)
+        self.assertEqual(box_iou((0, 0, 10, 10), (20, 20, 30, 30)), 0.0)
+
+    def test_object_is_saved_once_after_confirmation(self):
+        events = []
+        for frame in range(100):
+            # The box drifts a little from frame to frame
+            box = (100 + frame % 5, 100, 200 + frame % 5, 200)
+            events.extend(self.tracker.update([make_detection(box=box)], now=frame * 0.2))
+
+        self.assertEqual([event['event'] for event in events], ['new'])
+        self.assertIsNotNone(events[0]['track_id'])
+
+        stats = self.stats.snapshot()
+        self.assertEqual(stats['tracked_detections'], 100)
+        self.assertEqual(stats['track_events'], 1)
+        self.assertEqual(stats['tracks_active'], 1)
+
+    def test_single_frame_false_positive_is_not_saved(self):
+        self.assertEqual(self.tracker.update([make_detection()], now=0), [])
+        self.assertEqual(self.tracker.update([], now=1), [])
+        self.assertEqual(self.tracker.update([], now=2), [])
+
+    def test_confidence_peaks_update_the_saved_row(self):
+        confidences = [0.4, 0.5, 0.45, 0.52, 0.7, 0.68, 0.9]
+        events = []
+        for frame, confidence in enumerate(confidences):
+            events.extend(self.tracker.update([make_detection(confidence=confidence)], now=frame))
+
+        # Saved with the best confidence seen before confirmation, then raised only on real peaks
+        self.assertEqual([(event['event'], event['confidence']) for event in events],
+                         [('new', 0.5), ('peak', 0.7), ('peak', 0.9)])
+        self.assertEqual(len({event['track_id'] for event in events}), 1)
+
+    def test_objects_are_tracked_separately(self):
+        events = []
+        for frame in range(3):
+            events.extend(self.tracker.update([
+                make_detection('fire', box=(0, 0, 100, 100)),
+                make_detection('smoke', box=(0, 0, 100, 100)),
+                make_detection('fire', box=(300, 300, 400, 400))
+            ], now=frame))
+
+        self.assertEqual(sorted(event['type'] for event in events), ['fire', 'fire', 'smoke'])
+        self.assertEqual(len({event['track_id'] for event in events}), 3)
+
+    def test_track_expires_after_max_age(self):
+        events = []
+        for frame in range(3):
+            events.extend(self.tracker.update([make_detection()], now=frame))
+        # Gone for longer than max_age, so the next sighting is a new object
+        for frame in range(20, 23):
+            events.extend(self.tracker.update([make_detection()], now=frame))
+
+        self.assertEqual([event['event'] for event in events], ['new', 'new'])
+        self.assertNotEqual(events[0]['track_id'], events[1]['track_id'])
+
+if __name__ == '__main__':
+    unittest.main()
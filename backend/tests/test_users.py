@@ -6,6 +6,7 @@ from flask import Flask
 from unittest.mock import patch, MagicMock
 from functools import wraps
 from backend.blueprints.users.routes import users_bp
+from backend.pagination import list_counts
 from flask.testing import FlaskClient
 
 # Create a custom test client class that includes an auth token
@@ -35,6 +36,8 @@ class TestUsersBlueprint(unittest.TestCase):
         self.app.config['TESTING'] = True
         self.app.config['UPLOAD_FOLDER'] = '/tmp/test_uploads'
         self.app.config['SERVER_NAME'] = 'localhost:5000'
+        # Every test counts its own users
+        list_counts.invalidate('users')
         
         # Replace the token_required decorator with a simplified version for testing
         def mock_token_decorator(f):
@@ -59,7 +62,7 @@ class TestUsersBlueprint(unittest.TestCase):
     def tearDown(self):
         self.patcher.stop()
 
-    @patch('backend.blueprints.users.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     def test_get_users(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -98,16 +101,30 @@ class TestUsersBlueprint(unittest.TestCase):
         mock_cursor.fetchall.return_value = users_data
         
         # Test endpoint
-        response = self.client.get('/api/users?page=1')
+        response = self.client.get('/api/users')
         
         # Verify the response
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertEqual(len(data['users']), 2)
-        self.assertEqual(data['current_page'], 1)
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['total'], 15)
         self.assertEqual(data['total_pages'], 2)  # 15 users, 10 per page = 2 pages
+        # Pages follow the primary key, so they're the same on every request
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn('WHERE id > %s', query)
+        self.assertIn('ORDER BY id', query)
+        self.assertEqual(params, (0, 11))
 
-    @patch('backend.blueprints.users.routes.get_db_connection')
+        # The next page starts after the last id of this one
+        mock_cursor.fetchall.return_value = users_data
+        data = self.client.get('/api/users?limit=1').get_json()
+        self.assertEqual([user['id'] for user in data['users']], [1])
+        self.client.get(f"/api/users?limit=1&cursor={data['next']}")
+        self.assertEqual(mock_cursor.execute.call_args[0][1], (1, 2))
+        self.assertEqual(self.client.get('/api/users?limit=zero').status_code, 400)
+
+    @patch('backend.db_session.get_db_connection')
     def test_get_user(self, mock_get_db):
         # Setup mock database connection
         mock_conn = MagicMock()
@@ -147,7 +164,7 @@ class TestUsersBlueprint(unittest.TestCase):
             self.assertEqual(data['id'], 1)
             self.assertEqual(data['full_name'], 'Test User')
 
-    @patch('backend.blueprints.users.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     @patch('backend.blueprints.users.routes.validate_email')
     @patch('backend.blueprints.users.routes.validate_password')
     @patch('backend.blueprints.users.routes.hash_password')
@@ -190,7 +207,7 @@ class TestUsersBlueprint(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['message'], 'User created successfully')
 
-    @patch('backend.blueprints.users.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     @patch('backend.blueprints.users.routes.validate_email')
     def test_create_user_duplicate_email(self, mock_validate_email, mock_get_db):
         # Setup mock database connection
@@ -226,7 +243,7 @@ class TestUsersBlueprint(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['error'], 'Email already exists')
 
-    @patch('backend.blueprints.users.routes.get_db_connection')
+    @patch('backend.db_session.get_db_connection')
     @patch('backend.blueprints.users.routes.os.path.exists')
     @patch('backend.blueprints.users.routes.os.remove')
     def test_delete_user(self, mock_remove, mock_path_exists, mock_get_db):
@@ -9,6 +9,7 @@ from datetime import datetime
 import jwt
 from functools import wraps
 from flask import request, jsonify, current_app
+from backend.db_pool import ConnectionPool
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -154,9 +155,9 @@ def validate_password(password):
         return False, "Password must contain at least one digit"
     return True, None
 
-def get_db_connection():
+def connect_database():
     """
-    Get a connection to the MySQL database.
+    Open a new connection to the MySQL database, without pooling.
     
     Returns:
         mysql.connector.connection.MySQLConnection: A connection to the database.
@@ -165,9 +166,6 @@ def get_db_connection():
         mysql.connector.Error: If there is a problem connecting to the database.
     """
     try:
-        # Log database connection attempt
-        logger.info(f"Attempting to connect to MySQL database '{db_config['database']}' on {db_config['host']} as user '{db_config['user']}'")
-        
         # Check if database name is specified
         if not db_config.get('database'):
             logger.error("Database name is missing in configuration")
@@ -175,23 +173,8 @@ def get_db_connection():
 
         # Try to establish the connection
         connection = mysql.connector.connect(**db_config)
-        
-        # Verify connection is successful
-        if connection.is_connected():
-            db_info = connection.get_server_info()
-            logger.info(f"Successfully connected to MySQL Server version {db_info}")
-            
-            cursor = connection.cursor()
-            cursor.execute("SELECT DATABASE()")
-            result = cursor.fetchone()
-            db_name = result[0]
-            cursor.close()
-            
-            logger.info(f"Connected to database: {db_name}")
-            return connection
-        else:
-            logger.error("Connection established but not connected")
-            raise Error("Connection established but not connected")
+        logger.debug(f"Opened a connection to MySQL database '{db_config['database']}' on {db_config['host']}")
+        return connection
             
     except mysql.connector.Error as e:
         # Handle specific error types with more detailed messages
@@ -213,4 +196,25 @@ def get_db_connection():
     except Exception as e:
         logger.error(f"Unexpected error while connecting to database: {e}")
         logger.error(f"Database config (without password): {db_config['host']}, {db_config['user']}, {db_config.get('database', 'not specified')}")
-        raise Error("Database connection error") 
\ No newline at end of file
+        raise Error("Database connection error") 
+
+# Shared connection pool for this process
+db_pool = ConnectionPool(connect_database)
+
+def get_db_connection():
+    """
+    Borrow a connection to the MySQL database from the pool.
+    Closing it returns it to the pool for the next caller.
+    
+    Returns:
+        backend.db_pool.PooledConnection: A connection to the database.
+        
+    Raises:
+        mysql.connector.Error: If there is a problem connecting to the database,
+            or every pooled connection stays in use for DB_POOL_TIMEOUT_SECONDS.
+    """
+    try:
+        return db_pool.get()
+    except TimeoutError as e:
+        logger.error(f"Database connection pool exhausted: {e}")
+        raise Error(f"Database connection pool exhausted: {e}")
@@ -72,20 +72,38 @@ CREATE TABLE cameras (
     description TEXT,
     access_level INT NOT NULL,
     status VARCHAR(20) DEFAULT 'Active',
+    inference_fps FLOAT DEFAULT NULL,  -- Target inferences per second, NULL uses INFERENCE_DEFAULT_FPS
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (region) REFERENCES regions(id) ON DELETE RESTRICT,
-    FOREIGN KEY (sub_region) REFERENCES sub_regions(id) ON DELETE RESTRICT
+    FOREIGN KEY (sub_region) REFERENCES sub_regions(id) ON DELETE RESTRICT,
+    INDEX idx_cameras_created (created_at),
+    INDEX idx_cameras_status_created (status, created_at)
 );
 CREATE TABLE IF NOT EXISTS detections (
     id INT AUTO_INCREMENT PRIMARY KEY,
     camera_id INT NOT NULL,
     alert_type VARCHAR(50) NOT NULL,
     confidence FLOAT NOT NULL,
-    time_stamp VARCHAR(8) NOT NULL,
-    date_created VARCHAR(8) NOT NULL,
+    detected_at DATETIME(3) NOT NULL,  -- When the frame was analysed, in server local time
+    track_id BIGINT DEFAULT NULL,  -- Tracked object the row stands for, NULL when saved per frame
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (camera_id) REFERENCES cameras(id)
+    FOREIGN KEY (camera_id) REFERENCES cameras(id),
+    INDEX idx_detections_track (camera_id, track_id),
+    INDEX idx_detections_camera_time (camera_id, detected_at),
+    INDEX idx_detections_type_time (alert_type, detected_at),
+    INDEX idx_detections_time (detected_at)
+);
+
+-- Camera/region/sub-region combinations that have already had their alert email
+CREATE TABLE IF NOT EXISTS sent_alerts (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    camera_id INT NOT NULL,
+    region_id INT NOT NULL,
+    sub_region_id INT NOT NULL,
+    alert_type VARCHAR(50) DEFAULT NULL,
+    first_alert_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_sent_alert (camera_id, region_id, sub_region_id)
 );
 
 -- Future tables can be added below as the system expands:
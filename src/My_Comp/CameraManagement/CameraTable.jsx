@@ -11,8 +11,11 @@ export default function CameraTable() {
   const [cameras, setCameras] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
-  const [currentPage, setCurrentPage] = useState(1);
+  // Page tokens of the pages visited so far (null for the first page), and the token of the next one
+  const [pageCursors, setPageCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [totalPages, setTotalPages] = useState(1);
+  const currentPage = pageCursors.length;
   const [showAddCamera, setShowAddCamera] = useState(false);
   const [showEditCamera, setShowEditCamera] = useState(false);
   const [selectedCameraId, setSelectedCameraId] = useState(null);
@@ -23,9 +26,10 @@ export default function CameraTable() {
     const fetchCameras = async () => {
       try {
         setLoading(true);
-        const response = await api.getCameras(currentPage);
+        const response = await api.getCameras(pageCursors[pageCursors.length - 1]);
         setCameras(response.cameras || []);
-        setTotalPages(response.total_pages || 1);
+        setNextCursor(response.next);
+        setTotalPages(response.total_pages || currentPage);
         setError('');
       } catch (err) {
         console.error("Error fetching cameras:", err);
@@ -37,7 +41,7 @@ export default function CameraTable() {
     };
 
     fetchCameras();
-  }, [currentPage, refreshTrigger]);
+  }, [pageCursors, refreshTrigger]);
 
   const handleEdit = (cameraId) => {
     setSelectedCameraId(cameraId);
@@ -88,12 +92,6 @@ export default function CameraTable() {
     setRefreshTrigger(prev => prev + 1);
   };
 
-  // Generate page numbers array for pagination
-  const pageNumbers = [];
-  for (let i = 1; i <= totalPages; i++) {
-    pageNumbers.push(i);
-  }
-
   return (
     <div className="camera-management-table-container">
       <div className="camera-management-button-container">
@@ -117,6 +115,7 @@ export default function CameraTable() {
             <table className="camera-management-camera-table">
               <thead>
                 <tr>
+                  <th>Preview</th>
                   <th>Name</th>
                   <th>RTSP URL</th>
                   <th>Region</th>
@@ -130,6 +129,22 @@ export default function CameraTable() {
               <tbody>
                 {cameras.map((camera) => (
                   <tr key={camera.id}>
+                    <td>
+                      {camera.status === "Active" ? (
+                        <img
+                          className="camera-management-snapshot"
+                          src={api.getCameraSnapshotUrl(camera.id)}
+                          alt={`${camera.name} preview`}
+                          loading="lazy"
+                          onError={(e) => { e.target.style.visibility = 'hidden'; }}
+                        />
+                      ) : (
+                        // Inactive cameras aren't opened just for a preview
+                        <div className="camera-management-snapshot camera-management-snapshot-placeholder">
+                          No preview
+                        </div>
+                      )}
+                    </td>
                     <td>{camera.name}</td>
                     <td>{camera.rtsp_url}</td>
                     <td>{camera.region_name || camera.region}</td>
@@ -172,7 +187,7 @@ export default function CameraTable() {
             </table>
           )}
           
-          {totalPages > 1 && (
+          {(currentPage > 1 || nextCursor) && (
             <>
               {/* Spacer div to create more space between table and pagination */}
               <div style={{ height: "40px" }}></div>
@@ -180,24 +195,18 @@ export default function CameraTable() {
               <div className="camera-management-pagination">
                 <button
                   className="camera-management-pagination-button"
-                  onClick={() => setCurrentPage((prev) => Math.max(prev - 1, 1))}
+                  onClick={() => setPageCursors((prev) => prev.slice(0, -1))}
                   disabled={currentPage === 1}
                 >
                   &lt;
                 </button>
-                {pageNumbers.map((page) => (
-                  <button
-                    key={page}
-                    className={`camera-management-pagination-number ${currentPage === page ? "active" : ""}`}
-                    onClick={() => setCurrentPage(page)}
-                  >
-                    {page}
-                  </button>
-                ))}
+                <button className="camera-management-pagination-number active">
+                  {currentPage} / {totalPages}
+                </button>
                 <button
                   className="camera-management-pagination-button"
-                  onClick={() => setCurrentPage((prev) => Math.min(prev + 1, totalPages))}
-                  disabled={currentPage === totalPages}
+                  onClick={() => setPageCursors((prev) => [...prev, nextCursor])}
+                  disabled={!nextCursor}
                 >
                   &gt;
                 </button>
@@ -3,8 +3,11 @@ import './Dashboard.css';
 import api from '../../services/api';
 
 export default function Dashboard() {
-  const [currentPage, setCurrentPage] = useState(1);
+  // Page tokens of the pages visited so far (null for the first page), and the token of the next one
+  const [pageCursors, setPageCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [totalPages, setTotalPages] = useState(1);
+  const currentPage = pageCursors.length;
   const [cameras, setCameras] = useState([]);
   const [filteredCameras, setFilteredCameras] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -24,6 +27,8 @@ export default function Dashboard() {
   
   // Base API URL for video feed
   const API_BASE_URL = 'http://localhost:5000';
+  // Grid tiles are small, so ask the server for thumbnail-sized streams
+  const GRID_STREAM_PARAMS = 'width=480&quality=70&fps=10';
 
   // Fetch cameras on component mount
   useEffect(() => {
@@ -31,12 +36,13 @@ export default function Dashboard() {
       try {
         setLoading(true);
         // Only fetch active cameras
-        const response = await api.getCameras(currentPage, { status: 'Active' });
+        const response = await api.getCameras(pageCursors[pageCursors.length - 1], { status: 'Active' });
         console.log('API Response:', response);
         
         if (response && response.cameras) {
           setCameras(response.cameras);
           setFilteredCameras(response.cameras); // Initialize filtered cameras with all cameras
+          setNextCursor(response.next);
           if (response.total_pages) {
             setTotalPages(response.total_pages);
           }
@@ -53,7 +59,7 @@ export default function Dashboard() {
     };
 
     fetchCameras();
-  }, [currentPage]);
+  }, [pageCursors]);
 
   // Apply filters whenever filters state changes
   useEffect(() => {
@@ -75,9 +81,15 @@ export default function Dashboard() {
     setFilteredCameras(result);
   }, [filters, cameras]);
 
-  const handlePageChange = (page) => {
-    if (page >= 1 && page <= totalPages) {
-      setCurrentPage(page);
+  const goToPreviousPage = () => {
+    if (currentPage > 1) {
+      setPageCursors(prev => prev.slice(0, -1));
+    }
+  };
+
+  const goToNextPage = () => {
+    if (nextCursor) {
+      setPageCursors(prev => [...prev, nextCursor]);
     }
   };
 
@@ -276,7 +288,7 @@ export default function Dashboard() {
         ) : (
           <img
             key={`cam-${camera.id}-retry-${retryCount[camera.id] || 0}`}
-            src={`${API_BASE_URL}/video_feed/${camera.id}`}
+            src={`${API_BASE_URL}/video_feed/${camera.id}?${GRID_STREAM_PARAMS}`}
             alt={camera.name}
             style={{ width: '100%', height: '100%', objectFit: 'cover' }}
             onError={() => handleVideoError(camera.id)}
@@ -296,26 +308,20 @@ export default function Dashboard() {
     <div className="dashboard-pagination">
       <button 
         className="dashboard-pagination-arrow" 
-        onClick={() => handlePageChange(currentPage - 1)}
+        onClick={goToPreviousPage}
         disabled={currentPage === 1}
       >
         &lt;
       </button>
       
-      {[...Array(totalPages)].map((_, index) => (
-        <button
-          key={index}
-          className={`dashboard-pagination-number ${currentPage === index + 1 ? 'active' : ''}`}
-          onClick={() => handlePageChange(index + 1)}
-        >
-          {index + 1}
-        </button>
-      ))}
+      <button className="dashboard-pagination-number active">
+        {currentPage} / {totalPages}
+      </button>
       
       <button 
         className="dashboard-pagination-arrow" 
-        onClick={() => handlePageChange(currentPage + 1)}
-        disabled={currentPage === totalPages}
+        onClick={goToNextPage}
+        disabled={!nextCursor}
       >
         &gt;
       </button>
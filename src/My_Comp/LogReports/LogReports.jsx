@@ -14,6 +14,10 @@ const LogReports = () => {
         alert_type: '',
         date: ''
     });
+    // Page tokens of the pages visited so far (null for the first page), and the token of the next one
+    const [pageCursors, setPageCursors] = useState([null]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const currentCursor = pageCursors[pageCursors.length - 1];
 
     const API_BASE_URL = 'http://localhost:5000';
 
@@ -29,10 +33,12 @@ const LogReports = () => {
                 if (filters.camera) params.append('camera', filters.camera);
                 if (filters.alert_type) params.append('alert_type', filters.alert_type);
                 if (filters.date) params.append('date', filters.date);
+                if (currentCursor) params.append('cursor', currentCursor);
                 
                 const url = `${API_BASE_URL}/api/detections${params.toString() ? '?' + params.toString() : ''}`;
                 const response = await axios.get(url);
-                setDetections(response.data);
+                setDetections(response.data.detections);
+                setNextCursor(response.data.next);
                 setLoading(false);
             } catch (err) {
                 setError('Failed to fetch detections');
@@ -49,9 +55,10 @@ const LogReports = () => {
 
         // Cleanup interval on component unmount
         return () => clearInterval(interval);
-    }, [filters]); // Re-fetch when filters change
+    }, [filters, currentCursor]); // Re-fetch when filters or page change
 
     const handleFilterChange = (filterType, value) => {
+        setPageCursors([null]);
         setFilters(prev => {
             const newFilters = { ...prev, [filterType]: value };
             
@@ -68,6 +75,7 @@ const LogReports = () => {
     };
 
     const resetFilters = () => {
+        setPageCursors([null]);
         setFilters({
             region: '',
             sub_region: '',
@@ -306,26 +314,20 @@ const LogReports = () => {
                 <div className="log-reports-pagination">
                     <button
                         className="log-reports-pagination-arrow"
-                        onClick={() => {/* Handle previous page */}}
-                        disabled={false} // Set to true for first page
+                        onClick={() => setPageCursors(prev => prev.slice(0, -1))}
+                        disabled={pageCursors.length === 1}
                     >
                         &lt;
                     </button>
                     
-                    {[1, 2, 3, 4].map(page => (
-                        <button 
-                            key={page}
-                            className={`log-reports-pagination-number ${page === 1 ? 'active' : ''}`}
-                            onClick={() => {/* Handle page change */}}
-                        >
-                            {page}
-                        </button>
-                    ))}
+                    <button className="log-reports-pagination-number active">
+                        {pageCursors.length}
+                    </button>
                     
                     <button
                         className="log-reports-pagination-arrow"
-                        onClick={() => {/* Handle next page */}}
-                        disabled={false} // Set to true for last page
+                        onClick={() => setPageCursors(prev => [...prev, nextCursor])}
+                        disabled={!nextCursor}
                     >
                         &gt;
                     </button>
@@ -10,22 +10,26 @@ export default function UserManagement() {
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
-  const [currentPage, setCurrentPage] = useState(1);
+  // Page tokens of the pages visited so far (null for the first page), and the token of the next one
+  const [pageCursors, setPageCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [totalPages, setTotalPages] = useState(1);
+  const currentPage = pageCursors.length;
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
   const [userToDelete, setUserToDelete] = useState(null);
 
   // Fetch users from backend
   useEffect(() => {
     fetchUsers();
-  }, [currentPage]);
+  }, [pageCursors]);
 
   const fetchUsers = async () => {
     try {
       setLoading(true);
-      const data = await api.getUsers(currentPage);
+      const data = await api.getUsers(pageCursors[pageCursors.length - 1]);
       setUsers(data.users);
-      setTotalPages(data.total_pages);
+      setNextCursor(data.next);
+      setTotalPages(data.total_pages || currentPage);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -78,8 +82,12 @@ export default function UserManagement() {
   };
 
   // Handle page change
-  const handlePageChange = (page) => {
-    setCurrentPage(page);
+  const goToPreviousPage = () => {
+    setPageCursors(prev => prev.slice(0, -1));
+  };
+
+  const goToNextPage = () => {
+    setPageCursors(prev => [...prev, nextCursor]);
   };
 
   // Function to get user initials
@@ -92,49 +100,6 @@ export default function UserManagement() {
       .slice(0, 2);
   };
 
-  // Function to get pagination numbers
-  const getPaginationNumbers = () => {
-    const maxVisiblePages = 5;
-    const halfMaxPages = Math.floor(maxVisiblePages / 2);
-    let pages = [];
-
-    if (totalPages <= maxVisiblePages) {
-      // If total pages is less than max visible, show all pages
-      pages = Array.from({ length: totalPages }, (_, i) => i + 1);
-    } else {
-      // Always show first page
-      pages.push(1);
-
-      // Calculate start and end of visible pages
-      let startPage = Math.max(2, currentPage - halfMaxPages);
-      let endPage = Math.min(totalPages - 1, currentPage + halfMaxPages);
-
-      // Adjust start and end if we're near the edges
-      if (currentPage <= halfMaxPages) {
-        startPage = 2;
-        endPage = maxVisiblePages - 1;
-      } else if (currentPage > totalPages - halfMaxPages) {
-        startPage = totalPages - maxVisiblePages + 2;
-        endPage = totalPages - 1;
-      }
-
-      // Add ellipsis and pages
-      if (startPage > 2) {
-        pages.push('...');
-      }
-      for (let i = startPage; i <= endPage; i++) {
-        pages.push(i);
-      }
-      if (endPage < totalPages - 1) {
-        pages.push('...');
-      }
-      // Always show last page
-      pages.push(totalPages);
-    }
-
-    return pages;
-  };
-
   // Function to format access level display
   const formatAccessLevel = (accessLevel) => {
     try {
@@ -208,32 +173,20 @@ export default function UserManagement() {
         <div className="user-management-pagination">
           <button 
             className="user-management-pagination-button"
-            onClick={() => handlePageChange(Math.max(1, currentPage - 1))}
+            onClick={goToPreviousPage}
             disabled={currentPage === 1}
           >
             <FaChevronLeft />
           </button>
           
-          {getPaginationNumbers().map((page, index) => (
-            page === '...' ? (
-              <span key={`ellipsis-${index}`} className="user-management-pagination-ellipsis">
-                ...
-              </span>
-            ) : (
-              <button 
-                key={page}
-                className={`user-management-pagination-number ${currentPage === page ? 'active' : ''}`}
-                onClick={() => handlePageChange(page)}
-              >
-                {page}
-              </button>
-            )
-          ))}
+          <button className="user-management-pagination-number active">
+            {currentPage} / {totalPages}
+          </button>
           
           <button 
             className="user-management-pagination-button"
-            onClick={() => handlePageChange(Math.min(totalPages, currentPage + 1))}
-            disabled={currentPage === totalPages}
+            onClick={goToNextPage}
+            disabled={!nextCursor}
           >
             <FaChevronRight />
           </button>
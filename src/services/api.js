@@ -27,8 +27,14 @@ const api = {
   },
 
   // User Management endpoints
-  getUsers: async (page = 1) => {
-    const response = await fetch(`${API_BASE_URL}/users?page=${page}`, {
+  // cursor is the previous page's `next` token; leave it out for the first page
+  getUsers: async (cursor = null) => {
+    const queryParams = new URLSearchParams();
+    if (cursor) {
+      queryParams.append('cursor', cursor);
+    }
+    
+    const response = await fetch(`${API_BASE_URL}/users?${queryParams.toString()}`, {
       headers: {
         'Authorization': `Bearer ${getAuthToken()}`
       }
@@ -134,10 +140,13 @@ const api = {
   },
 
   // Camera Management endpoints
-  getCameras: async (page = 1, options = {}) => {
+  // cursor is the previous page's `next` token; leave it out for the first page
+  getCameras: async (cursor = null, options = {}) => {
     // Build query parameters
     const queryParams = new URLSearchParams();
-    queryParams.append('page', page);
+    if (cursor) {
+      queryParams.append('cursor', cursor);
+    }
     
     // Add optional filters
     if (options.status) {
@@ -152,6 +161,11 @@ const api = {
     return handleResponse(response);
   },
 
+  // URL of a camera's latest still image, for <img> tags (no auth, like the video feed)
+  getCameraSnapshotUrl: (cameraId, width = 160) => {
+    return `${API_BASE_URL}/cameras/${cameraId}/snapshot.jpg?width=${width}&quality=60`;
+  },
+
   validateCameraUrl: async (url) => {
     const response = await fetch(`${API_BASE_URL}/cameras/validate-url`, {
       method: 'POST',